@@ -1,11 +1,15 @@
 from fastapi import FastAPI, HTTPException
 from fastapi.middleware.cors import CORSMiddleware
-import httpx
 import os
-from app.routers import analysis
-from app.config import MODEL_FALLBACK_PRIORITY, OLLAMA_ENABLED, OLLAMA_API_BASE
+from app.routers import analysis, jobs
+from app.config import MODEL_FALLBACK_PRIORITY, OLLAMA_ENABLED
+from app.main import lifespan
+from app.config import OLLAMA_MODEL
+from app.utils.http_client import get_http_client
+from app.services.ollama_warmup import is_model_loaded
+from app.utils.circuit_breaker import circuit_breakers
 
-app = FastAPI()
+app = FastAPI(lifespan=lifespan)
 
 app.add_middleware(
     CORSMiddleware,
@@ -16,6 +20,7 @@ app.add_middleware(
 )
 
 app.include_router(analysis.router, prefix="/api")
+app.include_router(jobs.router, prefix="/api")
 
 @app.get("/")
 async def root():
@@ -29,14 +34,16 @@ async def root():
 async def health_check():
     try:
         if OLLAMA_ENABLED:
-            async with httpx.AsyncClient() as client:
-                response = await client.get(f"{OLLAMA_API_BASE}/api/version")
-                if response.status_code == 200:
-                    return {
-                        "status": "healthy",
-                        "ollama": "connected",
-                        "version": response.json()["version"]
-                    }
-        return {"status": "healthy", "ollama": "disabled"}
+            response = await get_http_client("ollama").get("/api/version")
+            if response.status_code == 200:
+                return {
+                    "status": "healthy",
+                    "ollama": "connected",
+                    "version": response.json()["version"],
+                    "model": OLLAMA_MODEL,
+                    "model_loaded": await is_model_loaded(),
+                    "circuit_breakers": circuit_breakers.snapshot()
+                }
+        return {"status": "healthy", "ollama": "disabled", "circuit_breakers": circuit_breakers.snapshot()}
     except Exception as e:
-        return {"status": "degraded", "error": str(e)}
+        return {"status": "degraded", "error": str(e), "circuit_breakers": circuit_breakers.snapshot()}
@@ -3,13 +3,19 @@ from fastapi.middleware.cors import CORSMiddleware
 import logging
 import os
 from typing import Optional
-from app.routers import analysis
-from app.config import MODEL_FALLBACK_PRIORITY, OLLAMA_ENABLED, OLLAMA_API_BASE
+from app.routers import analysis, jobs
+from app.config import MODEL_FALLBACK_PRIORITY, OLLAMA_ENABLED
+from app.main import lifespan
+from app.config import OLLAMA_MODEL
+from app.utils.http_client import get_http_client
+from app.services.ollama_warmup import is_model_loaded
+from app.utils.circuit_breaker import circuit_breakers
 
 app = FastAPI(
     title="DNA Analysis API",
     description="Health analysis system with local-first model architecture",
-    version="1.0.0"
+    version="1.0.0",
+    lifespan=lifespan
 )
 
 app.add_middleware(
@@ -27,6 +33,7 @@ logging.basicConfig(
 logger = logging.getLogger(__name__)
 
 app.include_router(analysis.router)
+app.include_router(jobs.router)
 
 @app.get("/")
 async def root():
@@ -40,16 +47,17 @@ async def root():
 async def health_check():
     try:
         if OLLAMA_ENABLED:
-            import httpx
-            async with httpx.AsyncClient() as client:
-                response = await client.get(f"{OLLAMA_API_BASE}/api/version")
-                if response.status_code == 200:
-                    return {
-                        "status": "healthy",
-                        "ollama": "connected",
-                        "version": response.json()["version"]
-                    }
-        return {"status": "healthy", "ollama": "disabled"}
+            response = await get_http_client("ollama").get("/api/version")
+            if response.status_code == 200:
+                return {
+                    "status": "healthy",
+                    "ollama": "connected",
+                    "version": response.json()["version"],
+                    "model": OLLAMA_MODEL,
+                    "model_loaded": await is_model_loaded(),
+                    "circuit_breakers": circuit_breakers.snapshot()
+                }
+        return {"status": "healthy", "ollama": "disabled", "circuit_breakers": circuit_breakers.snapshot()}
     except Exception as e:
         logger.error(f"Health check failed: {str(e)}")
-        return {"status": "degraded", "error": str(e)}
+        return {"status": "degraded", "error": str(e), "circuit_breakers": circuit_breakers.snapshot()}
@@ -1,6 +1,9 @@
 from pydantic import BaseModel
 from typing import Dict, List, Optional, Any
 
+class MetricsBatchRequest(BaseModel):
+    sequences: List[str]
+
 class AnalysisResponse(BaseModel):
     status: str
     analysis: Dict[str, Any]
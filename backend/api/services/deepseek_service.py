@@ -1,13 +1,32 @@
 import httpx
 import logging
+import re
 from fastapi import HTTPException
+from typing import List, Optional
+from .. import config
 from ..config import DEEPSEEK_API_KEY
+from ..utils.chunking import chunk_text, map_chunks, merge_analyses
+from ..utils.http_client import get_http_client
+from ..utils.metrics import compute_metrics
+from ..utils.retry import get_retry_policy
+from ..utils.stream_parser import parse_sections
+from ..utils.structured_output import json_prompt, parse_structured
+from ..utils.vitals import Vitals
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
-async def analyze_with_deepseek(sequence: str) -> dict:
+DNA_LINE_PATTERN = re.compile(r"^.*(?:DNA|基因|序列).*$", re.MULTILINE)
+
+SYSTEM_ROLE = "你是一位专业的健康分析AI助手。请分析提供的健康数据并给出详细的分析结果。"
+
+async def analyze_with_deepseek(sequence: str, vitals: Optional[Vitals] = None) -> dict:
+    """Analyze an input with DeepSeek, chunk by chunk when it is too large for one request.
+
+    The metrics come from the local engine and are computed once for the
+    whole input, from `vitals` when the caller already extracted them.
+    """
     if not sequence:
         raise HTTPException(
             status_code=400,
@@ -20,6 +39,16 @@ async def analyze_with_deepseek(sequence: str) -> dict:
             detail="DeepSeek API key is not configured"
         )
 
+    chunks = chunk_text(sequence, config.CHUNK_MAX_TOKENS)
+    if len(chunks) > 1:
+        result = await analyze_chunks_with_deepseek(chunks)
+    else:
+        result = await request_analysis(sequence)
+    result["analysis"]["metrics"] = compute_metrics(sequence, vitals)
+    return result
+
+async def request_analysis(sequence: str) -> dict:
+    """One DeepSeek completion for `sequence`, parsed into an analysis without metrics."""
     headers = {
         "Authorization": f"Bearer {DEEPSEEK_API_KEY}",
         "Content-Type": "application/json"
@@ -30,7 +59,7 @@ async def analyze_with_deepseek(sequence: str) -> dict:
         "messages": [
             {
                 "role": "system",
-                "content": """你是一位专业的健康分析AI助手。请分析提供的健康数据并给出详细的分析结果。
+                "content": f"""{SYSTEM_ROLE}
 请按以下格式输出分析结果：
 
 总结：
@@ -58,157 +87,92 @@ async def analyze_with_deepseek(sequence: str) -> dict:
         "frequency_penalty": 0.0,
         "presence_penalty": 0.0
     }
+    if config.STRUCTURED_OUTPUT_ENABLED:
+        data["messages"][0]["content"] = json_prompt(SYSTEM_ROLE)
+        data["response_format"] = {"type": "json_object"}
+        data["max_tokens"] = config.STRUCTURED_OUTPUT_MAX_TOKENS
 
     try:
         logger.info(f"Sending request to DeepSeek API with sequence length: {len(sequence)}")
-        async with httpx.AsyncClient(timeout=60.0) as client:
-            response = await client.post(
-                "https://api.deepseek.com/v1/chat/completions",
-                json=data,
-                headers=headers,
-                timeout=60.0
+        client = get_http_client("deepseek")
+        response = await get_retry_policy("deepseek").call(lambda: client.post(
+            "https://api.deepseek.com/v1/chat/completions",
+            json=data,
+            headers=headers,
+            timeout=60.0
+        ))
+
+        if response.status_code == 429:
+            logger.error("Rate limit exceeded")
+            raise HTTPException(
+                status_code=429,
+                detail="DeepSeek API rate limit exceeded. Please try again later."
+            )
+        if response.status_code != 200:
+            error_detail = response.json() if response.content else "No error details available"
+            logger.error(f"DeepSeek API error: {error_detail}")
+            raise HTTPException(
+                status_code=response.status_code,
+                detail=f"DeepSeek API error: {error_detail}"
             )
             
-            if response.status_code != 200:
-                error_detail = response.json() if response.content else "No error details available"
-                logger.error(f"DeepSeek API error: {error_detail}")
-                raise HTTPException(
-                    status_code=response.status_code,
-                    detail=f"DeepSeek API error: {error_detail}"
-                )
-                
-            result = response.json()
-            logger.info("Successfully received response from DeepSeek API")
-            content = result["choices"][0]["message"]["content"]
-            
-            # Extract DNA/基因 related content first
+        result = response.json()
+        logger.info("Successfully received response from DeepSeek API")
+        content = result["choices"][0]["message"]["content"]
+
+        # JSON-mode completions are decoded and validated in one step; anything
+        # else (or a JSON object that does not validate) goes through the section parser
+        structured = parse_structured(content)
+        if structured:
             dna_content = ""
-            for line in content.split("\n"):
-                if any(keyword in line for keyword in ["DNA", "基因", "序列"]):
-                    dna_content = line + "\n"
-                    break
-
-            # Parse sections from content
-            sections = content.split("\n\n")
-            summary = []
-            recommendations = []
-            risk_factors = []
-            current_section = None
-            section_count = 0
-            
-            # First pass: extract structured sections
-            for section in sections:
-                if "总结" in section or "Summary" in section:
-                    current_section = "summary"
-                    summary.append(section.replace("总结:", "").replace("Summary:", "").strip())
-                elif "建议" in section or "Recommendations" in section:
-                    current_section = "recommendations"
-                elif "风险" in section or "Risk" in section:
-                    current_section = "risks"
-                elif line := section.strip():
-                    if line.startswith("-") or line.startswith("*"):
-                        item = line.strip("- ").strip("*").strip()
-                        if current_section == "recommendations":
-                            recommendations.append(item)
-                        elif current_section == "risks":
-                            risk_factors.append(item)
-                    elif current_section == "summary":
-                        summary.append(line)
-                        
-            # Second pass: extract from bullet points and numbered lists
-            if len(recommendations) < 3 or len(risk_factors) < 2:
-                for line in content.split("\n"):
-                    line = line.strip()
-                    if not line:
-                        continue
-                    if line.startswith(("-", "*", "1.", "2.", "3.", "4.", "5.")):
-                        item = line.strip("- ").strip("*").strip("1234567890.").strip()
-                        if any(keyword in item for keyword in ["建议", "推荐", "应该", "需要"]):
-                            if item not in recommendations:
-                                recommendations.append(item)
-                        elif any(keyword in item for keyword in ["风险", "问题", "危险", "注意"]):
-                            if item not in risk_factors:
-                                risk_factors.append(item)
-
-            # Third pass: if still not enough, try to extract from periods
+            summary = [structured.summary]
+            recommendations = structured.recommendations
+            risk_factors = structured.risk_factors
+        else:
+            # Extract DNA/基因 related content first
+            dna_match = DNA_LINE_PATTERN.search(content)
+            dna_content = dna_match.group(0).strip() + "\n" if dna_match else ""
+
+            # Parse sections in a single pass; bullets and sentences outside any
+            # section only top up lists that came out short
+            parsed = parse_sections(content)
+            summary = parsed.summary
+            recommendations = parsed.recommendations
+            risk_factors = parsed.risk_factors
             if len(recommendations) < 3 or len(risk_factors) < 2:
-                sentences = content.split("。")
-                for sentence in sentences:
-                    sentence = sentence.strip()
-                    if not sentence:
-                        continue
-                    if any(keyword in sentence for keyword in ["建议", "推荐", "应该", "需要", "可以"]):
-                        if sentence not in recommendations:
-                            recommendations.append(sentence)
-                    elif any(keyword in sentence for keyword in ["风险", "问题", "危险", "注意", "可能"]):
-                        if sentence not in risk_factors:
-                            risk_factors.append(sentence)
-
-            # Ensure we have at least 3 recommendations and 2 risk factors
-            if len(recommendations) < 3:
-                recommendations.extend([
-                    "建议进行定期健康检查，及时发现潜在问题",
-                    "保持良好的生活习惯和作息规律",
-                    "建议咨询专业医生获取更详细的建议"
-                ][:3 - len(recommendations)])
-
-            if len(risk_factors) < 2:
-                risk_factors.extend([
-                    "需要进一步检查以确定具体风险",
-                    "可能存在潜在健康隐患"
-                ][:2 - len(risk_factors)])
-            
-            for section in sections:
-                if "总结" in section or "Summary" in section:
-                    current_section = "summary"
-                    summary.append(section.replace("总结:", "").replace("Summary:", "").strip())
-                elif "建议" in section or "Recommendations" in section:
-                    current_section = "recommendations"
-                elif "风险" in section or "Risk Factors" in section:
-                    current_section = "risks"
-                elif line := section.strip():
-                    if line.startswith("-") or line.startswith("*"):
-                        item = line.strip("- ").strip("*").strip()
-                        if current_section == "recommendations":
-                            recommendations.append(item)
-                        elif current_section == "risks":
-                            risk_factors.append(item)
-                    elif current_section == "summary":
-                        summary.append(line)
-            
-            metrics = {
-                "healthScore": 75,
-                "stressLevel": "medium",
-                "sleepQuality": "fair",
-                "riskLevel": "medium",
-                "confidenceScore": 0.85,
-                "healthIndex": 80
-            }
-            
-            final_summary = dna_content + (" ".join(summary) if summary else content)
-            
-            # Ensure we have at least 3 sections
-            if len(recommendations) == 0 and len(risk_factors) == 0:
-                sections = content.split("。")
-                for section in sections:
-                    if "建议" in section or "推荐" in section:
-                        recommendations.append(section.strip())
-                    elif "风险" in section or "危险" in section:
-                        risk_factors.append(section.strip())
-
-            return {
-                "success": True,
-                "analysis": {
-                    "summary": final_summary,
-                    "recommendations": recommendations or ["请提供更详细的健康数据以获取具体建议"],
-                    "risk_factors": risk_factors or ["无法从提供的数据中确定风险因素"],
-                    "metrics": metrics,
-                    "analysisType": "health"
-                },
-                "model": "deepseek-chat",
-                "provider": "deepseek"
-            }
-            
+                recommendations += [r for r in parsed.unsectioned["recommendation"] if r not in recommendations]
+                risk_factors += [r for r in parsed.unsectioned["risk_factor"] if r not in risk_factors]
+
+        # Ensure we have at least 3 recommendations and 2 risk factors
+        if len(recommendations) < 3:
+            recommendations.extend([
+                "建议进行定期健康检查，及时发现潜在问题",
+                "保持良好的生活习惯和作息规律",
+                "建议咨询专业医生获取更详细的建议"
+            ][:3 - len(recommendations)])
+
+        if len(risk_factors) < 2:
+            risk_factors.extend([
+                "需要进一步检查以确定具体风险",
+                "可能存在潜在健康隐患"
+            ][:2 - len(risk_factors)])
+
+        final_summary = dna_content + (" ".join(summary) if summary else content)
+
+        return {
+            "success": True,
+            "analysis": {
+                "summary": final_summary,
+                "recommendations": recommendations or ["请提供更详细的健康数据以获取具体建议"],
+                "risk_factors": risk_factors or ["无法从提供的数据中确定风险因素"],
+                "analysisType": "health"
+            },
+            "model": "deepseek-chat",
+            "provider": "deepseek"
+        }
+
+    except HTTPException:
+        raise
     except httpx.TimeoutException as e:
         logger.error(f"Request timeout: {str(e)}")
         raise HTTPException(
@@ -226,4 +190,15 @@ async def analyze_with_deepseek(sequence: str) -> dict:
         raise HTTPException(
             status_code=500,
             detail=f"Failed to analyze sequence: {str(e)}"
-        )                                                                                                                                       
\ No newline at end of file
+        )
+
+async def analyze_chunks_with_deepseek(chunks: List[str]) -> dict:
+    """Analyze an oversized input chunk by chunk and merge the per-chunk results."""
+    if len(chunks) > config.CHUNK_MAX_COUNT:
+        raise HTTPException(
+            status_code=413,
+            detail=f"Input too large: {len(chunks)} chunks exceeds the limit of {config.CHUNK_MAX_COUNT}"
+        )
+    logger.info(f"Input split into {len(chunks)} chunks, analyzing up to {config.CHUNK_CONCURRENCY} at a time")
+    results = await map_chunks(chunks, request_analysis, config.CHUNK_CONCURRENCY)
+    return {**results[0], "analysis": merge_analyses([result["analysis"] for result in results])}
@@ -1,28 +1,28 @@
-import httpx
 import asyncio
 import json
-import re
 from typing import Dict, Any, Optional
 from .. import config
+from ..utils.http_client import get_http_client
+from .ollama_registry import model_registry
+from .ollama_governor import get_governor
+from ..utils.retry import get_retry_policy
+from ..utils.deadline import remaining
+from ..utils.structured_output import json_prompt, parse_structured
+from ..utils.vitals import Vitals, extract_vitals
+from ..utils.metrics import THRESHOLDS, compute_metrics
 from fastapi import HTTPException
 
-async def analyze_with_ollama(sequence: str, analysis_type: str = "health") -> Dict[str, Any]:
+async def analyze_with_ollama(sequence: str, analysis_type: str = "health", vitals: Optional[Vitals] = None) -> Dict[str, Any]:
     if not sequence or not sequence.strip():
         raise HTTPException(status_code=400, detail="Empty sequence provided")
         
     try:
-        async with httpx.AsyncClient(base_url=config.OLLAMA_API_BASE, timeout=config.OLLAMA_TIMEOUT_SECONDS) as client:
-            # First verify model is available
-            response = await client.get("/api/tags")
-            if response.status_code != 200:
-                raise HTTPException(status_code=500, detail="Failed to get available models")
-                
-            models = response.json().get("models", [])
-            model_name = next((m["name"] for m in models if "deepseek" in m["name"].lower()), None)
-            if not model_name:
-                raise HTTPException(status_code=500, detail="DeepSeek model not found in Ollama")
-                
-            system_prompt = f"""你是一位专业的{analysis_type}分析AI助手。请仔细分析以下健康数据，并提供详细的分析结果。
+        client = get_http_client("ollama")
+        # Model discovery is cached by the registry instead of hitting /api/tags every call
+        model_name = await model_registry.get_model(client)
+
+        role = f"你是一位专业的{analysis_type}分析AI助手。请仔细分析以下健康数据，并提供详细的分析结果。"
+        system_prompt = f"""{role}
 请严格按照以下格式输出分析结果：
 
 总结：
@@ -38,37 +38,52 @@ async def analyze_with_ollama(sequence: str, analysis_type: str = "health") -> D
 - 分析生活习惯带来的潜在健康威胁
 
 请确保使用中文回复，提供具体、可操作的建议。对异常指标进行重点分析，并给出针对性的改善方案。"""
+
+        payload = {
+            "model": model_name,
+            "prompt": f"{system_prompt}\n\n分析数据：{sequence}",
+            "stream": False,
+            "keep_alive": config.OLLAMA_KEEP_ALIVE,
+            "options": {
+                "temperature": 0.3,
+                "top_p": 0.95
+            }
+        }
+        if config.STRUCTURED_OUTPUT_ENABLED:
+            payload["prompt"] = f"{json_prompt(role)}\n\n分析数据：{sequence}"
+            payload["format"] = "json"
+            payload["options"]["num_predict"] = config.STRUCTURED_OUTPUT_MAX_TOKENS
+        # The local model serialises generations; queue here or fail fast so the caller can fall back
+        async with get_governor(model_name).slot(deadline=remaining(config.OLLAMA_TIMEOUT_SECONDS)):
+            response = await get_retry_policy("ollama").call(lambda: client.post("/api/generate", json=payload))
+
+            # The cached model may have been removed from Ollama; rediscover once and
+            # retry within the same slot so the retry counts against the concurrency cap
+            if response.status_code == 404:
+                model_registry.invalidate()
+                payload["model"] = model_name = await model_registry.get_model(client)
+                response = await get_retry_policy("ollama").call(lambda: client.post("/api/generate", json=payload))
+
+        if response.status_code != 200:
+            error_detail = response.json() if response.content else "No error details available"
+            raise HTTPException(status_code=500, detail=f"Ollama API error: {response.status_code} - {error_detail}")
             
-            # Use the found model name
-            response = await client.post("/api/generate", json={
-                "model": model_name,
-                "prompt": f"{system_prompt}\n\n分析数据：{sequence}",
-                "stream": False,
-                "options": {
-                    "temperature": 0.3,
-                    "top_p": 0.95
-                }
-            })
+        result = response.json()
+        if not result.get("response"):
+            raise HTTPException(status_code=500, detail="Empty response from Ollama model")
             
-            if response.status_code != 200:
-                error_detail = response.json() if response.content else "No error details available"
-                raise HTTPException(status_code=500, detail=f"Ollama API error: {response.status_code} - {error_detail}")
-                
-            result = response.json()
-            if not result.get("response"):
-                raise HTTPException(status_code=500, detail="Empty response from Ollama model")
-                
-            response_text = result.get("response", "")
-            if not response_text or not any(indicator in sequence for indicator in ["血压", "血糖", "BMI", "胆固醇"]):
-                raise HTTPException(status_code=500, detail="Error processing health data: No valid health indicators found")
-                
-            return parse_ollama_response(response_text, analysis_type, model_name, sequence)
+        response_text = result.get("response", "")
+        if not response_text or not any(indicator in sequence for indicator in ["血压", "血糖", "BMI", "胆固醇"]):
+            raise HTTPException(status_code=500, detail="Error processing health data: No valid health indicators found")
+            
+        return parse_ollama_response(response_text, analysis_type, model_name, sequence, vitals)
     except HTTPException:
         raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Ollama model failed: {str(e)}")
 
-def parse_ollama_response(raw_response: str, analysis_type: str, model_name: str, input_data: str = "") -> Dict[str, Any]:
+def parse_ollama_response(raw_response: str, analysis_type: str, model_name: str, input_data: str = "",
+                          vitals: Optional[Vitals] = None) -> Dict[str, Any]:
     try:
         sections = raw_response.split("\n\n")
         summary = []
@@ -76,40 +91,31 @@ def parse_ollama_response(raw_response: str, analysis_type: str, model_name: str
         risk_factors = []
         current_section = None
         
-        # First pass: extract medical values for context
-        bp_high = False
-        glucose_high = False
-        chol_high = False
-        bmi_high = False
+        # Vitals are extracted once (unless the caller already did) and shared with the metrics
+        if vitals is None:
+            vitals = extract_vitals(input_data)
+        bp_high = (vitals.systolic_bp or 0) >= THRESHOLDS["blood_pressure_high"]
+        glucose_high = (vitals.glucose or 0) >= THRESHOLDS["blood_glucose_high"]
+        chol_high = (vitals.total_cholesterol or 0) >= THRESHOLDS["cholesterol_high"]
+        bmi_high = (vitals.bmi or 0) >= THRESHOLDS["bmi_overweight"]
         sleep_poor = False
         stress_high = False
         
-        if "血压：" in input_data:
-            bp_match = re.search(r'血压：(\d+)/(\d+)', input_data)
-            if bp_match and float(bp_match.group(1)) >= 140:
-                bp_high = True
-            
-        if "血糖：" in input_data:
-            glucose_match = re.search(r'血糖：(\d+\.?\d*)', input_data)
-            if glucose_match and float(glucose_match.group(1)) >= 7.0:
-                glucose_high = True
-                
-        if "胆固醇：" in input_data:
-            chol_match = re.search(r'胆固醇：(\d+\.?\d*)', input_data)
-            if chol_match and float(chol_match.group(1)) >= 5.2:
-                chol_high = True
-                
-        if "BMI" in input_data:
-            bmi_match = re.search(r'BMI[：:]\s*(\d+\.?\d*)', input_data)
-            if bmi_match and float(bmi_match.group(1)) >= 25.0:
-                bmi_high = True
-                
         if any(term in input_data for term in ["睡眠质量差", "失眠", "睡眠不足"]):
             sleep_poor = True
             
         if any(term in input_data for term in ["压力大", "焦虑", "紧张", "疲劳"]):
             stress_high = True
 
+        # JSON-mode responses are decoded and validated in one step; the section
+        # heuristics below only run for anything else
+        structured = parse_structured(raw_response)
+        if structured:
+            summary = [structured.summary]
+            recommendations = structured.recommendations
+            risk_factors = structured.risk_factors
+            sections = []
+
         # First pass: structured section extraction
         for section in sections:
             section = section.strip()
@@ -167,7 +173,7 @@ def parse_ollama_response(raw_response: str, analysis_type: str, model_name: str
                 risk_factors.append("亚健康风险：长期的睡眠问题和压力可能导致身心健康问题")
 
         # Second pass: extract from unstructured text if needed
-        if len(recommendations) < 3 or len(risk_factors) < 2:
+        if not structured and (len(recommendations) < 3 or len(risk_factors) < 2):
             for line in raw_response.split("\n"):
                 line = line.strip()
                 if not line:
@@ -193,77 +199,8 @@ def parse_ollama_response(raw_response: str, analysis_type: str, model_name: str
                 "可能存在潜在健康隐患"
             ][:2 - len(risk_factors)])
     
-        # Calculate dynamic metrics based on analysis content
-        health_indicators = {
-            "high_risk": ["高血压", "高血糖", "肥胖", "吸烟", "过度疲劳", "血压偏高", "血糖偏高", "胆固醇偏高", "超重", "心血管", "糖尿病"],
-            "sleep_issues": ["睡眠不足", "失眠", "睡眠质量差", "睡眠时间不足", "深夜"],
-            "stress_indicators": ["压力", "焦虑", "紧张", "疲劳", "工作压力", "加班", "不规律"]
-        }
-        
-        # Analyze full text and raw input for health indicators
-        full_text = " ".join([input_data] + summary + recommendations + risk_factors)
-        
-        # Define medical thresholds
-        thresholds = {
-            "blood_pressure_high": 140,  # systolic
-            "blood_glucose_high": 7.0,   # mmol/L
-            "cholesterol_high": 5.2,     # mmol/L
-            "bmi_overweight": 25.0,
-            "bmi_obese": 30.0
-        }
-        
-        # Extract numerical values from data
-        bp_match = re.search(r'血压：(\d+)/(\d+)', full_text)
-        glucose_match = re.search(r'血糖：(\d+\.?\d*)', full_text)
-        chol_match = re.search(r'胆固醇：(\d+\.?\d*)', full_text)
-        bmi_match = re.search(r'BMI[：:]\s*(\d+\.?\d*)', full_text)
-        
-        # Calculate risk score based on multiple factors
-        risk_score = 0
-    
-        # Add risks from numerical values
-        if bp_match and float(bp_match.group(1)) >= thresholds["blood_pressure_high"]:
-            risk_score += 2
-        if glucose_match and float(glucose_match.group(1)) >= thresholds["blood_glucose_high"]:
-            risk_score += 2
-        if chol_match and float(chol_match.group(1)) >= thresholds["cholesterol_high"]:
-            risk_score += 1.5
-        if bmi_match:
-            bmi = float(bmi_match.group(1))
-            if bmi >= thresholds["bmi_obese"]:
-                risk_score += 2
-            elif bmi >= thresholds["bmi_overweight"]:
-                risk_score += 1
-        
-        # Add risks from text indicators
-        risk_score += sum(1 for r in risk_factors if any(i in r for i in health_indicators["high_risk"]))
-        risk_score += sum(0.5 for i in health_indicators["high_risk"] if i in full_text)
-        
-        # Calculate sleep and stress scores
-        sleep_issues = sum(1 for i in health_indicators["sleep_issues"] if i in full_text)
-        stress_level = sum(1 for i in health_indicators["stress_indicators"] if i in full_text)
-        
-        # Calculate base health score
-        health_score = 100
-        health_score -= min(50, risk_score * 7)    # High risk factors have major impact
-        health_score -= min(20, sleep_issues * 6)  # Sleep issues impact
-        health_score -= min(20, stress_level * 5)  # Stress impact
-        health_score = max(30, health_score)       # Ensure minimum score
-        
-        # Calculate confidence based on response completeness
-        confidence_score = 0.95 if len(summary) > 0 and len(recommendations) >= 3 and len(risk_factors) >= 2 else 0.85
-        confidence_score -= 0.1 if len(summary) == 0 else 0
-        confidence_score -= 0.1 if len(recommendations) < 2 else 0
-        confidence_score = max(0.6, confidence_score)
-        
-        metrics = {
-            "healthScore": round(health_score),
-            "stressLevel": "high" if stress_level >= 3 else "medium" if stress_level >= 1 else "low",
-            "sleepQuality": "poor" if sleep_issues >= 2 else "fair" if sleep_issues >= 1 else "good",
-            "riskLevel": "high" if risk_score >= 4 else "medium" if risk_score >= 2 else "low",
-            "confidenceScore": round(confidence_score, 2),
-            "healthIndex": round(max(30, health_score - (100 - confidence_score * 100) / 5))
-        }
+        # Metrics come from the input's vitals and indicators, not from the model output
+        metrics = compute_metrics(input_data, vitals)
 
         return {
             "success": True,
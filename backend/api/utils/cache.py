@@ -1,54 +1,151 @@
-from typing import Any, Optional
+from typing import Any, Dict, List, Optional, Tuple
+import heapq
+import itertools
+import json
+import sys
 import time
 from collections import OrderedDict
+from .. import config
+
+
+def approximate_size(value: Any) -> int:
+    """估算缓存值占用的字节数（按 JSON 序列化后的 UTF-8 长度）"""
+    try:
+        return len(json.dumps(value, ensure_ascii=False, default=str).encode("utf-8"))
+    except (TypeError, ValueError):
+        return sys.getsizeof(value)
+
 
 class Cache:
-    def __init__(self, max_size: int = 1000, ttl: int = 3600):
+    """LRU cache with a TTL, an entry limit and an approximate byte limit.
+
+    Expiry times are also pushed onto a min-heap. `cleanup` only pops the
+    entries that have expired, so each entry is removed at most once
+    (amortised O(1)) instead of by scanning the whole cache. Heap entries that
+    an overwrite or delete made stale are skipped when popped.
+    """
+
+    def __init__(self, max_size: int = 1000, ttl: int = 3600, max_bytes: Optional[int] = None):
         self.max_size = max_size
         self.ttl = ttl  # Time to live in seconds
-        self.cache: OrderedDict[str, tuple[Any, float]] = OrderedDict()
+        self.max_bytes = max_bytes
+        # key -> (value, expires_at, size)
+        self.cache: OrderedDict[str, Tuple[Any, float, int]] = OrderedDict()
+        self._expiry_heap: List[Tuple[float, int, str]] = []
+        self._counter = itertools.count()
+        self.total_bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
 
     def get(self, key: str) -> Optional[Any]:
         """获取缓存的值"""
-        if key not in self.cache:
+        entry = self.cache.get(key)
+        if entry is None:
+            self.misses += 1
             return None
 
-        value, timestamp = self.cache[key]
-        if time.time() - timestamp > self.ttl:
-            del self.cache[key]
+        value, expires_at, _ = entry
+        if time.time() >= expires_at:
+            self._remove(key)
+            self.expirations += 1
+            self.misses += 1
             return None
 
         # 更新访问顺序
         self.cache.move_to_end(key)
+        self.hits += 1
         return value
 
     def set(self, key: str, value: Any):
         """设置缓存"""
-        if len(self.cache) >= self.max_size:
-            # 删除最早的项目
-            self.cache.popitem(last=False)
+        self.cleanup()
+        size = approximate_size(value)
+        if self.max_bytes is not None and size > self.max_bytes:
+            # 单项超过容量上限，不缓存
+            self.delete(key)
+            return
 
-        self.cache[key] = (value, time.time())
-        self.cache.move_to_end(key)
+        self.delete(key)
+        expires_at = time.time() + self.ttl
+        self.cache[key] = (value, expires_at, size)
+        self.total_bytes += size
+        heapq.heappush(self._expiry_heap, (expires_at, next(self._counter), key))
+
+        # 按 LRU 顺序淘汰，直到满足条目数和字节数限制
+        while len(self.cache) > self.max_size or (self.max_bytes is not None and self.total_bytes > self.max_bytes):
+            oldest = next(iter(self.cache))
+            self._remove(oldest)
+            self.evictions += 1
+
+        if len(self._expiry_heap) > 2 * len(self.cache) + 64:
+            self._compact_heap()
 
     def delete(self, key: str):
         """删除缓存项"""
         if key in self.cache:
-            del self.cache[key]
+            self._remove(key)
 
     def clear(self):
         """清除所有缓存"""
         self.cache.clear()
+        self._expiry_heap.clear()
+        self.total_bytes = 0
 
     def cleanup(self):
         """清理过期的缓存项"""
-        current_time = time.time()
-        expired_keys = [
-            key for key, (_, timestamp) in self.cache.items()
-            if current_time - timestamp > self.ttl
+        now = time.time()
+        heap = self._expiry_heap
+        while heap and heap[0][0] <= now:
+            expires_at, _, key = heapq.heappop(heap)
+            entry = self.cache.get(key)
+            if entry is not None and entry[1] == expires_at:
+                self._remove(key)
+                self.expirations += 1
+
+    def stats(self) -> Dict[str, Any]:
+        """缓存统计信息，可导出为监控指标"""
+        lookups = self.hits + self.misses
+        return {
+            "entries": len(self.cache),
+            "bytes": self.total_bytes,
+            "max_entries": self.max_size,
+            "max_bytes": self.max_bytes,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+            "evictions": self.evictions,
+            "expirations": self.expirations,
+        }
+
+    def _remove(self, key: str):
+        _, _, size = self.cache.pop(key)
+        self.total_bytes -= size
+
+    def _compact_heap(self):
+        # 丢弃已被覆盖或删除的堆条目
+        self._expiry_heap = [
+            item for item in self._expiry_heap
+            if item[2] in self.cache and self.cache[item[2]][1] == item[0]
         ]
-        for key in expired_keys:
-            del self.cache[key]
+        heapq.heapify(self._expiry_heap)
+
+
+def cache_policy(cache_control: Optional[str]) -> Tuple[bool, bool]:
+    """解析 Cache-Control 请求头，返回 (是否读取缓存, 是否写入缓存)"""
+    if not config.ANALYSIS_CACHE_ENABLED:
+        return False, False
+    directives = {d.strip().lower() for d in (cache_control or "").split(",")}
+    if "no-store" in directives:
+        return False, False
+    if "no-cache" in directives or "max-age=0" in directives:
+        return False, True
+    return True, True
 
 # 创建缓存实例
-analysis_cache = Cache() 
\ No newline at end of file
+analysis_cache = Cache(
+    max_size=config.ANALYSIS_CACHE_MAX_SIZE,
+    ttl=config.ANALYSIS_CACHE_TTL_SECONDS,
+    max_bytes=config.ANALYSIS_CACHE_MAX_BYTES
+)
@@ -0,0 +1,55 @@
+import asyncio
+import time
+from contextvars import ContextVar
+from typing import Awaitable, Callable, Optional, TypeVar
+from fastapi import HTTPException
+from .. import config
+
+T = TypeVar("T")
+
+# Header a client can send to lower (never raise past the maximum) its time budget, in seconds
+DEADLINE_HEADER = "X-Request-Timeout"
+
+# Absolute time.monotonic() deadline of the provider call currently running
+_current_deadline: ContextVar[Optional[float]] = ContextVar("request_deadline", default=None)
+
+
+def request_deadline(timeout_header: Optional[str] = None) -> float:
+    """Deadline for a new request, from the client header or REQUEST_DEADLINE_SECONDS."""
+    budget = config.REQUEST_DEADLINE_SECONDS
+    if timeout_header:
+        try:
+            budget = float(timeout_header)
+        except ValueError:
+            raise HTTPException(status_code=400, detail=f"Invalid {DEADLINE_HEADER} header")
+        if budget <= 0:
+            raise HTTPException(status_code=400, detail=f"Invalid {DEADLINE_HEADER} header")
+    return time.monotonic() + min(budget, config.REQUEST_DEADLINE_MAX_SECONDS)
+
+
+def get_deadline() -> Optional[float]:
+    return _current_deadline.get()
+
+
+def remaining(default: float) -> float:
+    """Seconds left before the current deadline, or `default` outside a deadline scope."""
+    deadline = _current_deadline.get()
+    if deadline is None:
+        return default
+    return max(0.0, deadline - time.monotonic())
+
+
+async def run_with_deadline(call: Callable[[], Awaitable[T]], deadline: Optional[float]) -> T:
+    """Await `call()` with `deadline` visible to retries and queues, cancelling it when time runs out."""
+    if deadline is None:
+        return await call()
+    timeout = deadline - time.monotonic()
+    if timeout <= 0:
+        raise HTTPException(status_code=504, detail="Request deadline exceeded")
+    token = _current_deadline.set(deadline)
+    try:
+        return await asyncio.wait_for(call(), timeout=timeout)
+    except asyncio.TimeoutError:
+        raise HTTPException(status_code=504, detail="Request deadline exceeded")
+    finally:
+        _current_deadline.reset(token)
@@ -0,0 +1,138 @@
+import asyncio
+import hashlib
+import json
+import random
+import re
+import unicodedata
+from collections import OrderedDict
+from functools import partial
+from typing import Dict, List, Optional, Tuple
+from .. import config
+from .vitals import extract_vitals
+
+# Every number in a report takes part in matching, keyed by the label in front of it
+NUMBER_PATTERN = re.compile(r"\d+(?:\.\d+)?")
+LABEL_PATTERN = re.compile(r"([a-z\u4e00-\u9fff]*)[^a-z\u4e00-\u9fff]*$")
+LABEL_WINDOW = 16
+# Everything that is not a letter or CJK character is ignored in the free-text part
+NOISE_PATTERN = re.compile(r"[^a-z\u4e00-\u9fff]+")
+
+NUM_PERMUTATIONS = 64
+SHINGLE_SIZE = 3
+# Only this much free text is MinHashed; the rest has to match exactly
+MINHASH_MAX_CHARS = 2000
+_PRIME = (1 << 61) - 1
+_rng = random.Random(20240315)
+_PERMUTATIONS = [(_rng.randrange(1, _PRIME), _rng.randrange(0, _PRIME)) for _ in range(NUM_PERMUTATIONS)]
+
+
+class Fingerprint:
+    """Digest of everything that has to match exactly plus a MinHash signature of the free text."""
+
+    def __init__(self, bucket: str, signature: List[int]):
+        self.bucket = bucket
+        self.signature = signature
+
+
+def extract_values(text: str) -> Tuple[List[Tuple[str, float]], str]:
+    """Return every number in the text with the label in front of it, and the text without them.
+
+    The values are sorted so that field order does not matter.
+    """
+    values, pieces, last = [], [], 0
+    for match in NUMBER_PATTERN.finditer(text):
+        label = LABEL_PATTERN.search(text, max(0, match.start() - LABEL_WINDOW), match.start())
+        values.append((label.group(1), float(match.group())))
+        pieces.append(text[last:max(last, label.start())])
+        last = match.end()
+    pieces.append(text[last:])
+    return sorted(values), " ".join(pieces)
+
+
+def minhash(text: str) -> List[int]:
+    shingles = {text[i:i + SHINGLE_SIZE] for i in range(max(1, len(text) - SHINGLE_SIZE + 1))} if text else set()
+    hashes = [int.from_bytes(hashlib.blake2b(s.encode("utf-8"), digest_size=8).digest(), "big") for s in shingles]
+    if not hashes:
+        return []
+    return [min((a * h + b) % _PRIME for h in hashes) for a, b in _PERMUTATIONS]
+
+
+def similarity(a: List[int], b: List[int]) -> float:
+    """Estimated Jaccard similarity of two MinHash signatures."""
+    if not a or not b:
+        return 1.0 if a == b else 0.0
+    return sum(1 for x, y in zip(a, b) if x == y) / len(a)
+
+
+def fingerprint(sequence: str, provider: Optional[str] = None, analysis_type: str = "health", **options) -> Fingerprint:
+    """Fingerprint an input so that whitespace, punctuation and field order do not matter.
+
+    The vitals and every number in the text are part of the bucket, so inputs
+    whose values differ at all never match; only the wording of the free text
+    is compared approximately.
+    """
+    text = unicodedata.normalize("NFKC", sequence).lower()
+    values, remainder = extract_values(text)
+    free_text = NOISE_PATTERN.sub("", remainder)
+    exact = [
+        provider, analysis_type, sorted(options.items()),
+        sorted(extract_vitals(sequence).as_dict().items()), values, free_text[MINHASH_MAX_CHARS:]
+    ]
+    bucket = hashlib.blake2b(json.dumps(exact, ensure_ascii=False).encode("utf-8"), digest_size=16).hexdigest()
+    return Fingerprint(bucket, minhash(free_text[:MINHASH_MAX_CHARS]))
+
+
+async def fingerprint_async(sequence: str, *args, **kwargs) -> Fingerprint:
+    """`fingerprint` in the default executor, so the MinHash does not block the event loop."""
+    return await asyncio.get_running_loop().run_in_executor(None, partial(fingerprint, sequence, *args, **kwargs))
+
+
+class NearDuplicateIndex:
+    """Maps fingerprints of cached inputs to their cache keys.
+
+    `find` returns the key of a cached input from the same bucket (same
+    settings and identical values) whose free-text similarity is at least
+    `threshold`. A threshold of 0 disables matching.
+    """
+
+    def __init__(self, threshold: float = 0.0, max_entries: int = 5000):
+        self.threshold = threshold
+        self.max_entries = max_entries
+        self.entries: OrderedDict[str, Fingerprint] = OrderedDict()
+        self.buckets: Dict[str, List[str]] = {}
+
+    @property
+    def enabled(self) -> bool:
+        return self.threshold > 0
+
+    def add(self, fp: Fingerprint, key: str):
+        if key in self.entries:
+            self.entries.move_to_end(key)
+            return
+        self.entries[key] = fp
+        self.buckets.setdefault(fp.bucket, []).append(key)
+        while len(self.entries) > self.max_entries:
+            old_key, old_fp = self.entries.popitem(last=False)
+            self.buckets[old_fp.bucket].remove(old_key)
+            if not self.buckets[old_fp.bucket]:
+                del self.buckets[old_fp.bucket]
+
+    def find(self, fp: Fingerprint) -> Optional[str]:
+        if not self.enabled:
+            return None
+        best_key, best_score = None, self.threshold
+        for key in self.buckets.get(fp.bucket, ()):
+            score = similarity(fp.signature, self.entries[key].signature)
+            if score >= best_score:
+                best_key, best_score = key, score
+        return best_key
+
+    def clear(self):
+        self.entries.clear()
+        self.buckets.clear()
+
+
+# 全局近似重复索引实例
+near_duplicate_index = NearDuplicateIndex(
+    threshold=config.NEAR_DUPLICATE_THRESHOLD
+)
@@ -0,0 +1,29 @@
+from collections import defaultdict, deque
+from typing import Deque, Dict, Optional
+
+
+class LatencyTracker:
+    """Keeps a sliding window of successful call latencies per provider."""
+
+    def __init__(self, window: int = 200):
+        self.window = window
+        self.samples: Dict[str, Deque[float]] = defaultdict(lambda: deque(maxlen=self.window))
+
+    def record(self, provider: str, seconds: float):
+        self.samples[provider].append(seconds)
+
+    def percentile(self, provider: str, q: float, min_samples: int = 1) -> Optional[float]:
+        """Return the q-th percentile (0-1) latency, or None with too few samples."""
+        samples = self.samples.get(provider)
+        if not samples or len(samples) < min_samples:
+            return None
+        ordered = sorted(samples)
+        index = min(len(ordered) - 1, int(q * len(ordered)))
+        return ordered[index]
+
+    def clear(self):
+        self.samples.clear()
+
+
+# 全局延迟统计实例
+latency_tracker = LatencyTracker()
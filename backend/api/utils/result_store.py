@@ -0,0 +1,109 @@
+import asyncio
+import logging
+from datetime import datetime, timedelta
+from typing import Any, Optional, Set, Tuple
+from .. import config
+from .cache import analysis_cache
+from .database import get_db
+from .fingerprint import Fingerprint, near_duplicate_index
+
+logger = logging.getLogger(__name__)
+
+
+class MongoResultStore:
+    """Second-tier analysis cache in a Mongo collection, shared by all workers and kept across restarts.
+
+    Documents carry an `expires_at` field with a TTL index on it, so Mongo
+    removes expired results itself. Reads are bounded by `timeout` and any
+    failure counts as a miss. Writes run as background tasks so that they
+    never delay a response.
+    """
+
+    def __init__(self, collection_name: str = "analysis_cache", ttl: int = 86400, timeout: float = 0.5):
+        self.collection_name = collection_name
+        self.ttl = ttl
+        self.timeout = timeout
+        self._collection = None
+        self._index_ready = False
+        self._pending: Set[asyncio.Task] = set()
+
+    @property
+    def collection(self):
+        if self._collection is None:
+            self._collection = get_db()[self.collection_name]
+        return self._collection
+
+    async def get(self, key: str) -> Optional[Any]:
+        try:
+            doc = await asyncio.wait_for(self.collection.find_one({"_id": key}), timeout=self.timeout)
+        except Exception as e:
+            logger.warning(f"Persistent cache lookup failed: {str(e)}")
+            return None
+        # The TTL monitor only runs once a minute, so check the expiry here as well
+        if not doc or doc.get("expires_at", datetime.min) <= datetime.utcnow():
+            return None
+        return doc.get("value")
+
+    def set_background(self, key: str, value: Any):
+        """Schedule a write without waiting for it."""
+        task = asyncio.create_task(self._write(key, value))
+        self._pending.add(task)
+        task.add_done_callback(self._pending.discard)
+
+    async def drain(self):
+        """Wait for writes still in flight (application shutdown)."""
+        if self._pending:
+            await asyncio.gather(*self._pending, return_exceptions=True)
+
+    async def _write(self, key: str, value: Any):
+        try:
+            if not self._index_ready:
+                await self.collection.create_index("expires_at", expireAfterSeconds=0)
+                self._index_ready = True
+            await self.collection.replace_one(
+                {"_id": key},
+                {"_id": key, "value": value, "expires_at": datetime.utcnow() + timedelta(seconds=self.ttl)},
+                upsert=True
+            )
+        except Exception as e:
+            logger.warning(f"Persistent cache write failed: {str(e)}")
+
+
+# 全局持久化缓存实例
+result_store = MongoResultStore(
+    collection_name=config.PERSISTENT_CACHE_COLLECTION,
+    ttl=config.PERSISTENT_CACHE_TTL_SECONDS,
+    timeout=config.PERSISTENT_CACHE_TIMEOUT_SECONDS
+)
+
+
+async def get_cached_result(key: str, fp: Optional[Fingerprint] = None) -> Tuple[Optional[Any], Optional[str]]:
+    """Look a result up in memory, then in the persistent tier; returns (value, tier).
+
+    With a fingerprint and near-duplicate matching enabled, an exact miss
+    falls back to the closest cached input (tier "near-duplicate").
+    """
+    value = analysis_cache.get(key)
+    if value is not None:
+        return value, "memory"
+    if config.PERSISTENT_CACHE_ENABLED:
+        value = await result_store.get(key)
+        if value is not None:
+            analysis_cache.set(key, value)
+            return value, "persistent"
+    if fp is not None:
+        near_key = near_duplicate_index.find(fp)
+        if near_key is not None and near_key != key:
+            value, _ = await get_cached_result(near_key)
+            if value is not None:
+                return value, "near-duplicate"
+    return None, None
+
+
+def store_result(key: str, value: Any, fp: Optional[Fingerprint] = None):
+    """Store a result in memory now and in the persistent tier in the background."""
+    analysis_cache.set(key, value)
+    if fp is not None:
+        near_duplicate_index.add(fp, key)
+    if config.PERSISTENT_CACHE_ENABLED:
+        result_store.set_background(key, value)
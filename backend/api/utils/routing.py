@@ -0,0 +1,79 @@
+from typing import Dict, List, Tuple
+from .. import config
+
+
+class ProviderStats:
+    """EWMA latency and error rate for one provider / analysis_type pair."""
+
+    def __init__(self, latency: float, alpha: float):
+        self.alpha = alpha
+        self.latency = latency
+        self.error_rate = 0.0
+        self.calls = 0
+
+    def record(self, seconds: float, ok: bool):
+        self.calls += 1
+        if ok:
+            self.latency += self.alpha * (seconds - self.latency)
+        self.error_rate += self.alpha * ((0.0 if ok else 1.0) - self.error_rate)
+
+
+class AdaptiveRouter:
+    """Orders the fallback chain by the expected cost of each provider.
+
+    The cost is the EWMA latency plus the error rate times
+    `error_penalty_seconds`. Local providers have their cost multiplied by
+    `local_weight`, so a value below 1 keeps them first until they are
+    clearly slower. Providers with no samples start at `default_latency`.
+    Ties keep the static MODEL_FALLBACK_PRIORITY order.
+    """
+
+    LOCAL_PROVIDERS = ("ollama",)
+
+    def __init__(self, alpha: float = 0.2, local_weight: float = 0.5,
+                 error_penalty_seconds: float = 30, default_latency: float = 5):
+        self.alpha = alpha
+        self.local_weight = local_weight
+        self.error_penalty_seconds = error_penalty_seconds
+        self.default_latency = default_latency
+        self.stats: Dict[Tuple[str, str], ProviderStats] = {}
+
+    def record(self, provider: str, analysis_type: str, seconds: float, ok: bool):
+        key = (provider, analysis_type)
+        if key not in self.stats:
+            self.stats[key] = ProviderStats(self.default_latency, self.alpha)
+        self.stats[key].record(seconds, ok)
+
+    def cost(self, provider: str, analysis_type: str) -> float:
+        stats = self.stats.get((provider, analysis_type))
+        latency = stats.latency if stats else self.default_latency
+        error_rate = stats.error_rate if stats else 0.0
+        cost = latency + error_rate * self.error_penalty_seconds
+        if provider in self.LOCAL_PROVIDERS:
+            cost *= self.local_weight
+        return cost
+
+    def order(self, providers: List[str], analysis_type: str) -> List[str]:
+        return sorted(providers, key=lambda provider: self.cost(provider, analysis_type))
+
+    def snapshot(self) -> Dict[str, dict]:
+        return {
+            f"{provider}:{analysis_type}": {
+                "latency": round(stats.latency, 3),
+                "error_rate": round(stats.error_rate, 3),
+                "calls": stats.calls,
+            }
+            for (provider, analysis_type), stats in self.stats.items()
+        }
+
+    def clear(self):
+        self.stats.clear()
+
+
+# 全局路由统计实例
+adaptive_router = AdaptiveRouter(
+    alpha=config.ROUTING_EWMA_ALPHA,
+    local_weight=config.ROUTING_LOCAL_WEIGHT,
+    error_penalty_seconds=config.ROUTING_ERROR_PENALTY_SECONDS,
+    default_latency=config.ROUTING_DEFAULT_LATENCY_SECONDS
+)
@@ -0,0 +1,44 @@
+import asyncio
+import copy
+import logging
+from typing import Any, Awaitable, Callable, Dict
+
+logger = logging.getLogger(__name__)
+
+
+class SingleFlight:
+    """Coalesces concurrent calls that share a key into one in-flight call.
+
+    The first caller starts `fn` as a task; callers arriving while it runs
+    await the same task and get a copy of its result (or its exception). The
+    task is shielded, so a caller that disconnects does not cancel the call
+    for the others.
+    """
+
+    def __init__(self):
+        self._calls: Dict[str, asyncio.Task] = {}
+
+    def in_flight(self) -> int:
+        return len(self._calls)
+
+    async def do(self, key: str, fn: Callable[[], Awaitable[Any]]) -> Any:
+        task = self._calls.get(key)
+        if task is not None:
+            logger.info(f"Joining in-flight analysis {key[:12]}")
+            return copy.deepcopy(await asyncio.shield(task))
+
+        task = asyncio.create_task(fn())
+        self._calls[key] = task
+        task.add_done_callback(lambda t: self._forget(key, t))
+        return await asyncio.shield(task)
+
+    def _forget(self, key: str, task: asyncio.Task):
+        if self._calls.get(key) is task:
+            del self._calls[key]
+        # Mark the exception as retrieved when every caller has gone away
+        if not task.cancelled():
+            task.exception()
+
+
+# 全局请求合并实例
+analysis_flights = SingleFlight()
@@ -0,0 +1,61 @@
+import json
+from typing import List, Optional
+from pydantic import BaseModel, ValidationError, field_validator
+
+
+class StructuredAnalysis(BaseModel):
+    """The part of an analysis the model writes itself in JSON output mode."""
+
+    summary: str
+    recommendations: List[str]
+    risk_factors: List[str]
+
+    @field_validator("summary")
+    @classmethod
+    def _summary_not_blank(cls, summary: str) -> str:
+        summary = summary.strip()
+        if not summary:
+            raise ValueError("summary is empty")
+        return summary
+
+    @field_validator("recommendations", "risk_factors")
+    @classmethod
+    def _drop_blank_items(cls, items: List[str]) -> List[str]:
+        return [item.strip() for item in items if item.strip()]
+
+
+ANALYSIS_SCHEMA = StructuredAnalysis.model_json_schema()
+
+JSON_INSTRUCTIONS = (
+    "请只输出一个JSON对象，不要输出其他内容。示例：\n"
+    '{"summary": "总体健康状况分析", "recommendations": ["具体建议1", "具体建议2", "具体建议3"], '
+    '"risk_factors": ["具体风险1", "具体风险2"]}\n'
+    f"JSON Schema：{json.dumps(ANALYSIS_SCHEMA, ensure_ascii=False, separators=(',', ':'))}\n"
+    "请确保使用中文回复，并提供具体、可操作的建议。"
+)
+
+
+def json_prompt(role: str) -> str:
+    """System prompt for JSON output mode: the role sentence followed by the output schema."""
+    return f"{role}\n{JSON_INSTRUCTIONS}"
+
+
+def parse_structured(content: str) -> Optional[StructuredAnalysis]:
+    """Decode and validate a JSON-mode completion in one step (pydantic-core's parser).
+
+    Returns None when the content is not a valid analysis object, so callers
+    can fall back to the heuristic section parser.
+    """
+    content = content.strip()
+    if content.startswith("```"):
+        # Some models fence the object even in JSON mode
+        content = content.strip("`")
+        if content.startswith("json"):
+            content = content[len("json"):]
+        content = content.strip()
+    if not content.startswith("{"):
+        return None
+    try:
+        return StructuredAnalysis.model_validate_json(content)
+    except ValidationError:
+        return None
@@ -29,6 +29,97 @@ OLLAMA_ENABLED = os.getenv('OLLAMA_ENABLED', 'true').lower() == 'true'
 OLLAMA_MODEL = os.getenv('OLLAMA_MODEL', 'deepseek-coder:1.5b')
 OLLAMA_API_BASE = os.getenv('OLLAMA_API_BASE', 'http://localhost:11434')
 OLLAMA_TIMEOUT_SECONDS = int(os.getenv('OLLAMA_TIMEOUT_SECONDS', '10'))
+OLLAMA_MODEL_CACHE_TTL = float(os.getenv('OLLAMA_MODEL_CACHE_TTL', '300'))
+OLLAMA_KEEP_ALIVE = os.getenv('OLLAMA_KEEP_ALIVE', '30m')
+OLLAMA_WARMUP_ENABLED = os.getenv('OLLAMA_WARMUP_ENABLED', 'true').lower() == 'true'
+OLLAMA_WARMUP_TIMEOUT_SECONDS = float(os.getenv('OLLAMA_WARMUP_TIMEOUT_SECONDS', '120'))
+OLLAMA_KEEPALIVE_PING_SECONDS = float(os.getenv('OLLAMA_KEEPALIVE_PING_SECONDS', '240'))
+OLLAMA_MAX_CONCURRENCY = int(os.getenv('OLLAMA_MAX_CONCURRENCY', '1'))
+OLLAMA_MAX_QUEUE = int(os.getenv('OLLAMA_MAX_QUEUE', '8'))
+
+# Analysis Result Cache Configuration
+ANALYSIS_CACHE_ENABLED = os.getenv('ANALYSIS_CACHE_ENABLED', 'true').lower() == 'true'
+ANALYSIS_CACHE_TTL_SECONDS = int(os.getenv('ANALYSIS_CACHE_TTL_SECONDS', '3600'))
+ANALYSIS_CACHE_MAX_SIZE = int(os.getenv('ANALYSIS_CACHE_MAX_SIZE', '1000'))
+ANALYSIS_CACHE_MAX_BYTES = int(os.getenv('ANALYSIS_CACHE_MAX_BYTES', str(64 * 1024 * 1024)))
+
+# Persistent (second-tier) cache in MongoDB, shared by workers and kept across restarts
+PERSISTENT_CACHE_ENABLED = os.getenv('PERSISTENT_CACHE_ENABLED', 'false').lower() == 'true'
+PERSISTENT_CACHE_COLLECTION = os.getenv('PERSISTENT_CACHE_COLLECTION', 'analysis_cache')
+PERSISTENT_CACHE_TTL_SECONDS = int(os.getenv('PERSISTENT_CACHE_TTL_SECONDS', '86400'))
+PERSISTENT_CACHE_TIMEOUT_SECONDS = float(os.getenv('PERSISTENT_CACHE_TIMEOUT_SECONDS', '0.5'))
+
+# Asynchronous analysis jobs, persisted in MongoDB; JOB_TIMEOUT_SECONDS bounds one
+# job across the whole fallback chain (instead of REQUEST_DEADLINE_SECONDS)
+JOB_WORKERS = int(os.getenv('JOB_WORKERS', '2'))
+JOB_COLLECTION = os.getenv('JOB_COLLECTION', 'jobs')
+JOB_TTL_SECONDS = int(os.getenv('JOB_TTL_SECONDS', '86400'))
+JOB_TIMEOUT_SECONDS = float(os.getenv('JOB_TIMEOUT_SECONDS', '600'))
+JOB_STORE_TIMEOUT_SECONDS = float(os.getenv('JOB_STORE_TIMEOUT_SECONDS', '0.5'))
+JOB_EVENTS_POLL_SECONDS = float(os.getenv('JOB_EVENTS_POLL_SECONDS', '5'))
+# A running job is claimed by one process for this long and renewed while it runs;
+# jobs of a process that died are picked up by others once the lease runs out
+JOB_LEASE_SECONDS = float(os.getenv('JOB_LEASE_SECONDS', '60'))
+
+# Near-duplicate matching for the result cache; 0 disables it, e.g. 0.9 serves
+# inputs whose free text is ~90% similar and whose lab values differ by <= 2%
+NEAR_DUPLICATE_THRESHOLD = float(os.getenv('NEAR_DUPLICATE_THRESHOLD', '0'))
+
+# Long-input chunking: inputs above CHUNK_MAX_TOKENS (estimated) are analysed
+# chunk by chunk, CHUNK_CONCURRENCY at a time, and the results merged
+CHUNK_MAX_TOKENS = int(os.getenv('CHUNK_MAX_TOKENS', '1500'))
+CHUNK_CONCURRENCY = int(os.getenv('CHUNK_CONCURRENCY', '4'))
+CHUNK_MAX_COUNT = int(os.getenv('CHUNK_MAX_COUNT', '50'))
+
+# Structured output: ask DeepSeek (response_format) and Ollama (format) for a JSON
+# analysis object instead of markdown sections, with a smaller completion budget;
+# completions that do not validate fall back to the heuristic section parser
+STRUCTURED_OUTPUT_ENABLED = os.getenv('STRUCTURED_OUTPUT_ENABLED', 'false').lower() == 'true'
+STRUCTURED_OUTPUT_MAX_TOKENS = int(os.getenv('STRUCTURED_OUTPUT_MAX_TOKENS', '800'))
+
+# Records accepted by one /api/analysis/metrics/batch call (scored locally, no model)
+METRICS_BATCH_MAX_RECORDS = int(os.getenv('METRICS_BATCH_MAX_RECORDS', '10000'))
 
 # Model Priority Configuration
-MODEL_FALLBACK_PRIORITY = os.getenv('MODEL_FALLBACK_PRIORITY', 'ollama,deepseek,claude').split(',')     
\ No newline at end of file
+MODEL_FALLBACK_PRIORITY = os.getenv('MODEL_FALLBACK_PRIORITY', 'ollama,deepseek,claude').split(',')     
+
+# Request Deadline Configuration
+# Upper bound on the time one analysis request may take across the whole fallback chain;
+# clients can ask for less with the X-Request-Timeout header
+REQUEST_DEADLINE_SECONDS = float(os.getenv('REQUEST_DEADLINE_SECONDS', '45'))
+REQUEST_DEADLINE_MAX_SECONDS = float(os.getenv('REQUEST_DEADLINE_MAX_SECONDS', '120'))
+
+# Provider Routing Configuration
+# 'static' follows MODEL_FALLBACK_PRIORITY; 'adaptive' orders it by observed latency and error rate
+ROUTING_MODE = os.getenv('ROUTING_MODE', 'static').lower()
+ROUTING_EWMA_ALPHA = float(os.getenv('ROUTING_EWMA_ALPHA', '0.2'))
+ROUTING_LOCAL_WEIGHT = float(os.getenv('ROUTING_LOCAL_WEIGHT', '0.5'))
+ROUTING_ERROR_PENALTY_SECONDS = float(os.getenv('ROUTING_ERROR_PENALTY_SECONDS', '30'))
+ROUTING_DEFAULT_LATENCY_SECONDS = float(os.getenv('ROUTING_DEFAULT_LATENCY_SECONDS', '5'))
+
+# Hedged Request Configuration
+HEDGE_ENABLED = os.getenv('HEDGE_ENABLED', 'false').lower() == 'true'
+HEDGE_PERCENTILE = float(os.getenv('HEDGE_PERCENTILE', '0.95'))
+HEDGE_MIN_SAMPLES = int(os.getenv('HEDGE_MIN_SAMPLES', '20'))
+HEDGE_DEFAULT_DELAY_SECONDS = float(os.getenv('HEDGE_DEFAULT_DELAY_SECONDS', '3'))
+
+# Circuit Breaker Configuration
+CIRCUIT_FAILURE_RATE_THRESHOLD = float(os.getenv('CIRCUIT_FAILURE_RATE_THRESHOLD', '0.5'))
+CIRCUIT_MIN_CALLS = int(os.getenv('CIRCUIT_MIN_CALLS', '5'))
+CIRCUIT_WINDOW_SIZE = int(os.getenv('CIRCUIT_WINDOW_SIZE', '20'))
+CIRCUIT_OPEN_SECONDS = float(os.getenv('CIRCUIT_OPEN_SECONDS', '30'))
+CIRCUIT_HALF_OPEN_PROBES = int(os.getenv('CIRCUIT_HALF_OPEN_PROBES', '1'))
+
+# Retry Configuration
+RETRY_MAX_ATTEMPTS = int(os.getenv('RETRY_MAX_ATTEMPTS', '3'))
+RETRY_BASE_DELAY_SECONDS = float(os.getenv('RETRY_BASE_DELAY_SECONDS', '0.5'))
+RETRY_MAX_DELAY_SECONDS = float(os.getenv('RETRY_MAX_DELAY_SECONDS', '8'))
+RETRY_MAX_ELAPSED_SECONDS = float(os.getenv('RETRY_MAX_ELAPSED_SECONDS', '30'))
+RETRY_BUDGET_RATIO = float(os.getenv('RETRY_BUDGET_RATIO', '0.2'))
+RETRY_BUDGET_MIN_PER_SECOND = float(os.getenv('RETRY_BUDGET_MIN_PER_SECOND', '1'))
+
+# HTTP Client Pool Configuration
+HTTP_MAX_CONNECTIONS = int(os.getenv('HTTP_MAX_CONNECTIONS', '100'))
+HTTP_MAX_KEEPALIVE_CONNECTIONS = int(os.getenv('HTTP_MAX_KEEPALIVE_CONNECTIONS', '20'))
+HTTP_KEEPALIVE_EXPIRY = float(os.getenv('HTTP_KEEPALIVE_EXPIRY', '30'))
+HTTP2_ENABLED = os.getenv('HTTP2_ENABLED', 'false').lower() == 'true'
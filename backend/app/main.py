@@ -1,8 +1,25 @@
+from contextlib import asynccontextmanager
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
-import httpx
+from app.config import OLLAMA_MODEL
+from app.utils.http_client import open_http_clients, close_http_clients, get_http_client
+from app.services.ollama_warmup import start_ollama_keepalive, stop_ollama_keepalive, is_model_loaded
+from app.utils.circuit_breaker import circuit_breakers
+from app.utils.result_store import result_store
+from app.services.job_queue import job_queue
 
-app = FastAPI()
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    await open_http_clients()
+    start_ollama_keepalive()
+    await job_queue.start()
+    yield
+    await job_queue.stop()
+    await stop_ollama_keepalive()
+    await result_store.drain()
+    await close_http_clients()
+
+app = FastAPI(lifespan=lifespan)
 
 app.add_middleware(
     CORSMiddleware,
@@ -19,17 +36,19 @@ async def root():
 @app.get("/health")
 async def health_check():
     try:
-        async with httpx.AsyncClient() as client:
-            response = await client.get("http://localhost:11434/api/version")
-            if response.status_code == 200:
-                return {
-                    "status": "healthy",
-                    "ollama": "connected",
-                    "version": response.json().get("version")
-                }
+        response = await get_http_client("ollama").get("/api/version")
+        if response.status_code == 200:
+            return {
+                "status": "healthy",
+                "ollama": "connected",
+                "version": response.json().get("version"),
+                "model": OLLAMA_MODEL,
+                "model_loaded": await is_model_loaded(),
+                "circuit_breakers": circuit_breakers.snapshot()
+            }
     except Exception:
         pass
-    return {"status": "healthy", "ollama": "not available"}
+    return {"status": "healthy", "ollama": "not available", "circuit_breakers": circuit_breakers.snapshot()}
 
 if __name__ == "__main__":
     import uvicorn
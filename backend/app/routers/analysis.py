@@ -1,66 +1,101 @@
 import httpx
-from fastapi import APIRouter, HTTPException, UploadFile, File, Form
-from app.models.analysis import AnalysisResponse
+from fastapi import APIRouter, HTTPException, UploadFile, File, Form, Header, Response
+from app.models.analysis import AnalysisResponse, MetricsBatchRequest
 from app.utils.database import get_db
 from app.config import DEEPSEEK_API_KEY
 from datetime import datetime
 from pymongo.errors import PyMongoError
+import asyncio
+import copy
 import json
+import time
 import traceback
-from typing import Optional, Dict, Any
+from typing import Optional, Dict, Any, List
 import logging
+from .. import config
 from ..services.claude_service import analyze_with_claude
 from ..services.deepseek_service import analyze_with_deepseek
+from ..utils.latency import latency_tracker
+from ..utils.circuit_breaker import circuit_breakers
+from ..utils.routing import adaptive_router
+from ..utils.deadline import request_deadline, run_with_deadline
+from ..utils.keys import analysis_key
+from ..utils.singleflight import analysis_flights
+from ..utils.cache import analysis_cache, cache_policy
+from ..utils.result_store import get_cached_result, store_result
+from ..utils.fingerprint import fingerprint_async, near_duplicate_index
+from ..utils.vitals import Vitals, extract_vitals
+from ..utils.metrics import compute_metrics
+from ..utils.metrics_batch import compute_metrics_batch
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# Client error statuses that still mean the provider is unhealthy
+BREAKER_FAILURE_STATUSES = (408, 429)
+
 router = APIRouter(
     prefix="/api/analysis",
     tags=["analysis"]
 )
 
-async def process_sequence(sequence: str, provider: Optional[str] = None) -> dict:
-    """Process the sequence using available providers based on priority."""
+async def process_sequence(
+    sequence: str,
+    provider: Optional[str] = None,
+    analysis_type: str = "health",
+    deadline: Optional[float] = None,
+    vitals: Optional[Vitals] = None
+) -> dict:
+    """Process the sequence using available providers based on priority.
+
+    `deadline` is a time.monotonic() value bounding the whole call
+    (REQUEST_DEADLINE_SECONDS from now by default). Each provider tried in the
+    fallback chain gets an equal share of the time that is left. `vitals`, when
+    the caller already extracted them, are handed to the providers that
+    compute local metrics.
+    """
     if not sequence:
         raise HTTPException(status_code=400, detail="No sequence provided")
+    if deadline is None:
+        deadline = request_deadline()
     
     from ..config import MODEL_FALLBACK_PRIORITY, OLLAMA_ENABLED
-    from ..services.ollama_service import analyze_with_ollama
     
-    # If provider is specified, try only that provider
+    # If provider is specified, try only that provider (still through its circuit breaker)
     if provider:
         logger.info(f"Using specified provider: {provider}")
         try:
-            if provider == "ollama" and OLLAMA_ENABLED:
-                return await analyze_with_ollama(sequence)
-            elif provider == "deepseek":
-                return await analyze_with_deepseek(sequence)
-            elif provider == "claude":
+            if provider not in ("deepseek", "claude") and not (provider == "ollama" and OLLAMA_ENABLED):
+                raise HTTPException(status_code=400, detail="Invalid provider specified")
+            if provider == "claude":
                 from ..config import CLAUDE_API_KEY
                 if CLAUDE_API_KEY == 'test_key':
                     raise HTTPException(status_code=400, detail="Claude API key not configured")
-                return await analyze_with_claude(sequence)
-            else:
-                raise HTTPException(status_code=400, detail="Invalid provider specified")
+            return await call_provider(provider, sequence, analysis_type, deadline, vitals)
         except Exception as e:
             logger.error(f"Error with specified provider {provider}: {str(e)}")
             if provider == "claude" and "invalid x-api-key" in str(e):
                 raise HTTPException(status_code=400, detail="Claude API key not configured or invalid")
             raise
     
+    providers = [p for p in MODEL_FALLBACK_PRIORITY if p in ("deepseek", "claude") or (p == "ollama" and OLLAMA_ENABLED)]
+    if config.ROUTING_MODE == "adaptive":
+        providers = adaptive_router.order(providers, analysis_type)
+    if config.HEDGE_ENABLED:
+        return await hedged_fallback(sequence, providers, analysis_type, deadline, vitals)
+
     # Try providers in priority order
     last_error = None
-    for provider in MODEL_FALLBACK_PRIORITY:
+    for index, provider in enumerate(providers):
+        remaining = deadline - time.monotonic()
+        if remaining <= 0:
+            last_error = HTTPException(status_code=504, detail="Request deadline exceeded")
+            break
         try:
             logger.info(f"Attempting analysis with provider: {provider}")
-            if provider == "ollama" and OLLAMA_ENABLED:
-                return await analyze_with_ollama(sequence)
-            elif provider == "deepseek":
-                return await analyze_with_deepseek(sequence)
-            elif provider == "claude":
-                return await analyze_with_claude(sequence)
+            share = time.monotonic() + remaining / (len(providers) - index)
+            return await call_provider(provider, sequence, analysis_type, share, vitals)
         except Exception as e:
             last_error = e
             logger.warning(f"Provider {provider} failed: {str(e)}")
@@ -70,87 +105,229 @@ async def process_sequence(sequence: str, provider: Optional[str] = None) -> dic
     logger.error("All providers failed")
     raise last_error or HTTPException(status_code=500, detail="All analysis providers failed")
 
+async def call_provider(provider: str, sequence: str, analysis_type: str = "health", deadline: Optional[float] = None,
+                        vitals: Optional[Vitals] = None) -> dict:
+    """Run one provider through its circuit breaker and record its latency and outcome."""
+    from ..services.ollama_service import analyze_with_ollama
+
+    analyzers = {
+        "ollama": lambda: analyze_with_ollama(sequence, analysis_type, vitals),
+        "deepseek": lambda: analyze_with_deepseek(sequence, vitals),
+        "claude": lambda: analyze_with_claude(sequence),
+    }
+    breaker = circuit_breakers.get(provider)
+    if not breaker.allow_request():
+        raise HTTPException(status_code=503, detail=f"Provider {provider} circuit is open")
+
+    start = time.monotonic()
+    try:
+        result = await run_with_deadline(analyzers[provider], deadline)
+    except asyncio.CancelledError:
+        breaker.release()
+        raise
+    except Exception as e:
+        # Rate limiting and timeouts count against the provider; other client errors
+        # are about the request itself and count neither way
+        if isinstance(e, HTTPException) and e.status_code < 500 and e.status_code not in BREAKER_FAILURE_STATUSES:
+            breaker.release()
+        else:
+            breaker.record_failure()
+            adaptive_router.record(provider, analysis_type, time.monotonic() - start, ok=False)
+        raise
+    elapsed = time.monotonic() - start
+    breaker.record_success()
+    latency_tracker.record(provider, elapsed)
+    adaptive_router.record(provider, analysis_type, elapsed, ok=True)
+    return result
+
+def hedge_delay(provider: str) -> float:
+    """How long to wait on a provider before launching a hedge request."""
+    observed = latency_tracker.percentile(provider, config.HEDGE_PERCENTILE, min_samples=config.HEDGE_MIN_SAMPLES)
+    return observed if observed is not None else config.HEDGE_DEFAULT_DELAY_SECONDS
+
+async def hedged_fallback(sequence: str, providers: List[str], analysis_type: str = "health", deadline: Optional[float] = None,
+                          vitals: Optional[Vitals] = None) -> dict:
+    """Walk the fallback chain, hedging slow providers with the next one.
+
+    When the running provider has not answered within its observed latency
+    percentile, the next provider starts in parallel (at most two at a time).
+    A failure starts the next provider straight away. The first valid result
+    wins and the remaining requests are cancelled.
+    """
+    queue = list(providers)
+    pending: Dict[asyncio.Task, str] = {}
+    last_error = None
+
+    def launch():
+        provider = queue.pop(0)
+        logger.info(f"Attempting analysis with provider: {provider}")
+        pending[asyncio.create_task(call_provider(provider, sequence, analysis_type, deadline, vitals))] = provider
+        return provider
+
+    try:
+        while queue or pending:
+            if not pending:
+                launch()
+            newest = list(pending.values())[-1]
+            timeout = hedge_delay(newest) if queue and len(pending) < 2 else None
+            done, _ = await asyncio.wait(pending, timeout=timeout, return_when=asyncio.FIRST_COMPLETED)
+
+            if not done:
+                logger.info(f"Provider {newest} is slow, hedging with {queue[0]}")
+                launch()
+                continue
+
+            for task in done:
+                provider = pending.pop(task)
+                try:
+                    result = task.result()
+                except Exception as e:
+                    last_error = e
+                    logger.warning(f"Provider {provider} failed: {str(e)}")
+                    continue
+                if isinstance(result, dict) and result.get("analysis"):
+                    return result
+                last_error = HTTPException(status_code=500, detail=f"Invalid response from {provider}")
+    finally:
+        for task in pending:
+            task.cancel()
+
+    logger.error("All providers failed")
+    raise last_error or HTTPException(status_code=500, detail="All analysis providers failed")
+
+async def read_sequence_input(sequence: Optional[str], file: Optional[UploadFile]) -> str:
+    """Return the input to analyze from the uploaded file or the `sequence` form field."""
+    input_sequence = None
+    if file:
+        logger.info(f"Processing uploaded file: {file.filename}")
+        content = await file.read()
+        try:
+            input_sequence = content.decode('utf-8').strip()
+        except UnicodeDecodeError:
+            logger.error("Failed to decode file content")
+            raise HTTPException(status_code=400, detail="Invalid file encoding. Please upload a UTF-8 encoded text file")
+    elif sequence:
+        input_sequence = sequence.strip()
+
+    if not input_sequence:
+        raise HTTPException(status_code=400, detail="Either sequence or file must be provided with non-empty content")
+    return input_sequence
+
+def format_analysis_result(result: dict, provider: Optional[str] = None, sequence: Optional[str] = None,
+                           vitals: Optional[Vitals] = None) -> dict:
+    """Shape a provider result into the response payload of the analyze endpoints.
+
+    With the analysed `sequence`, its vitals (`vitals` if the caller already
+    extracted them) are added as `analysis.vitals` and `analysis.metrics` is
+    computed from the input by the local metrics engine, whichever provider
+    answered.
+    """
+    # Ensure we have a consistent response format
+    if not isinstance(result.get("analysis"), dict):
+        # Convert string analysis to structured format
+        analysis_text = result.get("analysis", "")
+        result["analysis"] = {
+            "summary": analysis_text,
+            "recommendations": [],
+            "risk_factors": []
+        }
+        
+        # Try to extract sections if possible
+        sections = analysis_text.split("\n\n")
+        for section in sections:
+            if section.startswith("Recommendations:") or section.startswith("建议:"):
+                result["analysis"]["recommendations"] = [
+                    r.strip("- ").strip() 
+                    for r in section.split("\n")[1:] 
+                    if r.strip()
+                ]
+            elif section.startswith("Risk Factors:") or section.startswith("风险因素:"):
+                result["analysis"]["risk_factors"] = [
+                    r.strip("- ").strip() 
+                    for r in section.split("\n")[1:] 
+                    if r.strip()
+                ]
+    
+    # Ensure consistent response format
+    if not isinstance(result.get("analysis"), dict):
+        result["analysis"] = {
+            "summary": result.get("analysis", ""),
+            "recommendations": [
+                "建议进行定期健康检查，及时发现潜在问题",
+                "保持良好的生活习惯和作息规律",
+                "建议咨询专业医生获取更详细的建议"
+            ],
+            "risk_factors": [
+                "需要进一步检查以确定具体风险",
+                "可能存在潜在健康隐患"
+            ],
+            "metrics": {
+                "healthScore": 75,
+                "stressLevel": "medium",
+                "sleepQuality": "fair",
+                "riskLevel": "medium",
+                "confidenceScore": 0.85,
+                "healthIndex": 80
+            }
+        }
+        
+    if sequence:
+        if vitals is None:
+            vitals = extract_vitals(sequence)
+        result["analysis"]["vitals"] = vitals.as_dict()
+        result["analysis"]["metrics"] = compute_metrics(sequence, vitals)
+
+    return {
+        "success": True,
+        "analysis": result["analysis"],
+        "model": result.get("model", ""),
+        "provider": result.get("provider", provider)
+    }
+
 @router.post("/analyze")
 async def analyze_sequence(
+    response: Response,
     sequence: Optional[str] = Form(None),
     file: Optional[UploadFile] = File(None),
-    provider: str = Form("claude")
+    provider: str = Form("claude"),
+    analysis_type: str = Form("health"),
+    x_request_timeout: Optional[str] = Header(None),
+    cache_control: Optional[str] = Header(None)
 ):
-    """Analyze a sequence from either direct input or file upload."""
+    """Analyze a sequence from either direct input or file upload.
+
+    Results are cached by input hash, provider and analysis_type. Send
+    `Cache-Control: no-cache` to force a fresh analysis, or `no-store` to
+    bypass the cache entirely. The `X-Cache` header reports HIT, MISS or BYPASS.
+    """
     try:
-        input_sequence = None
-        if file:
-            logger.info(f"Processing uploaded file: {file.filename}")
-            content = await file.read()
-            input_sequence = content.decode('utf-8').strip()
-        elif sequence:
-            input_sequence = sequence.strip()
-            
-        if not input_sequence:
-            raise HTTPException(status_code=400, detail="Either sequence or file must be provided with non-empty content")
-            
+        # The budget covers input handling and the cache lookup as well as the provider call
+        deadline = request_deadline(x_request_timeout)
+        input_sequence = await read_sequence_input(sequence, file)
         logger.info(f"Analyzing sequence of length {len(input_sequence)}")
-        result = await process_sequence(input_sequence, provider)
-        
-        # Ensure we have a consistent response format
-        if not isinstance(result.get("analysis"), dict):
-            # Convert string analysis to structured format
-            analysis_text = result.get("analysis", "")
-            result["analysis"] = {
-                "summary": analysis_text,
-                "recommendations": [],
-                "risk_factors": []
-            }
-            
-            # Try to extract sections if possible
-            sections = analysis_text.split("\n\n")
-            for section in sections:
-                if section.startswith("Recommendations:") or section.startswith("建议:"):
-                    result["analysis"]["recommendations"] = [
-                        r.strip("- ").strip() 
-                        for r in section.split("\n")[1:] 
-                        if r.strip()
-                    ]
-                elif section.startswith("Risk Factors:") or section.startswith("风险因素:"):
-                    result["analysis"]["risk_factors"] = [
-                        r.strip("- ").strip() 
-                        for r in section.split("\n")[1:] 
-                        if r.strip()
-                    ]
-        
-        # Ensure consistent response format
-        if not isinstance(result.get("analysis"), dict):
-            result["analysis"] = {
-                "summary": result.get("analysis", ""),
-                "recommendations": [
-                    "建议进行定期健康检查，及时发现潜在问题",
-                    "保持良好的生活习惯和作息规律",
-                    "建议咨询专业医生获取更详细的建议"
-                ],
-                "risk_factors": [
-                    "需要进一步检查以确定具体风险",
-                    "可能存在潜在健康隐患"
-                ],
-                "metrics": {
-                    "healthScore": 75,
-                    "stressLevel": "medium",
-                    "sleepQuality": "fair",
-                    "riskLevel": "medium",
-                    "confidenceScore": 0.85,
-                    "healthIndex": 80
-                }
-            }
-            
-        return {
-            "success": True,
-            "analysis": result["analysis"],
-            "model": result.get("model", ""),
-            "provider": result.get("provider", provider)
-        }
+        key = analysis_key(input_sequence, provider, analysis_type)
+        read_cache, write_cache = cache_policy(cache_control)
+        fp = await fingerprint_async(input_sequence, provider, analysis_type) if near_duplicate_index.enabled else None
+        cached, tier = await get_cached_result(key, fp) if read_cache else (None, None)
+        if cached is not None:
+            response.headers["X-Cache"] = "HIT"
+            response.headers["X-Cache-Tier"] = tier
+            return copy.deepcopy(cached)
+        response.headers["X-Cache"] = "MISS" if read_cache else "BYPASS"
+
+        # Extracted once here and shared by the providers and the payload
+        vitals = extract_vitals(input_sequence)
+        # Identical concurrent requests (double submits, client retries) share one provider call
+        result = await analysis_flights.do(
+            key,
+            lambda: process_sequence(input_sequence, provider, analysis_type, deadline, vitals)
+        )
+
+        payload = format_analysis_result(result, provider, input_sequence, vitals)
+        if write_cache:
+            store_result(key, copy.deepcopy(payload), fp)
+        return payload
         
-    except UnicodeDecodeError:
-        logger.error("Failed to decode file content")
-        raise HTTPException(status_code=400, detail="Invalid file encoding. Please upload a UTF-8 encoded text file")
     except Exception as e:
         logger.error(f"Error in analyze_sequence: {str(e)}")
         if isinstance(e, HTTPException):
@@ -158,6 +335,49 @@ async def analyze_sequence(
         raise HTTPException(status_code=500, detail=str(e))
 
 
+@router.post("/metrics")
+async def analyze_metrics(
+    sequence: Optional[str] = Form(None),
+    file: Optional[UploadFile] = File(None)
+):
+    """Vitals and metrics of the input from the local metrics engine, without calling a model.
+
+    Returns in milliseconds; the same metrics are part of every /analyze
+    result, so clients can show them while the narrative is generated.
+    """
+    input_sequence = await read_sequence_input(sequence, file)
+    vitals = extract_vitals(input_sequence)
+    return {
+        "success": True,
+        "vitals": vitals.as_dict(),
+        "metrics": compute_metrics(input_sequence, vitals)
+    }
+
+
+@router.post("/metrics/batch")
+async def analyze_metrics_batch(request: MetricsBatchRequest):
+    """Metrics of many records (e.g. a cohort) at once, scored in one vectorised pass.
+
+    Takes `{"sequences": [...]}` and returns the metrics of each record in
+    input order, identical to what /metrics returns for it. No model is called.
+    """
+    if not request.sequences:
+        raise HTTPException(status_code=400, detail="No sequences provided")
+    if len(request.sequences) > config.METRICS_BATCH_MAX_RECORDS:
+        raise HTTPException(
+            status_code=413,
+            detail=f"Batch too large: {len(request.sequences)} records exceeds the limit of {config.METRICS_BATCH_MAX_RECORDS}"
+        )
+    # Extraction is per text and CPU-bound, so keep it off the event loop
+    results = await asyncio.get_running_loop().run_in_executor(None, compute_metrics_batch, request.sequences)
+    return {"success": True, "results": results}
+
+
+@router.get("/cache/stats")
+async def get_cache_stats():
+    """Result cache counters (hits, misses, evictions, expirations) and size."""
+    return analysis_cache.stats()
+
 @router.get("/history")
 async def get_analysis_history():
     try:
@@ -0,0 +1,85 @@
+import asyncio
+import json
+import logging
+from typing import Optional
+from fastapi import APIRouter, HTTPException, UploadFile, File, Form, Response
+from fastapi.responses import StreamingResponse
+from .. import config
+from ..services.job_queue import FINISHED, job_queue, public_view
+from .analysis import read_sequence_input
+
+logger = logging.getLogger(__name__)
+
+router = APIRouter(
+    prefix="/api/jobs",
+    tags=["jobs"]
+)
+
+def sse_event(event: str, data: dict) -> str:
+    """Format one Server-Sent Events frame."""
+    return f"event: {event}\ndata: {json.dumps(data, ensure_ascii=False, default=str)}\n\n"
+
+@router.post("", status_code=202)
+async def create_job(
+    response: Response,
+    sequence: Optional[str] = Form(None),
+    file: Optional[UploadFile] = File(None),
+    provider: str = Form("claude"),
+    analysis_type: str = Form("health")
+):
+    """Queue an analysis and return its job id without waiting for the result.
+
+    Takes the same form fields as /api/analysis/analyze. An input with a
+    queued, running or succeeded job already returns that job
+    (`deduplicated: true`).
+    """
+    input_sequence = await read_sequence_input(sequence, file)
+    job, deduplicated = await job_queue.submit(input_sequence, provider, analysis_type)
+    logger.info(f"Job {job['_id']} {'reused' if deduplicated else 'queued'} for input of length {len(input_sequence)}")
+    response.headers["Location"] = f"{router.prefix}/{job['_id']}"
+    return {"id": job["_id"], "status": job["status"], "deduplicated": deduplicated}
+
+@router.get("/{job_id}")
+async def get_job(job_id: str):
+    """Job status, with `result` once it succeeded or `error` once it failed."""
+    job = await job_queue.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Job not found")
+    return public_view(job)
+
+@router.get("/{job_id}/events")
+async def job_events(job_id: str):
+    """Server-Sent Events stream of a job.
+
+    Sends a `status` event with the job now and on every change, then `done`
+    once the job has finished. Jobs run by another process are polled every
+    JOB_EVENTS_POLL_SECONDS, which also keeps idle connections alive.
+    """
+    job = await job_queue.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Job not found")
+
+    async def event_stream():
+        watcher = job_queue.subscribe(job_id)
+        try:
+            current = job
+            last_status = None
+            while True:
+                if current["status"] != last_status:
+                    last_status = current["status"]
+                    yield sse_event("status", public_view(current))
+                if current["status"] in FINISHED:
+                    break
+                try:
+                    current = await asyncio.wait_for(watcher.get(), timeout=config.JOB_EVENTS_POLL_SECONDS)
+                except asyncio.TimeoutError:
+                    current = await job_queue.get(job_id) or current
+        finally:
+            job_queue.unsubscribe(job_id, watcher)
+        yield sse_event("done", {})
+
+    return StreamingResponse(
+        event_stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
@@ -1,6 +1,7 @@
-import httpx
 import json
 from ..config import CLAUDE_API_KEY
+from ..utils.http_client import get_http_client
+from ..utils.retry import get_retry_policy
 
 async def analyze_with_claude(sequence: str) -> dict:
     """
@@ -22,88 +23,88 @@ async def analyze_with_claude(sequence: str) -> dict:
     Format the response in clear sections."""
 
     try:
-        async with httpx.AsyncClient(timeout=30.0) as client:
-            response = await client.post(
-                "https://api.anthropic.com/v1/messages",
-                headers=headers,
-                json={
-                    "model": "claude-3-opus-20240229",  # Using Claude 3 Opus as it's the most capable model available
-                    "max_tokens": 2000,
-                    "temperature": 0.3,
-                    "system": system_prompt,
-                    "messages": [
-                        {
-                            "role": "user",
-                            "content": f"Analyze this sequence and provide health insights: {sequence}"
-                        }
-                    ]
-                }
-            )
-            
-            if response.status_code != 200:
-                raise Exception(f"Claude API error: {response.text}")
+        client = get_http_client("claude")
+        response = await get_retry_policy("claude").call(lambda: client.post(
+            "https://api.anthropic.com/v1/messages",
+            headers=headers,
+            json={
+                "model": "claude-3-opus-20240229",  # Using Claude 3 Opus as it's the most capable model available
+                "max_tokens": 2000,
+                "temperature": 0.3,
+                "system": system_prompt,
+                "messages": [
+                    {
+                        "role": "user",
+                        "content": f"Analyze this sequence and provide health insights: {sequence}"
+                    }
+                ]
+            }
+        ))
 
-            result = await response.json()
-            analysis = result['content'][0]['text']
+        if response.status_code != 200:
+            raise Exception(f"Claude API error: {response.text}")
 
-            # Parse the analysis text to extract sections
-            sections = analysis.split("\n\n")
-            summary = ""
-            recommendations = []
-            risk_factors = []
-            
-            for section in sections:
-                if "总结" in section or "Summary" in section:
-                    summary = section.replace("总结:", "").replace("Summary:", "").strip()
-                elif "风险因素" in section or "Risk Factors" in section:
-                    risks = section.split("\n")[1:]
-                    risk_factors = [r.strip("- ").strip() for r in risks if r.strip()]
-                elif "建议" in section or "Recommendations" in section:
-                    recs = section.split("\n")[1:]
-                    recommendations = [r.strip("- ").strip() for r in recs if r.strip()]
+        result = await response.json()
+        analysis = result['content'][0]['text']
 
-            metrics = {
-                "healthScore": 75,
-                "stressLevel": "medium",
-                "sleepQuality": "fair",
-                "riskLevel": "medium",
-                "confidenceScore": 0.85,
-                "healthIndex": 80
-            }
+        # Parse the analysis text to extract sections
+        sections = analysis.split("\n\n")
+        summary = ""
+        recommendations = []
+        risk_factors = []
 
-            # Extract DNA/基因 related content if present
-            dna_content = ""
-            for section in sections:
-                if any(keyword in section for keyword in ["DNA", "基因", "序列"]):
-                    dna_content = section + "\n"
-                    break
+        for section in sections:
+            if "总结" in section or "Summary" in section:
+                summary = section.replace("总结:", "").replace("Summary:", "").strip()
+            elif "风险因素" in section or "Risk Factors" in section:
+                risks = section.split("\n")[1:]
+                risk_factors = [r.strip("- ").strip() for r in risks if r.strip()]
+            elif "建议" in section or "Recommendations" in section:
+                recs = section.split("\n")[1:]
+                recommendations = [r.strip("- ").strip() for r in recs if r.strip()]
 
-            # Ensure we have at least 3 recommendations and 2 risk factors
-            if len(recommendations) < 3:
-                recommendations.extend([
-                    "建议进行定期健康检查，及时发现潜在问题",
-                    "保持良好的生活习惯和作息规律",
-                    "建议咨询专业医生获取更详细的建议"
-                ][:3 - len(recommendations)])
+        metrics = {
+            "healthScore": 75,
+            "stressLevel": "medium",
+            "sleepQuality": "fair",
+            "riskLevel": "medium",
+            "confidenceScore": 0.85,
+            "healthIndex": 80
+        }
 
-            if len(risk_factors) < 2:
-                risk_factors.extend([
-                    "需要进一步检查以确定具体风险",
-                    "可能存在潜在健康隐患"
-                ][:2 - len(risk_factors)])
+        # Extract DNA/基因 related content if present
+        dna_content = ""
+        for section in sections:
+            if any(keyword in section for keyword in ["DNA", "基因", "序列"]):
+                dna_content = section + "\n"
+                break
 
-            return {
-                "success": True,
-                "analysis": {
-                    "summary": (dna_content + summary) if dna_content else summary or analysis,
-                    "recommendations": recommendations,
-                    "risk_factors": risk_factors,
-                    "metrics": metrics,
-                    "analysisType": "health"
-                },
-                "model": "claude-3-opus-20240229",
-                "provider": "claude"
-            }
+        # Ensure we have at least 3 recommendations and 2 risk factors
+        if len(recommendations) < 3:
+            recommendations.extend([
+                "建议进行定期健康检查，及时发现潜在问题",
+                "保持良好的生活习惯和作息规律",
+                "建议咨询专业医生获取更详细的建议"
+            ][:3 - len(recommendations)])
+
+        if len(risk_factors) < 2:
+            risk_factors.extend([
+                "需要进一步检查以确定具体风险",
+                "可能存在潜在健康隐患"
+            ][:2 - len(risk_factors)])
+
+        return {
+            "success": True,
+            "analysis": {
+                "summary": (dna_content + summary) if dna_content else summary or analysis,
+                "recommendations": recommendations,
+                "risk_factors": risk_factors,
+                "metrics": metrics,
+                "analysisType": "health"
+            },
+            "model": "claude-3-opus-20240229",
+            "provider": "claude"
+        }
 
     except Exception as e:
         print(f"Error in Claude analysis: {str(e)}")
@@ -0,0 +1,346 @@
+import asyncio
+import logging
+import os
+import socket
+import time
+import uuid
+from collections import OrderedDict
+from datetime import datetime, timedelta
+from typing import Any, Dict, Optional, Set, Tuple
+from pymongo import ReturnDocument
+from .. import config
+from ..utils.database import get_db
+from ..utils.keys import analysis_key
+from ..utils.vitals import extract_vitals
+
+logger = logging.getLogger(__name__)
+
+QUEUED = "queued"
+RUNNING = "running"
+SUCCEEDED = "succeeded"
+FAILED = "failed"
+FINISHED = (SUCCEEDED, FAILED)
+
+
+def public_view(job: Dict[str, Any]) -> Dict[str, Any]:
+    """A job as returned by the API: its id instead of `_id`, without the input itself."""
+    view = {key: value for key, value in job.items() if key not in ("_id", "sequence", "expires_at", "owner", "lease_until")}
+    view["id"] = job["_id"]
+    return view
+
+
+class JobQueue:
+    """Runs analyses in the background on a fixed pool of worker tasks.
+
+    Jobs are documents in a Mongo collection (with a TTL index on
+    `expires_at`), so their status and results outlive the process. Several
+    processes can share the collection: a worker claims a job atomically
+    before running it, which sets its `owner` and a `lease_until` that is
+    renewed while the job runs; its updates are only written while it still
+    owns the job. On `start`, queued jobs and running jobs whose
+    lease has expired (their process died) are picked up again; `stop` hands
+    the jobs it was running back to the queue. The process also keeps the
+    jobs it created in memory, which is what serves lookups while Mongo is
+    unavailable. Mongo calls are bounded by `timeout` and failures are logged,
+    not raised.
+
+    Jobs are deduplicated by input hash: submitting an input that already has
+    a queued, running or succeeded job returns that job. Failed jobs can be
+    resubmitted.
+    """
+
+    def __init__(self, workers: int = 2, collection_name: str = "jobs", ttl: int = 86400,
+                 timeout: float = 0.5, job_timeout: float = 600, lease: float = 60):
+        self.workers = workers
+        self.collection_name = collection_name
+        self.ttl = ttl
+        self.timeout = timeout
+        self.job_timeout = job_timeout
+        self.lease = lease
+        self.owner = f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+        self.jobs: OrderedDict[str, Dict[str, Any]] = OrderedDict()
+        self.by_hash: Dict[str, str] = {}
+        self._queue: Optional[asyncio.Queue] = None
+        self._workers: Set[asyncio.Task] = set()
+        self._watchers: Dict[str, Set[asyncio.Queue]] = {}
+        self._running: Dict[str, Dict[str, Any]] = {}
+        self._collection = None
+        self._index_ready = False
+
+    @property
+    def collection(self):
+        if self._collection is None:
+            self._collection = get_db()[self.collection_name]
+        return self._collection
+
+    @property
+    def queue(self) -> asyncio.Queue:
+        if self._queue is None:
+            self._queue = asyncio.Queue()
+        return self._queue
+
+    async def start(self):
+        """Start the workers and queue the unfinished jobs no live process owns.
+
+        Every process may queue the same ids; the claim in the worker decides
+        which one runs each job.
+        """
+        for job_id in await self._load_unfinished():
+            self.queue.put_nowait(job_id)
+        while len(self._workers) < self.workers:
+            task = asyncio.create_task(self._work())
+            self._workers.add(task)
+            task.add_done_callback(self._workers.discard)
+
+    async def stop(self):
+        # asyncio.wait_for can swallow a cancellation that arrives just as the
+        # wrapped call finishes, so keep cancelling until every worker is gone
+        while self._workers:
+            for task in self._workers:
+                task.cancel()
+            await asyncio.wait(set(self._workers), timeout=0.1)
+        # Hand interrupted jobs back so another process can pick them up straight away
+        for job in list(self._running.values()):
+            await self._release(job)
+        self._running.clear()
+
+    async def submit(self, sequence: str, provider: Optional[str] = None, analysis_type: str = "health") -> Tuple[Dict[str, Any], bool]:
+        """Queue an analysis; returns (job, deduplicated)."""
+        self._prune()
+        input_hash = analysis_key(sequence, provider, analysis_type)
+        existing = await self._find_by_hash(input_hash)
+        if existing is not None:
+            return existing, True
+
+        now = datetime.utcnow()
+        job = {
+            "_id": uuid.uuid4().hex,
+            "input_hash": input_hash,
+            "provider": provider,
+            "analysis_type": analysis_type,
+            "sequence": sequence,
+            "status": QUEUED,
+            "result": None,
+            "error": None,
+            "created_at": now,
+            "updated_at": now,
+            "expires_at": now + timedelta(seconds=self.ttl),
+        }
+        self._remember(job)
+        await self._save(job)
+        self.queue.put_nowait(job["_id"])
+        return job, False
+
+    async def get(self, job_id: str) -> Optional[Dict[str, Any]]:
+        job = self.jobs.get(job_id)
+        if job is not None:
+            return job
+        return await self._read({"_id": job_id})
+
+    def subscribe(self, job_id: str) -> asyncio.Queue:
+        """Queue receiving a copy of the job on every status change."""
+        watcher = asyncio.Queue()
+        self._watchers.setdefault(job_id, set()).add(watcher)
+        return watcher
+
+    def unsubscribe(self, job_id: str, watcher: asyncio.Queue):
+        watchers = self._watchers.get(job_id)
+        if watchers is not None:
+            watchers.discard(watcher)
+            if not watchers:
+                del self._watchers[job_id]
+
+    def clear(self):
+        self.jobs.clear()
+        self.by_hash.clear()
+        self._watchers.clear()
+        self._queue = None
+
+    async def _work(self):
+        from ..routers import analysis
+        from ..utils.result_store import store_result
+
+        while True:
+            job_id = await self.queue.get()
+            job = await self._claim(job_id)
+            if job is None:
+                continue
+            self._running[job_id] = job
+            heartbeat = asyncio.create_task(self._renew_lease(job))
+            try:
+                deadline = time.monotonic() + self.job_timeout
+                vitals = extract_vitals(job["sequence"])
+                result = await analysis.process_sequence(job["sequence"], job["provider"], job["analysis_type"], deadline, vitals)
+                payload = analysis.format_analysis_result(result, job["provider"], job["sequence"], vitals)
+                if config.ANALYSIS_CACHE_ENABLED:
+                    store_result(job["input_hash"], payload)
+                await self._update(job, status=SUCCEEDED, result=payload)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.warning(f"Job {job_id} failed: {str(e)}")
+                await self._update(job, status=FAILED, error={
+                    "status_code": getattr(e, "status_code", 500),
+                    "detail": getattr(e, "detail", str(e))
+                })
+            finally:
+                heartbeat.cancel()
+                if job["status"] in FINISHED:
+                    self._running.pop(job_id, None)
+
+    async def _claim(self, job_id: str) -> Optional[Dict[str, Any]]:
+        """Atomically take a job that is queued, or running under an expired (or no) lease.
+
+        Returns the job, now RUNNING and owned by this process, or None when
+        another process has it or it is finished (the local copy is then
+        dropped, so lookups read the job from Mongo). Without Mongo, only jobs
+        this process created (and holds in memory) are run.
+        """
+        now = datetime.utcnow()
+        claim = {"status": RUNNING, "owner": self.owner, "lease_until": now + timedelta(seconds=self.lease)}
+        local = self.jobs.get(job_id)
+        if local is not None and local["status"] != QUEUED:
+            return None
+        try:
+            job = await asyncio.wait_for(self.collection.find_one_and_update(
+                {"_id": job_id, "$or": [
+                    {"status": QUEUED},
+                    {"status": RUNNING, "lease_until": {"$lt": now}},
+                    {"status": RUNNING, "lease_until": None}
+                ]},
+                {"$set": {**claim, "updated_at": now}},
+                return_document=ReturnDocument.AFTER
+            ), timeout=self.timeout)
+        except Exception as e:
+            logger.warning(f"Job {job_id} could not be claimed: {str(e)}")
+            job = local
+        if job is None and local is not None and await self._read({"_id": job_id}) is None:
+            # Created while Mongo was unavailable, so nobody else can know about it
+            job = local
+        if job is None:
+            if local is not None:
+                self._forget(local)
+            return None
+        if local is not None:
+            job = local
+        else:
+            self._remember(job)
+        await self._update(job, **claim)
+        return job
+
+    async def _renew_lease(self, job: Dict[str, Any]):
+        while True:
+            await asyncio.sleep(self.lease / 3)
+            job["lease_until"] = datetime.utcnow() + timedelta(seconds=self.lease)
+            try:
+                await asyncio.wait_for(self.collection.update_one(
+                    {"_id": job["_id"], "owner": self.owner},
+                    {"$set": {"lease_until": job["lease_until"]}}
+                ), timeout=self.timeout)
+            except Exception as e:
+                logger.warning(f"Lease of job {job['_id']} could not be renewed: {str(e)}")
+
+    async def _release(self, job: Dict[str, Any]):
+        job.update(status=QUEUED, owner=None, lease_until=None, updated_at=datetime.utcnow())
+        try:
+            await asyncio.wait_for(self.collection.update_one(
+                {"_id": job["_id"], "owner": self.owner},
+                {"$set": {"status": QUEUED, "owner": None, "lease_until": None, "updated_at": job["updated_at"]}}
+            ), timeout=self.timeout)
+        except Exception as e:
+            logger.warning(f"Job {job['_id']} could not be released: {str(e)}")
+
+    async def _update(self, job: Dict[str, Any], **changes):
+        job.update(changes, updated_at=datetime.utcnow())
+        if job["status"] == FAILED and self.by_hash.get(job["input_hash"]) == job["_id"]:
+            del self.by_hash[job["input_hash"]]
+        for watcher in self._watchers.get(job["_id"], ()):
+            watcher.put_nowait(dict(job))
+        await self._save(job)
+
+    def _remember(self, job: Dict[str, Any]):
+        self.jobs[job["_id"]] = job
+        if job["status"] != FAILED:
+            self.by_hash[job["input_hash"]] = job["_id"]
+
+    def _forget(self, job: Dict[str, Any]):
+        self.jobs.pop(job["_id"], None)
+        if self.by_hash.get(job["input_hash"]) == job["_id"]:
+            del self.by_hash[job["input_hash"]]
+
+    def _prune(self):
+        # Jobs are kept in creation order and expire `ttl` after creation
+        now = datetime.utcnow()
+        while self.jobs:
+            job = next(iter(self.jobs.values()))
+            if job["expires_at"] > now or job["status"] not in FINISHED:
+                break
+            self._forget(job)
+
+    async def _find_by_hash(self, input_hash: str) -> Optional[Dict[str, Any]]:
+        job_id = self.by_hash.get(input_hash)
+        if job_id is not None:
+            return self.jobs[job_id]
+        return await self._read({"input_hash": input_hash, "status": {"$ne": FAILED}})
+
+    async def _read(self, query: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        try:
+            job = await asyncio.wait_for(self.collection.find_one(query), timeout=self.timeout)
+        except Exception as e:
+            logger.warning(f"Job lookup failed: {str(e)}")
+            return None
+        # The TTL monitor only runs once a minute, so check the expiry here as well
+        if not job or job.get("expires_at", datetime.min) <= datetime.utcnow():
+            return None
+        return job
+
+    async def _save(self, job: Dict[str, Any]):
+        try:
+            if not self._index_ready:
+                await asyncio.wait_for(self.collection.create_index("expires_at", expireAfterSeconds=0), timeout=self.timeout)
+                await asyncio.wait_for(self.collection.create_index("input_hash"), timeout=self.timeout)
+                self._index_ready = True
+            if job.get("owner") != self.owner:
+                await asyncio.wait_for(self.collection.replace_one({"_id": job["_id"]}, job, upsert=True), timeout=self.timeout)
+                return
+            # A job this process claimed is only written while it still holds it, so a
+            # worker whose lease lapsed cannot overwrite the process that took over
+            saved = await asyncio.wait_for(self.collection.replace_one(
+                {"_id": job["_id"], "$or": [{"owner": self.owner}, {"owner": None}]}, job
+            ), timeout=self.timeout)
+            if saved.matched_count:
+                return
+            # Not in Mongo yet if it was created while Mongo was unavailable
+            inserted = await asyncio.wait_for(self.collection.update_one(
+                {"_id": job["_id"]},
+                {"$setOnInsert": {key: value for key, value in job.items() if key != "_id"}},
+                upsert=True
+            ), timeout=self.timeout)
+            if inserted.upserted_id is None:
+                logger.warning(f"Job {job['_id']} was taken over by another process; its {job['status']} state was not saved")
+        except Exception as e:
+            logger.warning(f"Job {job['_id']} could not be persisted: {str(e)}")
+
+    async def _load_unfinished(self):
+        # Running jobs without a lease were started before leases existed
+        now = datetime.utcnow()
+        try:
+            cursor = self.collection.find({
+                "expires_at": {"$gt": now},
+                "$or": [{"status": QUEUED}, {"status": RUNNING, "lease_until": {"$lt": now}}, {"status": RUNNING, "lease_until": None}]
+            }, {"_id": 1})
+            return [job["_id"] for job in await asyncio.wait_for(cursor.to_list(length=None), timeout=self.timeout)]
+        except Exception as e:
+            logger.warning(f"Unfinished jobs could not be loaded: {str(e)}")
+            return []
+
+
+# 全局任务队列实例
+job_queue = JobQueue(
+    workers=config.JOB_WORKERS,
+    collection_name=config.JOB_COLLECTION,
+    ttl=config.JOB_TTL_SECONDS,
+    timeout=config.JOB_STORE_TIMEOUT_SECONDS,
+    job_timeout=config.JOB_TIMEOUT_SECONDS,
+    lease=config.JOB_LEASE_SECONDS
+)
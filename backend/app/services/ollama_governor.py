@@ -0,0 +1,77 @@
+import asyncio
+import time
+from contextlib import asynccontextmanager
+from typing import Dict
+from fastapi import HTTPException
+from .. import config
+
+
+class ConcurrencyGovernor:
+    """Limits concurrent generations on one local model, with a bounded wait queue.
+
+    The wait is estimated from the queue length and an EWMA of recent service
+    times. A request whose estimated wait exceeds its deadline is rejected with
+    a 503 straight away, so `process_sequence` can fall through to the next
+    provider instead of waiting for a timeout.
+    """
+
+    def __init__(self, limit: int = 1, max_queue: int = 8, initial_service_time: float = 5.0, alpha: float = 0.2):
+        self.limit = limit
+        self.max_queue = max_queue
+        self.avg_service_time = initial_service_time
+        self.alpha = alpha
+        self.active = 0
+        self.waiting = 0
+        self._semaphore = asyncio.Semaphore(limit)
+
+    def estimated_wait(self) -> float:
+        ahead = self.active + self.waiting - self.limit + 1
+        if ahead <= 0:
+            return 0.0
+        return ahead / self.limit * self.avg_service_time
+
+    def record(self, duration: float):
+        self.avg_service_time += self.alpha * (duration - self.avg_service_time)
+
+    @asynccontextmanager
+    async def slot(self, deadline: float):
+        """Hold a generation slot; `deadline` is the time budget left in seconds."""
+        if self.active >= self.limit and self.waiting >= self.max_queue:
+            raise HTTPException(status_code=503, detail="Ollama queue is full")
+        estimated = self.estimated_wait()
+        if estimated > deadline:
+            raise HTTPException(
+                status_code=503,
+                detail=f"Ollama queue wait ({estimated:.1f}s) exceeds deadline ({deadline:.1f}s)"
+            )
+
+        self.waiting += 1
+        try:
+            await asyncio.wait_for(self._semaphore.acquire(), timeout=deadline)
+        except asyncio.TimeoutError:
+            raise HTTPException(status_code=503, detail="Timed out waiting for an Ollama slot")
+        finally:
+            self.waiting -= 1
+
+        self.active += 1
+        start = time.monotonic()
+        try:
+            yield
+        finally:
+            self.active -= 1
+            self._semaphore.release()
+            self.record(time.monotonic() - start)
+
+
+_governors: Dict[str, ConcurrencyGovernor] = {}
+
+
+def get_governor(model_name: str) -> ConcurrencyGovernor:
+    """Return the governor for a model, creating it on first use."""
+    governor = _governors.get(model_name)
+    if governor is None:
+        governor = _governors[model_name] = ConcurrencyGovernor(
+            limit=config.OLLAMA_MAX_CONCURRENCY,
+            max_queue=config.OLLAMA_MAX_QUEUE
+        )
+    return governor
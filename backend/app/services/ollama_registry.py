@@ -0,0 +1,78 @@
+import asyncio
+import logging
+import time
+from typing import List, Optional
+import httpx
+from fastapi import HTTPException
+from .. import config
+
+logger = logging.getLogger(__name__)
+
+
+def select_model(models: List[dict]) -> Optional[str]:
+    """Prefer the configured OLLAMA_MODEL, otherwise the first DeepSeek model."""
+    names = [m.get("name", "") for m in models]
+    if config.OLLAMA_MODEL in names:
+        return config.OLLAMA_MODEL
+    return next((name for name in names if "deepseek" in name.lower()), None)
+
+
+class OllamaModelRegistry:
+    """Caches the model discovered through /api/tags.
+
+    A fresh entry is returned directly. Once it is older than `ttl` the cached
+    name is still returned, and a single background task refreshes it. Call
+    `invalidate` when Ollama reports the model as missing.
+    """
+
+    def __init__(self, ttl: float = 300):
+        self.ttl = ttl
+        self.model_name: Optional[str] = None
+        self.fetched_at = 0.0
+        self._lock = asyncio.Lock()
+        self._refresh_task: Optional[asyncio.Task] = None
+
+    def is_fresh(self) -> bool:
+        return self.model_name is not None and time.monotonic() - self.fetched_at < self.ttl
+
+    async def get_model(self, client: httpx.AsyncClient) -> str:
+        if self.model_name is None:
+            async with self._lock:
+                if self.model_name is None:
+                    await self.refresh(client)
+        elif not self.is_fresh():
+            self._schedule_refresh(client)
+        return self.model_name
+
+    async def refresh(self, client: httpx.AsyncClient) -> str:
+        response = await client.get("/api/tags")
+        if response.status_code != 200:
+            raise HTTPException(status_code=500, detail="Failed to get available models")
+
+        model_name = select_model(response.json().get("models", []))
+        if not model_name:
+            raise HTTPException(status_code=500, detail="DeepSeek model not found in Ollama")
+
+        self.model_name = model_name
+        self.fetched_at = time.monotonic()
+        return model_name
+
+    def invalidate(self):
+        self.model_name = None
+        self.fetched_at = 0.0
+
+    def _schedule_refresh(self, client: httpx.AsyncClient):
+        if self._refresh_task and not self._refresh_task.done():
+            return
+
+        async def _refresh():
+            try:
+                await self.refresh(client)
+            except Exception as e:
+                logger.warning(f"Background Ollama model refresh failed: {str(e)}")
+
+        self._refresh_task = asyncio.create_task(_refresh())
+
+
+# 全局模型注册表实例
+model_registry = OllamaModelRegistry(ttl=config.OLLAMA_MODEL_CACHE_TTL)
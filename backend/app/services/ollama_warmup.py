@@ -0,0 +1,69 @@
+import asyncio
+import logging
+from typing import Optional
+from .. import config
+from ..utils.http_client import get_http_client
+
+logger = logging.getLogger(__name__)
+
+_keepalive_task: Optional[asyncio.Task] = None
+
+
+async def preload_model() -> bool:
+    """Load OLLAMA_MODEL into memory and (re)set its keep_alive.
+
+    Ollama loads a model without generating anything when it receives an empty prompt.
+    """
+    client = get_http_client("ollama")
+    try:
+        response = await client.post(
+            "/api/generate",
+            json={"model": config.OLLAMA_MODEL, "prompt": "", "keep_alive": config.OLLAMA_KEEP_ALIVE},
+            timeout=config.OLLAMA_WARMUP_TIMEOUT_SECONDS
+        )
+        if response.status_code != 200:
+            logger.warning(f"Ollama warm-up of {config.OLLAMA_MODEL} failed: {response.status_code}")
+            return False
+        return True
+    except Exception as e:
+        logger.warning(f"Ollama warm-up of {config.OLLAMA_MODEL} failed: {str(e)}")
+        return False
+
+
+async def is_model_loaded() -> bool:
+    """Check /api/ps to see whether OLLAMA_MODEL is currently resident."""
+    response = await get_http_client("ollama").get("/api/ps")
+    if response.status_code != 200:
+        return False
+    models = response.json().get("models", [])
+    return any(m.get("name") == config.OLLAMA_MODEL or m.get("model") == config.OLLAMA_MODEL for m in models)
+
+
+async def _keepalive_loop():
+    while True:
+        if await preload_model():
+            logger.info(f"Ollama model {config.OLLAMA_MODEL} is loaded (keep_alive={config.OLLAMA_KEEP_ALIVE})")
+        if config.OLLAMA_KEEPALIVE_PING_SECONDS <= 0:
+            return
+        await asyncio.sleep(config.OLLAMA_KEEPALIVE_PING_SECONDS)
+
+
+def start_ollama_keepalive():
+    """Warm the model up in the background and keep pinging it so it stays resident."""
+    global _keepalive_task
+    if not (config.OLLAMA_ENABLED and config.OLLAMA_WARMUP_ENABLED):
+        return
+    if _keepalive_task is None or _keepalive_task.done():
+        _keepalive_task = asyncio.create_task(_keepalive_loop())
+
+
+async def stop_ollama_keepalive():
+    global _keepalive_task
+    if _keepalive_task is None:
+        return
+    _keepalive_task.cancel()
+    try:
+        await _keepalive_task
+    except asyncio.CancelledError:
+        pass
+    _keepalive_task = None
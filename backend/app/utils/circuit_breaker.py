@@ -0,0 +1,116 @@
+import time
+from collections import deque
+from typing import Dict, Optional
+from .. import config
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half_open"
+
+
+class CircuitBreaker:
+    """Failure-rate circuit breaker for one provider.
+
+    Closed: calls pass and outcomes are kept in a sliding window. The breaker
+    opens once at least `min_calls` outcomes are recorded and the failure rate
+    reaches `failure_rate_threshold`. Open: calls are refused until
+    `open_seconds` have passed. Half-open: up to `half_open_probes` probe calls
+    are let through. A successful probe closes the breaker and a failed probe
+    opens it again.
+    """
+
+    def __init__(self, name: str, failure_rate_threshold: float = 0.5, min_calls: int = 5,
+                 window: int = 20, open_seconds: float = 30, half_open_probes: int = 1):
+        self.name = name
+        self.failure_rate_threshold = failure_rate_threshold
+        self.min_calls = min_calls
+        self.open_seconds = open_seconds
+        self.half_open_probes = half_open_probes
+        self.state = CLOSED
+        self.outcomes = deque(maxlen=window)
+        self.opened_at: Optional[float] = None
+        self.probes_in_flight = 0
+
+    def failure_rate(self) -> float:
+        if not self.outcomes:
+            return 0.0
+        return self.outcomes.count(False) / len(self.outcomes)
+
+    def allow_request(self) -> bool:
+        if self.state == OPEN:
+            if time.monotonic() - self.opened_at < self.open_seconds:
+                return False
+            self.state = HALF_OPEN
+            self.probes_in_flight = 0
+        if self.state == HALF_OPEN:
+            if self.probes_in_flight >= self.half_open_probes:
+                return False
+            self.probes_in_flight += 1
+        return True
+
+    def record_success(self):
+        if self.state == HALF_OPEN:
+            self._close()
+        else:
+            self.outcomes.append(True)
+
+    def record_failure(self):
+        if self.state == HALF_OPEN:
+            self._open()
+            return
+        self.outcomes.append(False)
+        if len(self.outcomes) >= self.min_calls and self.failure_rate() >= self.failure_rate_threshold:
+            self._open()
+
+    def release(self):
+        """Give back a probe slot for a call that ended without an outcome (e.g. cancelled)."""
+        if self.state == HALF_OPEN and self.probes_in_flight > 0:
+            self.probes_in_flight -= 1
+
+    def snapshot(self) -> dict:
+        return {
+            "state": self.state,
+            "failure_rate": round(self.failure_rate(), 2),
+            "calls": len(self.outcomes),
+        }
+
+    def _open(self):
+        self.state = OPEN
+        self.opened_at = time.monotonic()
+        self.probes_in_flight = 0
+
+    def _close(self):
+        self.state = CLOSED
+        self.outcomes.clear()
+        self.opened_at = None
+        self.probes_in_flight = 0
+
+
+class CircuitBreakerRegistry:
+    """One breaker per provider, created on first use from config."""
+
+    def __init__(self):
+        self.breakers: Dict[str, CircuitBreaker] = {}
+
+    def get(self, provider: str) -> CircuitBreaker:
+        breaker = self.breakers.get(provider)
+        if breaker is None:
+            breaker = self.breakers[provider] = CircuitBreaker(
+                provider,
+                failure_rate_threshold=config.CIRCUIT_FAILURE_RATE_THRESHOLD,
+                min_calls=config.CIRCUIT_MIN_CALLS,
+                window=config.CIRCUIT_WINDOW_SIZE,
+                open_seconds=config.CIRCUIT_OPEN_SECONDS,
+                half_open_probes=config.CIRCUIT_HALF_OPEN_PROBES
+            )
+        return breaker
+
+    def snapshot(self) -> Dict[str, dict]:
+        return {provider: self.get(provider).snapshot() for provider in config.MODEL_FALLBACK_PRIORITY}
+
+    def clear(self):
+        self.breakers.clear()
+
+
+# 全局熔断器实例
+circuit_breakers = CircuitBreakerRegistry()
@@ -0,0 +1,149 @@
+import re
+from typing import Any, Dict, Optional
+from pydantic import BaseModel, ConfigDict
+
+
+class Vitals(BaseModel):
+    """Vital signs and lab values found in a health record, in canonical units."""
+
+    model_config = ConfigDict(frozen=True)
+
+    systolic_bp: Optional[float] = None       # mmHg
+    diastolic_bp: Optional[float] = None      # mmHg
+    glucose: Optional[float] = None           # mmol/L
+    total_cholesterol: Optional[float] = None # mmol/L
+    ldl_cholesterol: Optional[float] = None   # mmol/L
+    hdl_cholesterol: Optional[float] = None   # mmol/L
+    triglycerides: Optional[float] = None     # mmol/L
+    bmi: Optional[float] = None               # kg/m²
+    hemoglobin: Optional[float] = None        # g/L
+    heart_rate: Optional[float] = None        # beats per minute
+
+    def as_dict(self) -> Dict[str, float]:
+        """The values that were found, for the `vitals` field of an analysis."""
+        return self.model_dump(exclude_none=True)
+
+
+NUMBER = r"\d+(?:\.\d+)?"
+SEPARATOR = r"\s*(?:[：:=]|为|是)?\s*"
+
+# field -> (label pattern, unit pattern); labels are tried in this order at each position,
+# so LDL/HDL come before total cholesterol
+FIELDS = {
+    "bp": (r"血压|BP|blood\s+pressure", r"mmHg|kPa"),
+    "glucose": (r"空腹血糖|血糖|FBG|GLU|(?:fasting\s+)?(?:blood\s+)?glucose", r"mmol/L|mg/dL"),
+    "ldl_cholesterol": (r"低密度脂蛋白(?:胆固醇)?|LDL(?:-C)?(?:\s*cholesterol)?", r"mmol/L|mg/dL"),
+    "hdl_cholesterol": (r"高密度脂蛋白(?:胆固醇)?|HDL(?:-C)?(?:\s*cholesterol)?", r"mmol/L|mg/dL"),
+    "total_cholesterol": (r"总胆固醇|胆固醇|TC|(?:total\s+)?cholesterol", r"mmol/L|mg/dL"),
+    "triglycerides": (r"甘油三酯|TG|triglycerides?", r"mmol/L|mg/dL"),
+    "bmi": (r"BMI(?:指数)?|体重指数", r"kg/m2|kg/m²"),
+    "hemoglobin": (r"血红蛋白|HGB|Hb|ha?emoglobin", r"g/L|g/dL"),
+    "heart_rate": (r"心率|脉搏|HR|heart\s+rate|pulse", r"次/分(?:钟)?|bpm"),
+    "height": (r"身高|height", r"cm|厘米|m|米"),
+    "weight": (r"体重|weight", r"kg|公斤|千克|斤"),
+}
+
+
+def _field_pattern(name: str, label: str, unit: str) -> str:
+    # The whole alternative is one named group, so `match.lastgroup` is the field.
+    # Latin abbreviations must not be part of a longer word ("HbA1c", "BPM")
+    value = rf"(?P<{name}_value>{NUMBER})"
+    if name == "bp":
+        value += rf"\s*/\s*(?P<bp_diastolic>{NUMBER})"
+    return rf"(?P<{name}>(?<![A-Za-z])(?:{label})(?![A-Za-z]){SEPARATOR}{value}\s*(?P<{name}_unit>{unit})?)"
+
+
+# One alternation for every field, so a record is scanned once
+VITALS_PATTERN = re.compile(
+    "|".join(_field_pattern(name, label, unit) for name, (label, unit) in FIELDS.items()),
+    re.IGNORECASE
+)
+
+# Conversions of other units to the canonical one (mg/dL factors are per analyte)
+CONVERSIONS = {
+    ("bp", "kpa"): 7.50062,
+    ("glucose", "mg/dl"): 1 / 18.016,
+    ("ldl_cholesterol", "mg/dl"): 1 / 38.67,
+    ("hdl_cholesterol", "mg/dl"): 1 / 38.67,
+    ("total_cholesterol", "mg/dl"): 1 / 38.67,
+    ("triglycerides", "mg/dl"): 1 / 88.57,
+    ("hemoglobin", "g/dl"): 10,
+    ("height", "cm"): 0.01,
+    ("height", "厘米"): 0.01,
+    ("weight", "斤"): 0.5,
+}
+
+# Without a unit, values above this are taken to be in the other common unit
+# (e.g. a glucose of 126 is mg/dL, a haemoglobin of 13.5 is g/dL)
+UNITLESS_ALTERNATIVES = {
+    "glucose": (lambda v: v > 40, "mg/dl"),
+    "ldl_cholesterol": (lambda v: v > 20, "mg/dl"),
+    "hdl_cholesterol": (lambda v: v > 20, "mg/dl"),
+    "total_cholesterol": (lambda v: v > 20, "mg/dl"),
+    "triglycerides": (lambda v: v > 30, "mg/dl"),
+    "hemoglobin": (lambda v: v < 30, "g/dl"),
+    "height": (lambda v: v > 3, "cm"),
+}
+
+# Canonical values outside these ranges are treated as misreads and dropped
+PLAUSIBLE = {
+    "systolic_bp": (50, 300),
+    "diastolic_bp": (30, 200),
+    "glucose": (1, 50),
+    "ldl_cholesterol": (0.1, 20),
+    "hdl_cholesterol": (0.1, 10),
+    "total_cholesterol": (0.5, 25),
+    "triglycerides": (0.1, 50),
+    "bmi": (10, 80),
+    "hemoglobin": (30, 250),
+    "heart_rate": (20, 250),
+    "height": (0.5, 2.5),
+    "weight": (2, 400),
+}
+
+
+def _canonical(name: str, value: float, unit: Optional[str]) -> float:
+    unit = unit.lower() if unit else None
+    if unit is None and name in UNITLESS_ALTERNATIVES:
+        looks_other, other_unit = UNITLESS_ALTERNATIVES[name]
+        if looks_other(value):
+            unit = other_unit
+    return value * CONVERSIONS.get((name, unit), 1)
+
+
+def _plausible(name: str, value: float) -> bool:
+    low, high = PLAUSIBLE[name]
+    return low <= value <= high
+
+
+def _keep(values: Dict[str, Any], name: str, value: float):
+    if name not in values and _plausible(name, value):
+        values[name] = round(value, 2)
+
+
+def extract_vitals(text: str) -> Vitals:
+    """Extract vitals from a health record in one scan.
+
+    The first plausible value of each field wins. BMI is derived from height
+    and weight when it is not given. Callers that also compute metrics pass
+    the result on to `compute_metrics` instead of extracting again.
+    """
+    values: Dict[str, Any] = {}
+    for match in VITALS_PATTERN.finditer(text):
+        name = match.lastgroup
+        value, unit = float(match.group(f"{name}_value")), match.group(f"{name}_unit")
+        if name == "bp":
+            # Systolic and diastolic are only kept as a pair
+            factor = CONVERSIONS.get((name, unit.lower() if unit else None), 1)
+            systolic, diastolic = value * factor, float(match.group("bp_diastolic")) * factor
+            if _plausible("systolic_bp", systolic) and _plausible("diastolic_bp", diastolic):
+                _keep(values, "systolic_bp", systolic)
+                _keep(values, "diastolic_bp", diastolic)
+        else:
+            _keep(values, name, _canonical(name, value, unit))
+
+    height, weight = values.pop("height", None), values.pop("weight", None)
+    if "bmi" not in values and height and weight:
+        _keep(values, "bmi", weight / height ** 2)
+    return Vitals(**values)
+
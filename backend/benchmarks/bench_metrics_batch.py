@@ -0,0 +1,51 @@
+"""Micro-benchmark: scoring a cohort with the scalar and the vectorised metrics engine.
+
+Reports the scoring step alone (vitals and keyword counts already extracted,
+as for a cohort held in a table) and end to end from text, for growing batch
+sizes.
+
+    cd backend && python -m benchmarks.bench_metrics_batch
+"""
+import random
+import timeit
+import numpy as np
+from app.utils.metrics import compute_metrics, indicator_counts, score_metrics
+from app.utils.metrics_batch import compute_metrics_batch, score_batch, vitals_matrix
+from app.utils.vitals import extract_vitals
+
+
+def cohort(size: int):
+    rng = random.Random(0)
+    return [
+        f"血压：{rng.randint(90, 180)}/{rng.randint(55, 110)}\n血糖：{rng.uniform(4, 9):.1f}\n"
+        f"胆固醇：{rng.uniform(3.5, 7):.1f}\nBMI：{rng.uniform(18, 35):.1f}\n心率：{rng.randint(45, 110)}\n"
+        + "，".join(rng.sample(["失眠", "压力", "加班", "吸烟", "焦虑", "深夜"], rng.randint(0, 3)))
+        for _ in range(size)
+    ]
+
+
+def bench(func) -> float:
+    timer = timeit.Timer(func)
+    number, _ = timer.autorange()
+    return min(timer.repeat(repeat=3, number=number)) / number * 1e3
+
+
+def main():
+    print(f"{'records':>8} {'score ms':>9} {'columnar':>9} {'speedup':>8} {'text ms':>9} {'batch':>9} {'speedup':>8}")
+    for size in (100, 1000, 10000):
+        texts = cohort(size)
+        assert compute_metrics_batch(texts) == [compute_metrics(text) for text in texts]
+
+        vitals = [extract_vitals(text) for text in texts]
+        counts = [indicator_counts(text) for text in texts]
+        matrix, columns = vitals_matrix(vitals), np.array(counts, dtype=float).T
+        scalar = bench(lambda: [score_metrics(v, *c) for v, c in zip(vitals, counts)])
+        columnar = bench(lambda: score_batch(matrix, *columns))
+
+        text = bench(lambda: [compute_metrics(t) for t in texts])
+        batch = bench(lambda: compute_metrics_batch(texts))
+        print(f"{size:>8} {scalar:>9.2f} {columnar:>9.2f} {scalar / columnar:>7.1f}x {text:>9.2f} {batch:>9.2f} {text / batch:>7.1f}x")
+
+
+if __name__ == "__main__":
+    main()
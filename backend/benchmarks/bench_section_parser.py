@@ -0,0 +1,87 @@
+"""Micro-benchmark: per-response cost of parsing DeepSeek completions.
+
+Compares the single-pass section parser with the multi-pass parsing it
+replaced in deepseek_service on completions of growing size.
+
+    cd backend && python -m benchmarks.bench_section_parser
+"""
+import timeit
+from app.utils.stream_parser import parse_sections
+
+
+def make_completion(items: int) -> str:
+    lines = ["### 健康状况总结", "患者血压偏高，睡眠质量较差，近期工作压力较大。", "", "### 风险因素"]
+    lines += [f"- 风险因素{i % (items // 2 + 1)}：血压波动可能导致心脑血管问题" for i in range(items)]
+    lines += ["", "### 改善建议"]
+    lines += [f"{i % 9 + 1}. 建议{i % (items // 2 + 1)}：保持规律作息，每周运动三次" for i in range(items)]
+    lines += ["", "总之，需要注意饮食结构。建议定期复查血压。"]
+    return "\n".join(lines)
+
+
+def _legacy_sections(sections, summary, recommendations, risk_factors):
+    current_section = None
+    for section in sections:
+        if "总结" in section or "Summary" in section:
+            current_section = "summary"
+            summary.append(section.replace("总结:", "").replace("Summary:", "").strip())
+        elif "建议" in section or "Recommendations" in section:
+            current_section = "recommendations"
+        elif "风险" in section or "Risk" in section:
+            current_section = "risks"
+        elif line := section.strip():
+            if line.startswith("-") or line.startswith("*"):
+                item = line.strip("- ").strip("*").strip()
+                if current_section == "recommendations":
+                    recommendations.append(item)
+                elif current_section == "risks":
+                    risk_factors.append(item)
+            elif current_section == "summary":
+                summary.append(line)
+
+
+def legacy_parse(content: str):
+    """The parsing previously inlined in analyze_with_deepseek (without the default fill-in)."""
+    sections = content.split("\n\n")
+    summary, recommendations, risk_factors = [], [], []
+    _legacy_sections(sections, summary, recommendations, risk_factors)
+    if len(recommendations) < 3 or len(risk_factors) < 2:
+        for line in content.split("\n"):
+            line = line.strip()
+            if line.startswith(("-", "*", "1.", "2.", "3.", "4.", "5.")):
+                item = line.strip("- ").strip("*").strip("1234567890.").strip()
+                if any(keyword in item for keyword in ["建议", "推荐", "应该", "需要"]):
+                    if item not in recommendations:
+                        recommendations.append(item)
+                elif any(keyword in item for keyword in ["风险", "问题", "危险", "注意"]):
+                    if item not in risk_factors:
+                        risk_factors.append(item)
+    if len(recommendations) < 3 or len(risk_factors) < 2:
+        for sentence in content.split("。"):
+            sentence = sentence.strip()
+            if any(keyword in sentence for keyword in ["建议", "推荐", "应该", "需要", "可以"]):
+                if sentence not in recommendations:
+                    recommendations.append(sentence)
+            elif any(keyword in sentence for keyword in ["风险", "问题", "危险", "注意", "可能"]):
+                if sentence not in risk_factors:
+                    risk_factors.append(sentence)
+    _legacy_sections(sections, summary, recommendations, risk_factors)
+    return summary, recommendations, risk_factors
+
+
+def bench(func, text: str) -> float:
+    timer = timeit.Timer(lambda: func(text))
+    number, _ = timer.autorange()
+    return min(timer.repeat(repeat=5, number=number)) / number * 1e6
+
+
+def main():
+    print(f"{'items':>6} {'KB':>7} {'single-pass µs':>15} {'legacy µs':>11} {'speedup':>8}")
+    for items in (10, 100, 1000, 5000):
+        text = make_completion(items)
+        new = bench(parse_sections, text)
+        old = bench(legacy_parse, text)
+        print(f"{items:>6} {len(text.encode()) / 1024:>7.1f} {new:>15.1f} {old:>11.1f} {old / new:>7.1f}x")
+
+
+if __name__ == "__main__":
+    main()
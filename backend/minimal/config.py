@@ -14,6 +14,17 @@ CLAUDE_API_KEY = os.getenv("CLAUDE_API_KEY", "")
 # Model Priority
 MODEL_FALLBACK_PRIORITY: List[str] = ["ollama", "deepseek", "claude"]
 
+# Structured output: ask DeepSeek (response_format) and Ollama (format) for a JSON
+# analysis object; completions that do not validate fall back to the text parsers
+STRUCTURED_OUTPUT_ENABLED = os.getenv("STRUCTURED_OUTPUT_ENABLED", "false").lower() == "true"
+STRUCTURED_OUTPUT_MAX_TOKENS = int(os.getenv("STRUCTURED_OUTPUT_MAX_TOKENS", "800"))
+
+# HTTP Client Pool Configuration
+HTTP_MAX_CONNECTIONS = int(os.getenv("HTTP_MAX_CONNECTIONS", "100"))
+HTTP_MAX_KEEPALIVE_CONNECTIONS = int(os.getenv("HTTP_MAX_KEEPALIVE_CONNECTIONS", "20"))
+HTTP_KEEPALIVE_EXPIRY = float(os.getenv("HTTP_KEEPALIVE_EXPIRY", "30"))
+HTTP2_ENABLED = os.getenv("HTTP2_ENABLED", "false").lower() == "true"
+
 # Server Configuration
 PORT = int(os.getenv("PORT", "8080"))
 HOST = os.getenv("HOST", "0.0.0.0")
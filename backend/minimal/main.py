@@ -1,12 +1,21 @@
+from contextlib import asynccontextmanager
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 from .routers import analysis
 from .config import MODEL_FALLBACK_PRIORITY, OLLAMA_ENABLED
+from .services.http_client import open_http_clients, close_http_clients
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    await open_http_clients()
+    yield
+    await close_http_clients()
 
 app = FastAPI(
     title="DNA Analysis API",
     description="Health analysis system with local-first model architecture",
-    version="1.0.0"
+    version="1.0.0",
+    lifespan=lifespan
 )
 
 app.add_middleware(
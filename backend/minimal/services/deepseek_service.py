@@ -1,40 +1,52 @@
-import httpx
 from typing import Dict, Any
 from fastapi import HTTPException
+from .. import config
 from ..config import DEEPSEEK_API_KEY
+from .http_client import get_http_client
+from .metrics import compute_metrics
+from .stream_parser import parse_sections
+from .structured_output import json_prompt, parse_structured
 
 async def analyze_with_deepseek(health_data: str) -> Dict[str, Any]:
     if not health_data:
         raise HTTPException(status_code=400, detail="Empty sequence provided")
     
     try:
-        async with httpx.AsyncClient() as client:
-            response = await client.post(
-                "https://api.deepseek.com/v1/chat/completions",
-                headers={"Authorization": f"Bearer {DEEPSEEK_API_KEY}"},
-                json={
-                    "model": "deepseek-chat",
-                    "messages": [
-                        {"role": "system", "content": "You are a health analysis assistant."},
-                        {"role": "user", "content": f"Analyze this health data:\n{health_data}"}
-                    ]
-                }
+        payload = {
+            "model": "deepseek-chat",
+            "messages": [
+                {"role": "system", "content": "You are a health analysis assistant."},
+                {"role": "user", "content": f"Analyze this health data:\n{health_data}"}
+            ]
+        }
+        if config.STRUCTURED_OUTPUT_ENABLED:
+            payload["messages"][0]["content"] = json_prompt("You are a health analysis assistant.")
+            payload["response_format"] = {"type": "json_object"}
+            payload["max_tokens"] = config.STRUCTURED_OUTPUT_MAX_TOKENS
+
+        client = get_http_client("deepseek")
+        response = await client.post(
+            "https://api.deepseek.com/v1/chat/completions",
+            headers={"Authorization": f"Bearer {DEEPSEEK_API_KEY}"},
+            json=payload
+        )
+
+        if response.status_code != 200:
+            raise HTTPException(
+                status_code=500,
+                detail=f"Error from DeepSeek service: {response.text}"
             )
             
-            if response.status_code != 200:
-                raise HTTPException(
-                    status_code=500,
-                    detail=f"Error from DeepSeek service: {response.text}"
-                )
-                
-            result = response.json()
-            analysis = parse_deepseek_response(result["choices"][0]["message"]["content"])
-            
-            return {
-                "success": True,
-                "analysis": analysis
-            }
-            
+        result = response.json()
+        analysis = parse_deepseek_response(result["choices"][0]["message"]["content"])
+        # Metrics come from the local engine, so both providers agree on them
+        analysis["metrics"] = compute_metrics(health_data)
+
+        return {
+            "success": True,
+            "analysis": analysis
+        }
+
     except Exception as e:
         raise HTTPException(
             status_code=500,
@@ -42,10 +54,18 @@ async def analyze_with_deepseek(health_data: str) -> Dict[str, Any]:
         )
 
 def parse_deepseek_response(response: str) -> Dict[str, Any]:
+    structured = parse_structured(response)
+    if structured:
+        summary, recommendations, risk_factors = structured.summary, structured.recommendations, structured.risk_factors
+    else:
+        parsed = parse_sections(response)
+        summary = " ".join(parsed.summary) or response
+        recommendations = parsed.recommendations or parsed.unsectioned["recommendation"]
+        risk_factors = parsed.risk_factors or parsed.unsectioned["risk_factor"]
     return {
-        "summary": response,
-        "recommendations": ["保持健康饮食", "规律作息", "适量运动"],
-        "risk_factors": ["亚健康状态", "生活压力大"],
+        "summary": summary,
+        "recommendations": recommendations or ["保持健康饮食", "规律作息", "适量运动"],
+        "risk_factors": risk_factors or ["亚健康状态", "生活压力大"],
         "metrics": {
             "healthScore": 80,
             "stressLevel": "medium",
@@ -1,36 +1,44 @@
-import httpx
 from typing import Dict, Any
 from fastapi import HTTPException
+from .. import config
+from .http_client import get_http_client
+from .metrics import compute_metrics
+from .structured_output import json_prompt, parse_structured
 
 async def analyze_with_ollama(health_data: str) -> Dict[str, Any]:
     if not health_data:
         raise HTTPException(status_code=400, detail="Empty sequence provided")
     
     try:
-        async with httpx.AsyncClient() as client:
-            response = await client.post(
-                "http://localhost:11434/api/generate",
-                json={
-                    "model": "deepseek-coder:1.5b",
-                    "prompt": f"Analyze this health data and provide recommendations:\n{health_data}",
-                    "stream": False
-                }
+        payload = {
+            "model": "deepseek-coder:1.5b",
+            "prompt": f"Analyze this health data and provide recommendations:\n{health_data}",
+            "stream": False
+        }
+        if config.STRUCTURED_OUTPUT_ENABLED:
+            payload["prompt"] = f"{json_prompt('You are a health analysis assistant.')}\n{health_data}"
+            payload["format"] = "json"
+            payload["options"] = {"num_predict": config.STRUCTURED_OUTPUT_MAX_TOKENS}
+
+        client = get_http_client("ollama")
+        response = await client.post("/api/generate", json=payload)
+
+        if response.status_code != 200:
+            raise HTTPException(
+                status_code=500,
+                detail=f"Error from Ollama service: {response.text}"
             )
             
-            if response.status_code != 200:
-                raise HTTPException(
-                    status_code=500,
-                    detail=f"Error from Ollama service: {response.text}"
-                )
-                
-            result = response.json()
-            analysis = parse_ollama_response(result["response"])
-            
-            return {
-                "success": True,
-                "analysis": analysis
-            }
-            
+        result = response.json()
+        analysis = parse_ollama_response(result["response"])
+        # Metrics come from the local engine, so both providers agree on them
+        analysis["metrics"] = compute_metrics(health_data)
+
+        return {
+            "success": True,
+            "analysis": analysis
+        }
+
     except Exception as e:
         raise HTTPException(
             status_code=500,
@@ -38,10 +46,11 @@ async def analyze_with_ollama(health_data: str) -> Dict[str, Any]:
         )
 
 def parse_ollama_response(response: str) -> Dict[str, Any]:
+    structured = parse_structured(response)
     return {
-        "summary": response,
-        "recommendations": ["改善生活习惯", "定期体检", "保持运动"],
-        "risk_factors": ["高压力", "不规律作息"],
+        "summary": structured.summary if structured else response,
+        "recommendations": (structured and structured.recommendations) or ["改善生活习惯", "定期体检", "保持运动"],
+        "risk_factors": (structured and structured.risk_factors) or ["高压力", "不规律作息"],
         "metrics": {
             "healthScore": 75,
             "stressLevel": "medium",
@@ -0,0 +1,154 @@
+import re
+from typing import Dict, List, Optional, Tuple
+
+# Section header markers, checked in order (risk before recommendation so that
+# "风险因素" is not mistaken for a recommendation header)
+SECTION_MARKERS = [
+    ("summary", ["健康状况", "总结", "Summary", "摘要", "分析结果"]),
+    ("risk_factor", ["风险", "Risk Factors", "Risk"]),
+    ("recommendation", ["建议", "Recommendations", "改善"]),
+]
+
+# Keywords classifying bullets and sentences that are not under any item section
+KEYWORD_RULES = [
+    ("recommendation", ["建议", "推荐", "应该", "需要"]),
+    ("risk_factor", ["风险", "问题", "危险", "注意"]),
+]
+
+
+def _compile(table: List[Tuple[str, List[str]]]) -> List[Tuple[str, "re.Pattern"]]:
+    return [(kind, re.compile("|".join(map(re.escape, words)))) for kind, words in table]
+
+
+SECTION_PATTERNS = _compile(SECTION_MARKERS)
+KEYWORD_PATTERNS = _compile(KEYWORD_RULES)
+BULLET_PATTERN = re.compile(r"^(?:[-*•]+|\d{1,2}[.、)])\s*")
+HEADER_PATTERN = re.compile(r"^#+\s*")
+COLON_PATTERN = re.compile(r"[:：]")
+SENTENCE_PATTERN = re.compile(r"[^。！？!?]+")
+
+
+class IncrementalSectionParser:
+    """Parse an analysis completion chunk by chunk as it is streamed.
+
+    `feed` buffers partial lines and returns the items found in every line
+    completed by the chunk, as (kind, text) tuples where kind is "summary",
+    "risk_factor" or "recommendation". `close` flushes the last line. Every
+    line is looked at once; items repeated in the completion are only kept
+    (and returned) the first time.
+
+    Bullets and sentences outside the risk and recommendation sections are
+    classified by keyword into `unsectioned`, for callers that want to top up
+    short lists; they are not returned as items.
+    """
+
+    def __init__(self):
+        self.section: Optional[str] = None
+        self.summary: List[str] = []
+        self.recommendations: List[str] = []
+        self.risk_factors: List[str] = []
+        self.unsectioned: Dict[str, List[str]] = {"recommendation": [], "risk_factor": []}
+        self._targets = {
+            "summary": self.summary,
+            "risk_factor": self.risk_factors,
+            "recommendation": self.recommendations,
+        }
+        self._seen = {kind: set() for kind in self._targets}
+        self._unsectioned_seen = set()
+        self._buffer = ""
+
+    def feed(self, chunk: str) -> List[Tuple[str, str]]:
+        self._buffer += chunk
+        if "\n" not in chunk:
+            return []
+        *lines, self._buffer = self._buffer.split("\n")
+        items = []
+        for line in lines:
+            item = self._parse_line(line)
+            if item:
+                items.append(item)
+        return items
+
+    def close(self) -> List[Tuple[str, str]]:
+        line, self._buffer = self._buffer, ""
+        item = self._parse_line(line)
+        return [item] if item else []
+
+    def result(self) -> Dict[str, List[str]]:
+        return {
+            "summary": " ".join(self.summary),
+            "recommendations": list(self.recommendations),
+            "risk_factors": list(self.risk_factors),
+        }
+
+    def _parse_line(self, line: str) -> Optional[Tuple[str, str]]:
+        line = line.strip()
+        if not line:
+            return None
+
+        # Bold lines ("**风险因素**") are sub-headers, not list items
+        if line.startswith("**"):
+            section = self._match_section(line.strip("*").rstrip("：:"))
+            if section:
+                self.section = section
+            return None
+
+        bullet = BULLET_PATTERN.match(line)
+        if not bullet:
+            header = HEADER_PATTERN.match(line)
+            if header or COLON_PATTERN.search(line):
+                title, _, rest = COLON_PATTERN.sub(":", HEADER_PATTERN.sub("", line), count=1).partition(":")
+                section = self._match_section(title)
+                if section:
+                    self.section = section
+                    return self._emit(section, rest)
+                if header:
+                    return None
+            if self.section == "summary":
+                # A line ending in a colon only introduces the list below it
+                return None if line.endswith(("：", ":")) else self._emit("summary", line)
+            if self.section is None:
+                for sentence in SENTENCE_PATTERN.findall(line):
+                    self._classify(sentence)
+            return None
+
+        raw = line[bullet.end():].strip()
+        text = raw.strip("*").strip()
+        if not text or text.endswith(("：", ":")) or (raw.startswith("**") and raw.endswith("**")):
+            return None
+        if self.section in ("risk_factor", "recommendation"):
+            return self._emit(self.section, text)
+        self._classify(text)
+        return None
+
+    def _match_section(self, title: str) -> Optional[str]:
+        for section, pattern in SECTION_PATTERNS:
+            if pattern.search(title):
+                return section
+        return None
+
+    def _classify(self, text: str):
+        text = text.strip()
+        if not text or text in self._unsectioned_seen:
+            return
+        for kind, pattern in KEYWORD_PATTERNS:
+            if pattern.search(text):
+                self._unsectioned_seen.add(text)
+                self.unsectioned[kind].append(text)
+                return
+
+    def _emit(self, kind: str, text: str) -> Optional[Tuple[str, str]]:
+        text = text.strip().strip("*").strip()
+        if not text or text in self._seen[kind]:
+            return None
+        self._seen[kind].add(text)
+        self._targets[kind].append(text)
+        return kind, text
+
+
+def parse_sections(text: str) -> IncrementalSectionParser:
+    """Parse a complete (non-streamed) completion in a single pass."""
+    parser = IncrementalSectionParser()
+    parser.feed(text)
+    parser.close()
+    return parser
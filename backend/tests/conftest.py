@@ -2,6 +2,15 @@ import pytest
 from httpx import AsyncClient
 from fastapi.testclient import TestClient
 from app.main import app
+from app.utils import http_client
+from app.services.ollama_registry import model_registry
+from app.services import ollama_governor
+from app.utils.latency import latency_tracker
+from app.utils.circuit_breaker import circuit_breakers
+from app.utils.routing import adaptive_router
+from app.utils import retry
+from app.utils.cache import analysis_cache
+from app.utils.fingerprint import near_duplicate_index
 import pytest_asyncio
 import os
 
@@ -20,6 +29,23 @@ def mock_env_vars(monkeypatch):
     monkeypatch.setenv("PORT", "8080")
     monkeypatch.setenv("HOST", "0.0.0.0")
 
+@pytest.fixture(autouse=True)
+def reset_http_clients():
+    """Drop pooled clients so each test builds them from its (possibly mocked) httpx."""
+    http_client._clients.clear()
+    model_registry.invalidate()
+    ollama_governor._governors.clear()
+    latency_tracker.clear()
+    circuit_breakers.clear()
+    adaptive_router.clear()
+    retry._policies.clear()
+    analysis_cache.clear()
+    near_duplicate_index.clear()
+    yield
+    http_client._clients.clear()
+    model_registry.invalidate()
+    ollama_governor._governors.clear()
+
 @pytest_asyncio.fixture
 async def app_client():
     """Create an async client for testing."""
@@ -0,0 +1,47 @@
+from app.utils import cache as cache_module
+from app.utils.cache import Cache, approximate_size
+
+def test_expired_entries_are_removed_without_scanning(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(cache_module.time, "time", lambda: now[0])
+    cache = Cache(max_size=10, ttl=10)
+    cache.set("a", 1)
+    now[0] += 5
+    cache.set("b", 2)
+    cache.set("a", 3)  # overwrite leaves a stale heap entry for the old expiry
+
+    now[0] += 6
+    cache.cleanup()
+    assert "b" in cache.cache and "a" in cache.cache
+
+    now[0] += 5
+    cache.cleanup()
+    assert cache.cache == {}
+    assert cache.expirations == 2
+    assert cache.total_bytes == 0
+
+def test_byte_limit_evicts_least_recently_used():
+    item = {"summary": "x" * 100}
+    size = approximate_size(item)
+    cache = Cache(max_size=100, ttl=60, max_bytes=size * 2)
+    cache.set("a", item)
+    cache.set("b", item)
+    cache.get("a")
+    cache.set("c", item)
+
+    assert list(cache.cache) == ["a", "c"]
+    assert cache.total_bytes == size * 2
+    assert cache.evictions == 1
+
+    cache.set("huge", {"summary": "x" * 1000})
+    assert "huge" not in cache.cache
+
+def test_stats_counters():
+    cache = Cache(max_size=1, ttl=60)
+    cache.set("a", 1)
+    cache.get("a")
+    cache.get("missing")
+    cache.set("b", 2)
+    stats = cache.stats()
+    assert (stats["hits"], stats["misses"], stats["evictions"], stats["entries"]) == (1, 1, 1, 1)
+    assert stats["hit_rate"] == 0.5
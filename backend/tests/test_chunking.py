@@ -0,0 +1,63 @@
+import httpx
+import pytest
+from fastapi import HTTPException
+from app import config
+from app.services import deepseek_service
+from app.utils.chunking import chunk_text, estimate_tokens, merge_analyses
+from app.utils.metrics import compute_metrics
+
+class FakeClient:
+    def __init__(self):
+        self.prompts = []
+
+    async def post(self, url, json=None, **kwargs):
+        prompt = json["messages"][1]["content"]
+        self.prompts.append(prompt)
+        finding = "血压偏高" if "血压" in prompt else "血糖偏高"
+        content = f"总结: {finding}\n\n风险因素:\n\n- {finding}\n\n建议:\n\n- 规律运动"
+        return httpx.Response(200, json={"choices": [{"message": {"content": content}}]})
+
+@pytest.fixture
+def client(monkeypatch):
+    fake = FakeClient()
+    monkeypatch.setattr(deepseek_service, "DEEPSEEK_API_KEY", "test-key")
+    monkeypatch.setattr(deepseek_service, "get_http_client", lambda provider: fake)
+    monkeypatch.setattr(config, "CHUNK_MAX_TOKENS", 20)
+    return fake
+
+def test_chunk_text_respects_token_budget():
+    report = "\n".join(f"第{i}项检查结果正常" for i in range(10)) + "\n" + "ACGT" * 50
+    chunks = chunk_text(report, 20)
+    assert len(chunks) > 1
+    assert all(estimate_tokens(chunk) <= 20 for chunk in chunks)
+    assert "\n".join(chunks).replace("\n", "") == report.replace("\n", "")
+
+def test_merge_analyses_keeps_most_severe_level():
+    merged = merge_analyses([
+        {"risk_factors": ["高血压"], "metrics": {"healthScore": 60, "riskLevel": "low"}},
+        {"risk_factors": ["高血压", "高血糖"], "metrics": {"healthScore": 70, "riskLevel": "high"}},
+    ])
+    assert merged["risk_factors"] == ["高血压", "高血糖"]
+    assert merged["metrics"] == {"healthScore": 65, "riskLevel": "high"}
+
+@pytest.mark.asyncio
+async def test_long_report_is_analysed_in_chunks(client):
+    report = "血压：150/95，近期头晕明显\n" * 3 + "血糖：7.8，餐后口渴多饮\n" * 3
+    result = await deepseek_service.analyze_with_deepseek(report)
+
+    assert len(client.prompts) > 1
+    assert "".join(client.prompts).count("血糖：7.8") == 3
+    assert result["provider"] == "deepseek"
+    risks = result["analysis"]["risk_factors"]
+    assert "血压偏高" in risks and "血糖偏高" in risks
+    assert result["analysis"]["recommendations"].count("规律运动") == 1
+    # Metrics are computed once from the whole report, not averaged over the chunks
+    assert result["analysis"]["metrics"] == compute_metrics(report)
+
+@pytest.mark.asyncio
+async def test_too_many_chunks_is_rejected(client, monkeypatch):
+    monkeypatch.setattr(config, "CHUNK_MAX_COUNT", 2)
+    with pytest.raises(HTTPException) as exc_info:
+        await deepseek_service.analyze_with_deepseek("ACGT" * 1000)
+    assert exc_info.value.status_code == 413
+    assert client.prompts == []
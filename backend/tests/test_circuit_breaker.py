@@ -0,0 +1,88 @@
+import pytest
+from fastapi import HTTPException
+from app.routers import analysis
+from app.routers.analysis import process_sequence
+from app.utils import circuit_breaker
+from app.utils.circuit_breaker import CircuitBreaker, circuit_breakers
+
+def test_breaker_opens_on_failure_rate():
+    breaker = CircuitBreaker("deepseek", failure_rate_threshold=0.5, min_calls=4, open_seconds=30)
+    for ok in (True, False, True):
+        breaker.record_success() if ok else breaker.record_failure()
+    assert breaker.state == circuit_breaker.CLOSED
+    breaker.record_failure()
+    assert breaker.state == circuit_breaker.OPEN
+    assert breaker.allow_request() is False
+
+def test_half_open_probe_closes_or_reopens(monkeypatch):
+    now = [0.0]
+    monkeypatch.setattr(circuit_breaker.time, "monotonic", lambda: now[0])
+    breaker = CircuitBreaker("ollama", min_calls=1, open_seconds=10, half_open_probes=1)
+    breaker.record_failure()
+    assert breaker.state == circuit_breaker.OPEN
+
+    now[0] = 11
+    assert breaker.allow_request() is True
+    assert breaker.state == circuit_breaker.HALF_OPEN
+    assert breaker.allow_request() is False  # only one probe at a time
+    breaker.record_failure()
+    assert breaker.state == circuit_breaker.OPEN
+
+    now[0] = 22
+    assert breaker.allow_request() is True
+    breaker.record_success()
+    assert breaker.state == circuit_breaker.CLOSED
+
+@pytest.mark.asyncio
+async def test_open_provider_is_skipped(monkeypatch):
+    calls = []
+
+    async def broken(sequence, *args):
+        calls.append("ollama")
+        raise RuntimeError("connection refused")
+
+    async def deepseek(sequence, *args):
+        return {"success": True, "analysis": {"summary": "ok"}, "provider": "deepseek"}
+
+    monkeypatch.setattr("app.config.MODEL_FALLBACK_PRIORITY", ["ollama", "deepseek"])
+    monkeypatch.setattr("app.config.OLLAMA_ENABLED", True)
+    monkeypatch.setattr("app.services.ollama_service.analyze_with_ollama", broken)
+    monkeypatch.setattr(analysis, "analyze_with_deepseek", deepseek)
+    circuit_breakers.breakers["ollama"] = CircuitBreaker("ollama", min_calls=2, open_seconds=60)
+
+    for _ in range(3):
+        assert (await process_sequence("血压：120/80"))["provider"] == "deepseek"
+    assert calls == ["ollama", "ollama"]
+    assert circuit_breakers.snapshot()["ollama"]["state"] == "open"
+
+@pytest.mark.asyncio
+async def test_rate_limits_trip_the_breaker_of_an_explicit_provider(monkeypatch):
+    calls = []
+
+    async def rate_limited(sequence, *args):
+        calls.append("deepseek")
+        raise HTTPException(status_code=429, detail="rate limit exceeded")
+
+    monkeypatch.setattr(analysis, "analyze_with_deepseek", rate_limited)
+    circuit_breakers.breakers["deepseek"] = CircuitBreaker("deepseek", min_calls=2, open_seconds=60)
+
+    statuses = []
+    for _ in range(3):
+        with pytest.raises(HTTPException) as exc_info:
+            await process_sequence("血压：120/80", provider="deepseek")
+        statuses.append(exc_info.value.status_code)
+    assert statuses == [429, 429, 503]
+    assert calls == ["deepseek", "deepseek"]
+
+@pytest.mark.asyncio
+async def test_other_client_errors_are_neutral(monkeypatch):
+    async def bad_request(sequence, *args):
+        raise HTTPException(status_code=400, detail="Sequence cannot be empty")
+
+    monkeypatch.setattr(analysis, "analyze_with_deepseek", bad_request)
+    breaker = circuit_breakers.breakers["deepseek"] = CircuitBreaker("deepseek", min_calls=1)
+
+    with pytest.raises(HTTPException):
+        await process_sequence("血压：120/80", provider="deepseek")
+    assert breaker.state == circuit_breaker.CLOSED
+    assert len(breaker.outcomes) == 0
@@ -0,0 +1,55 @@
+import asyncio
+import time
+import pytest
+from fastapi import HTTPException
+from app import config
+from app.routers import analysis
+from app.routers.analysis import process_sequence
+from app.utils.deadline import get_deadline, request_deadline, run_with_deadline
+
+def test_client_header_can_only_lower_the_budget(monkeypatch):
+    monkeypatch.setattr(config, "REQUEST_DEADLINE_SECONDS", 45)
+    monkeypatch.setattr(config, "REQUEST_DEADLINE_MAX_SECONDS", 60)
+    now = time.monotonic()
+    assert request_deadline() - now == pytest.approx(45, abs=1)
+    assert request_deadline("5") - now == pytest.approx(5, abs=1)
+    assert request_deadline("600") - now == pytest.approx(60, abs=1)
+    with pytest.raises(HTTPException):
+        request_deadline("soon")
+
+@pytest.mark.asyncio
+async def test_run_with_deadline_exposes_and_enforces_deadline():
+    deadline = time.monotonic() + 0.05
+
+    async def slow():
+        assert get_deadline() == deadline
+        await asyncio.sleep(1)
+
+    with pytest.raises(HTTPException) as exc_info:
+        await run_with_deadline(slow, deadline)
+    assert exc_info.value.status_code == 504
+    assert get_deadline() is None
+
+@pytest.mark.asyncio
+async def test_fallback_chain_splits_remaining_budget(monkeypatch):
+    budgets = {}
+
+    def provider(name, delay):
+        async def analyze(sequence, *args):
+            budgets[name] = get_deadline() - time.monotonic()
+            await asyncio.sleep(delay)
+            return {"success": True, "analysis": {"summary": name}, "provider": name}
+        return analyze
+
+    monkeypatch.setattr("app.config.MODEL_FALLBACK_PRIORITY", ["ollama", "deepseek"])
+    monkeypatch.setattr("app.config.OLLAMA_ENABLED", True)
+    monkeypatch.setattr("app.services.ollama_service.analyze_with_ollama", provider("ollama", 1))
+    monkeypatch.setattr(analysis, "analyze_with_deepseek", provider("deepseek", 0))
+
+    start = time.monotonic()
+    result = await process_sequence("血压：120/80", deadline=start + 0.4)
+
+    assert result["provider"] == "deepseek"
+    assert budgets["ollama"] == pytest.approx(0.2, abs=0.05)
+    assert budgets["deepseek"] == pytest.approx(0.2, abs=0.05)
+    assert time.monotonic() - start < 0.4
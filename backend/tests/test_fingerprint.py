@@ -0,0 +1,61 @@
+import pytest
+from app.utils import fingerprint as fingerprint_module
+from app.utils.fingerprint import NearDuplicateIndex, extract_values, fingerprint, fingerprint_async
+
+REPORT = "血压：120/80\n血糖：5.6\n胆固醇：4.8\n近期睡眠质量较差，工作压力大，每周运动一次。"
+
+def test_extracts_every_number_with_its_label():
+    values, remainder = extract_values("bmi: 24.5 血压:135/88 年龄 45，无不适")
+    assert values == [("bmi", 24.5), ("年龄", 45), ("血压", 88), ("血压", 135)]
+    assert remainder.split() == ["，无不适"]
+
+def test_reformatted_report_matches():
+    index = NearDuplicateIndex(threshold=0.8)
+    index.add(fingerprint(REPORT, "deepseek"), "original")
+
+    reordered = "血糖: 5.6  胆固醇: 4.8  血压: 120 / 80\n近期睡眠质量较差,工作压力大,每周运动一次."
+    assert index.find(fingerprint(reordered, "deepseek")) == "original"
+
+def test_different_values_settings_or_text_do_not_match():
+    index = NearDuplicateIndex(threshold=0.8)
+    index.add(fingerprint(REPORT, "deepseek"), "original")
+
+    assert index.find(fingerprint(REPORT.replace("5.6", "7.9"), "deepseek")) is None
+    assert index.find(fingerprint(REPORT.replace("120/80", "121/80"), "deepseek")) is None
+    assert index.find(fingerprint(REPORT, "ollama")) is None
+    assert index.find(fingerprint(REPORT.replace("睡眠质量较差，工作压力大", "无明显不适，饮食清淡规律"), "deepseek")) is None
+
+def test_unrecognised_values_do_not_match():
+    index = NearDuplicateIndex(threshold=0.5)
+    index.add(fingerprint(REPORT + "\n甘油三酯：1.2\n年龄：45", "deepseek"), "original")
+
+    assert index.find(fingerprint(REPORT + "\n甘油三酯：2.9\n年龄：45", "deepseek")) is None
+    assert index.find(fingerprint(REPORT + "\n甘油三酯：1.2\n年龄：62", "deepseek")) is None
+    # Values swapped between fields are different reports too
+    assert index.find(fingerprint(REPORT + "\n甘油三酯：45\n年龄：1.2", "deepseek")) is None
+
+def test_free_text_beyond_the_minhash_prefix_must_match_exactly():
+    long_report = REPORT + "近期饮食清淡。" * 400
+    index = NearDuplicateIndex(threshold=0.5)
+    index.add(fingerprint(long_report, "deepseek"), "original")
+
+    assert index.find(fingerprint(long_report + "偶有头晕", "deepseek")) is None
+
+def test_disabled_by_default():
+    index = NearDuplicateIndex()
+    index.add(fingerprint(REPORT), "original")
+    assert index.find(fingerprint(REPORT)) is None
+
+@pytest.mark.asyncio
+async def test_async_fingerprint_matches_sync():
+    fp = await fingerprint_async(REPORT, "deepseek")
+    assert (fp.bucket, fp.signature) == (fingerprint(REPORT, "deepseek").bucket, fingerprint(REPORT, "deepseek").signature)
+
+@pytest.mark.asyncio
+async def test_near_duplicate_served_from_cache(monkeypatch):
+    from app.utils.result_store import get_cached_result, store_result
+    monkeypatch.setattr(fingerprint_module.near_duplicate_index, "threshold", 0.8)
+
+    store_result("original", {"analysis": {"summary": "ok"}}, fingerprint(REPORT))
+    result = await get_cached_result("other", fingerprint(REPORT.replace("120/80", "120 / 80")))
+    assert result == ({"analysis": {"summary": "ok"}}, "near-duplicate")
@@ -0,0 +1,55 @@
+import asyncio
+import pytest
+from app import config
+from app.routers import analysis
+from app.routers.analysis import process_sequence
+
+def fake_provider(name, delay, fail=False, calls=None):
+    async def analyze(sequence, *args):
+        try:
+            await asyncio.sleep(delay)
+        except asyncio.CancelledError:
+            if calls is not None:
+                calls.append(f"{name}:cancelled")
+            raise
+        if fail:
+            raise RuntimeError(f"{name} down")
+        return {"success": True, "analysis": {"summary": name}, "provider": name}
+    return analyze
+
+@pytest.fixture
+def hedging(monkeypatch):
+    monkeypatch.setattr(config, "HEDGE_ENABLED", True)
+    monkeypatch.setattr(config, "HEDGE_DEFAULT_DELAY_SECONDS", 0.02)
+    monkeypatch.setattr("app.config.MODEL_FALLBACK_PRIORITY", ["ollama", "deepseek", "claude"])
+    monkeypatch.setattr("app.config.OLLAMA_ENABLED", True)
+
+@pytest.mark.asyncio
+async def test_slow_primary_is_hedged_and_cancelled(hedging, monkeypatch):
+    calls = []
+    monkeypatch.setattr("app.services.ollama_service.analyze_with_ollama", fake_provider("ollama", 1, calls=calls))
+    monkeypatch.setattr(analysis, "analyze_with_deepseek", fake_provider("deepseek", 0.01))
+
+    result = await asyncio.wait_for(process_sequence("血压：120/80"), timeout=0.5)
+    await asyncio.sleep(0)
+
+    assert result["provider"] == "deepseek"
+    assert calls == ["ollama:cancelled"]
+
+@pytest.mark.asyncio
+async def test_fast_primary_is_not_hedged(hedging, monkeypatch):
+    monkeypatch.setattr("app.services.ollama_service.analyze_with_ollama", fake_provider("ollama", 0))
+    monkeypatch.setattr(analysis, "analyze_with_deepseek", fake_provider("deepseek", 0, fail=True))
+
+    result = await process_sequence("血压：120/80")
+    assert result["provider"] == "ollama"
+    assert analysis.latency_tracker.percentile("ollama", 0.5) is not None
+
+@pytest.mark.asyncio
+async def test_failures_fall_through_to_next_provider(hedging, monkeypatch):
+    monkeypatch.setattr("app.services.ollama_service.analyze_with_ollama", fake_provider("ollama", 0, fail=True))
+    monkeypatch.setattr(analysis, "analyze_with_deepseek", fake_provider("deepseek", 0, fail=True))
+    monkeypatch.setattr(analysis, "analyze_with_claude", fake_provider("claude", 0))
+
+    result = await process_sequence("血压：120/80")
+    assert result["provider"] == "claude"
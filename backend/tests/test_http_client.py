@@ -0,0 +1,29 @@
+import pytest
+from app import config
+from app.utils import http_client
+from app.utils.http_client import get_http_client, open_http_clients, close_http_clients
+
+@pytest.mark.asyncio
+async def test_clients_are_shared_per_provider():
+    await open_http_clients()
+    try:
+        ollama = get_http_client("ollama")
+        assert get_http_client("ollama") is ollama
+        assert get_http_client("deepseek") is not ollama
+        assert str(ollama.base_url).rstrip("/") == config.OLLAMA_API_BASE
+    finally:
+        await close_http_clients()
+    assert http_client._clients == {}
+
+@pytest.mark.asyncio
+async def test_closed_client_is_recreated():
+    client = get_http_client("deepseek")
+    await client.aclose()
+    assert get_http_client("deepseek") is not client
+    await close_http_clients()
+
+def test_http2_requires_h2(monkeypatch):
+    monkeypatch.setattr(config, "HTTP2_ENABLED", True)
+    monkeypatch.setattr(http_client.importlib.util, "find_spec", lambda name: None)
+    assert http_client._http2_enabled("deepseek") is False
+    assert http_client._http2_enabled("ollama") is False
@@ -0,0 +1,311 @@
+import asyncio
+import json
+import pytest
+import pytest_asyncio
+from datetime import datetime, timedelta
+from types import SimpleNamespace
+from fastapi import FastAPI, HTTPException
+from httpx import AsyncClient
+from app.routers import analysis, jobs
+from app.services.job_queue import JobQueue
+
+def matches(doc, query):
+    for field, condition in query.items():
+        if field == "$or":
+            if not any(matches(doc, branch) for branch in condition):
+                return False
+            continue
+        value = doc.get(field)
+        if isinstance(condition, dict):
+            if "$ne" in condition and value == condition["$ne"]:
+                return False
+            if "$in" in condition and value not in condition["$in"]:
+                return False
+            if "$gt" in condition and not value > condition["$gt"]:
+                return False
+            if "$lt" in condition and (value is None or not value < condition["$lt"]):
+                return False
+        elif value != condition:
+            return False
+    return True
+
+class FakeCursor:
+    def __init__(self, docs):
+        self.docs = docs
+
+    async def to_list(self, length=None):
+        return self.docs
+
+class FakeCollection:
+    def __init__(self):
+        self.docs = {}
+
+    async def find_one(self, query):
+        return next((dict(doc) for doc in self.docs.values() if matches(doc, query)), None)
+
+    def find(self, query, projection=None):
+        return FakeCursor([dict(doc) for doc in self.docs.values() if matches(doc, query)])
+
+    async def replace_one(self, query, doc, upsert=False):
+        matched = query["_id"] in self.docs and matches(self.docs[query["_id"]], query)
+        if matched or upsert:
+            self.docs[query["_id"]] = dict(doc)
+        return SimpleNamespace(matched_count=int(matched))
+
+    async def update_one(self, query, update, upsert=False):
+        doc = next((doc for doc in self.docs.values() if matches(doc, query)), None)
+        if doc is not None:
+            doc.update(update.get("$set", {}))
+        elif upsert:
+            self.docs[query["_id"]] = {"_id": query["_id"], **update.get("$setOnInsert", {})}
+            return SimpleNamespace(upserted_id=query["_id"])
+        return SimpleNamespace(upserted_id=None)
+
+    async def find_one_and_update(self, query, update, return_document=None):
+        doc = next((doc for doc in self.docs.values() if matches(doc, query)), None)
+        if doc is None:
+            return None
+        doc.update(update["$set"])
+        return dict(doc)
+
+    async def create_index(self, field, **kwargs):
+        pass
+
+@pytest.fixture
+def provider(monkeypatch):
+    calls = []
+    gate = asyncio.Event()
+    gate.set()
+
+    async def fake_process_sequence(sequence, provider=None, analysis_type="health", deadline=None, vitals=None):
+        calls.append(sequence)
+        await gate.wait()
+        if "fail" in sequence:
+            raise HTTPException(status_code=502, detail="provider down")
+        return {"analysis": {"summary": sequence, "recommendations": [], "risk_factors": []}, "provider": provider}
+
+    monkeypatch.setattr(analysis, "process_sequence", fake_process_sequence)
+    return calls, gate
+
+@pytest_asyncio.fixture
+async def queue(monkeypatch):
+    queue = JobQueue(workers=2)
+    queue._collection = FakeCollection()
+    monkeypatch.setattr(jobs, "job_queue", queue)
+    await queue.start()
+    yield queue
+    await queue.stop()
+
+@pytest.fixture
+def client():
+    app = FastAPI()
+    app.include_router(jobs.router)
+    return AsyncClient(app=app, base_url="http://test")
+
+async def wait_until_finished(client, job_id):
+    for _ in range(100):
+        job = (await client.get(f"/api/jobs/{job_id}")).json()
+        if job["status"] in ("succeeded", "failed"):
+            return job
+        await asyncio.sleep(0.01)
+    raise AssertionError("job did not finish")
+
+@pytest.mark.asyncio
+async def test_job_runs_in_background(client, queue, provider):
+    async with client:
+        response = await client.post("/api/jobs", data={"sequence": "血压：150/95", "provider": "deepseek"})
+        assert response.status_code == 202
+        created = response.json()
+        assert created["status"] == "queued" and created["deduplicated"] is False
+        assert response.headers["Location"] == f"/api/jobs/{created['id']}"
+
+        job = await wait_until_finished(client, created["id"])
+        missing = await client.get("/api/jobs/unknown")
+
+    assert job["status"] == "succeeded"
+    assert job["result"]["analysis"]["summary"] == "血压：150/95"
+    assert job["result"]["provider"] == "deepseek"
+    assert "sequence" not in job
+    assert queue._collection.docs[created["id"]]["status"] == "succeeded"
+    assert missing.status_code == 404
+
+@pytest.mark.asyncio
+async def test_jobs_are_deduplicated_by_input_hash(client, queue, provider):
+    calls, _ = provider
+    async with client:
+        first = (await client.post("/api/jobs", data={"sequence": "血糖：7.8", "provider": "deepseek"})).json()
+        second = (await client.post("/api/jobs", data={"sequence": " 血糖:7.8 ", "provider": "deepseek"})).json()
+        other = (await client.post("/api/jobs", data={"sequence": "血糖：7.8", "provider": "ollama"})).json()
+        await wait_until_finished(client, first["id"])
+        await wait_until_finished(client, other["id"])
+
+        failed = (await client.post("/api/jobs", data={"sequence": "fail", "provider": "deepseek"})).json()
+        failed_job = await wait_until_finished(client, failed["id"])
+        retried = (await client.post("/api/jobs", data={"sequence": "fail", "provider": "deepseek"})).json()
+
+    assert second == {"id": first["id"], "status": first["status"], "deduplicated": True}
+    assert other["id"] != first["id"]
+    assert failed_job["error"] == {"status_code": 502, "detail": "provider down"}
+    assert retried["id"] != failed["id"] and retried["deduplicated"] is False
+    assert calls.count("血糖：7.8") == 2
+
+@pytest.mark.asyncio
+async def test_unfinished_jobs_resume_after_restart(client, queue, provider, monkeypatch):
+    calls, gate = provider
+    gate.clear()
+    async with client:
+        created = (await client.post("/api/jobs", data={"sequence": "心率：72", "provider": "deepseek"})).json()
+        await asyncio.sleep(0.01)
+        await queue.stop()  # the process goes away while the job is running
+
+        restarted = JobQueue(workers=1)
+        restarted._collection = queue._collection
+        monkeypatch.setattr(jobs, "job_queue", restarted)
+        gate.set()
+        await restarted.start()
+        try:
+            job = await wait_until_finished(client, created["id"])
+            # A fresh process without the job in memory reads it from Mongo
+            restarted.clear()
+            stored = (await client.get(f"/api/jobs/{created['id']}")).json()
+        finally:
+            await restarted.stop()
+
+    assert job["status"] == "succeeded"
+    assert stored["status"] == "succeeded"
+    assert len(calls) == 2
+
+@pytest.mark.asyncio
+async def test_job_events_stream_status_changes(client, queue, provider):
+    _, gate = provider
+    gate.clear()
+    async with client:
+        created = (await client.post("/api/jobs", data={"sequence": "BMI：27", "provider": "deepseek"})).json()
+        await asyncio.sleep(0.01)
+        asyncio.get_running_loop().call_later(0.05, gate.set)
+        response = await client.get(f"/api/jobs/{created['id']}/events")
+
+    frames = [frame.split("\n") for frame in response.text.strip().split("\n\n")]
+    events = [(lines[0][len("event: "):], json.loads(lines[1][len("data: "):])) for lines in frames]
+    assert response.headers["content-type"].startswith("text/event-stream")
+    assert [name for name, _ in events] == ["status", "status", "done"]
+    assert events[0][1]["status"] == "running"
+    assert events[1][1]["status"] == "succeeded"
+    assert events[1][1]["result"]["analysis"]["summary"] == "BMI：27"
+
+@pytest.mark.asyncio
+async def test_each_job_runs_once_across_processes(provider):
+    calls, _ = provider
+    collection = FakeCollection()
+    first, second = JobQueue(workers=2), JobQueue(workers=2)
+    first._collection = second._collection = collection
+
+    job, _ = await first.submit("血压：150/95", "deepseek")
+    # A second process starting up sees the queued job as well
+    await second.start()
+    await first.start()
+    try:
+        await wait_for_status(collection, job["_id"], "succeeded")
+    finally:
+        await first.stop()
+        await second.stop()
+
+    assert collection.docs[job["_id"]]["status"] == "succeeded"
+    assert calls == ["血压：150/95"]
+
+def running_job(job_id, owner, lease_until):
+    now = datetime.utcnow()
+    job = {
+        "_id": job_id, "input_hash": job_id, "provider": "deepseek", "analysis_type": "health",
+        "sequence": job_id, "status": "running", "result": None, "error": None, "owner": owner,
+        "lease_until": lease_until, "created_at": now, "updated_at": now, "expires_at": now + timedelta(days=1),
+    }
+    if lease_until is None:
+        del job["owner"], job["lease_until"]
+    return job
+
+async def wait_for_status(collection, job_id, status):
+    for _ in range(100):
+        if collection.docs[job_id]["status"] == status:
+            return
+        await asyncio.sleep(0.01)
+
+@pytest.mark.asyncio
+async def test_only_running_jobs_with_expired_leases_are_recovered(provider):
+    calls, _ = provider
+    collection = FakeCollection()
+    now = datetime.utcnow()
+    for job_id, lease_until in (("live", now + timedelta(seconds=60)), ("dead", now - timedelta(seconds=1))):
+        collection.docs[job_id] = running_job(job_id, "other", lease_until)
+
+    queue = JobQueue(workers=1)
+    queue._collection = collection
+    await queue.start()
+    try:
+        await wait_for_status(collection, "dead", "succeeded")
+    finally:
+        await queue.stop()
+
+    assert calls == ["dead"]
+    assert collection.docs["dead"]["owner"] == queue.owner
+    assert collection.docs["live"]["status"] == "running" and collection.docs["live"]["owner"] == "other"
+
+@pytest.mark.asyncio
+async def test_lease_is_renewed_while_the_job_runs(provider):
+    _, gate = provider
+    gate.clear()
+    queue = JobQueue(workers=1, lease=0.03)
+    queue._collection = FakeCollection()
+    await queue.start()
+    try:
+        job, _ = await queue.submit("BMI：27", "deepseek")
+        await asyncio.sleep(0.01)
+        claimed_until = queue._collection.docs[job["_id"]]["lease_until"]
+        await asyncio.sleep(0.05)
+        assert queue._collection.docs[job["_id"]]["lease_until"] > claimed_until
+    finally:
+        gate.set()
+        await queue.stop()
+
+@pytest.mark.asyncio
+async def test_running_jobs_without_a_lease_are_claimed(provider):
+    calls, _ = provider
+    collection = FakeCollection()
+    # Written by a process that predates leases
+    collection.docs["legacy"] = running_job("legacy", None, None)
+
+    queue = JobQueue(workers=1)
+    queue._collection = collection
+    await queue.start()
+    try:
+        await wait_for_status(collection, "legacy", "succeeded")
+    finally:
+        await queue.stop()
+
+    assert calls == ["legacy"]
+    assert collection.docs["legacy"]["owner"] == queue.owner
+
+@pytest.mark.asyncio
+async def test_lapsed_worker_does_not_overwrite_the_new_owner(provider):
+    calls, gate = provider
+    gate.clear()
+    collection = FakeCollection()
+    slow = JobQueue(workers=1)
+    slow._collection = collection
+    await slow.start()
+    try:
+        job, _ = await slow.submit("血压：150/95", "deepseek")
+        await wait_for_status(collection, job["_id"], "running")
+        # The lease lapses and another process takes the job over and finishes it
+        collection.docs[job["_id"]].update(owner="other", status="succeeded", result={"by": "other"})
+        gate.set()
+        for _ in range(100):
+            if job["status"] == "succeeded":
+                break
+            await asyncio.sleep(0.01)
+    finally:
+        await slow.stop()
+
+    assert job["status"] == "succeeded"
+    assert collection.docs[job["_id"]]["owner"] == "other"
+    assert collection.docs[job["_id"]]["result"] == {"by": "other"}
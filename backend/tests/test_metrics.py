@@ -0,0 +1,60 @@
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from app.routers import analysis
+from app.utils.metrics import compute_metrics, findings, indicator_counts
+from app.utils.vitals import Vitals
+
+RECORD = "血压：145/90\n血糖：7.2\n胆固醇：5.8\nBMI：26.5\n睡眠：睡眠质量差\n压力：工作压力大，经常加班"
+
+def test_rules_apply_most_severe_band_per_vital():
+    matched = findings(Vitals(systolic_bp=150, diastolic_bp=95, bmi=31, glucose=6.5, hdl_cholesterol=1.4))
+    assert matched == [
+        ("systolic_bp", 2, "血压偏高"),
+        ("diastolic_bp", 1, "舒张压偏高"),
+        ("glucose", 1, "空腹血糖受损"),
+        ("bmi", 2, "肥胖"),
+    ]
+
+def test_indicator_counts_count_distinct_keywords_including_overlaps():
+    # "工作压力" contains "压力", and each counts once however often it occurs
+    assert indicator_counts("工作压力大，压力持续，经常失眠，吸烟") == (1, 1, 2)
+
+def test_metrics_reuse_extracted_vitals():
+    from app.utils.vitals import extract_vitals
+    assert compute_metrics(RECORD, extract_vitals(RECORD)) == compute_metrics(RECORD)
+
+def test_metrics_of_a_record():
+    assert compute_metrics(RECORD) == {
+        "healthScore": 30,
+        "stressLevel": "high",
+        "sleepQuality": "fair",
+        "riskLevel": "high",
+        "confidenceScore": 0.95,
+        "healthIndex": 30
+    }
+
+def test_metrics_without_findings():
+    metrics = compute_metrics("体检结果：BMI：22，心率：70次/分，睡眠良好")
+    assert metrics["healthScore"] == 100
+    assert (metrics["riskLevel"], metrics["stressLevel"], metrics["sleepQuality"]) == ("low", "low", "good")
+    assert metrics["confidenceScore"] == 0.74
+
+@pytest.mark.parametrize("text", ["", "无指标"])
+def test_metrics_of_empty_record(text):
+    assert compute_metrics(text)["confidenceScore"] == 0.6
+
+def test_metrics_endpoint_needs_no_model():
+    app = FastAPI()
+    app.include_router(analysis.router)
+    response = TestClient(app).post("/api/analysis/metrics", data={"sequence": RECORD})
+    assert response.status_code == 200
+    body = response.json()
+    assert body["metrics"] == compute_metrics(RECORD)
+    assert body["vitals"]["systolic_bp"] == 145
+
+def test_format_analysis_result_uses_local_metrics():
+    payload = analysis.format_analysis_result(
+        {"analysis": {"summary": "ok", "metrics": {"healthScore": 75}}}, "claude", RECORD
+    )
+    assert payload["analysis"]["metrics"] == compute_metrics(RECORD)
@@ -0,0 +1,54 @@
+import numpy as np
+from app.utils.metrics import compute_metrics
+from app.utils.metrics_batch import VITAL_COLUMNS, compute_metrics_batch, vitals_matrix
+from app.utils.vitals import Vitals
+
+RECORDS = [
+    "血压：145/90\n血糖：7.2\n胆固醇：5.8\nBMI：26.5\n睡眠：睡眠质量差\n压力：工作压力大，经常加班",
+    "体检结果：BMI：22，心率：70次/分，睡眠良好",
+    "血压：150/95\n血糖：6.5 mmol/L\nHDL：0.9\n甘油三酯：2.5\n血红蛋白：105 g/L\n心率：45",
+    "身高：170cm 体重：95kg，吸烟，经常失眠，焦虑",
+    "空腹血糖 126 mg/dL, LDL 170 mg/dL, heart rate 110 bpm",
+    "没有任何数值的记录",
+    "",
+]
+
+def test_batch_matches_scalar_engine():
+    assert compute_metrics_batch(RECORDS) == [compute_metrics(record) for record in RECORDS]
+
+def test_batch_matches_scalar_engine_on_generated_records():
+    rng = np.random.default_rng(0)
+    records = [
+        f"血压：{rng.integers(90, 180)}/{rng.integers(55, 110)}\n"
+        f"血糖：{rng.uniform(4, 9):.1f}\n胆固醇：{rng.uniform(3.5, 7):.1f}\nBMI：{rng.uniform(18, 35):.1f}\n"
+        + "，".join(rng.choice(["失眠", "压力", "加班", "吸烟", "焦虑", "深夜", "睡眠良好"], size=rng.integers(0, 4)))
+        for _ in range(300)
+    ]
+    assert compute_metrics_batch(records) == [compute_metrics(record) for record in records]
+
+def test_missing_vitals_are_nan():
+    matrix = vitals_matrix([Vitals(glucose=7.8), Vitals()])
+    assert matrix.shape == (2, len(VITAL_COLUMNS))
+    assert matrix[0, VITAL_COLUMNS.index("glucose")] == 7.8
+    assert np.isnan(matrix).sum() == 2 * len(VITAL_COLUMNS) - 1
+
+def test_empty_batch():
+    assert compute_metrics_batch([]) == []
+
+def test_metrics_batch_endpoint(monkeypatch):
+    from fastapi import FastAPI
+    from fastapi.testclient import TestClient
+    from app import config
+    from app.routers import analysis
+
+    app = FastAPI()
+    app.include_router(analysis.router)
+    client = TestClient(app)
+
+    response = client.post("/api/analysis/metrics/batch", json={"sequences": RECORDS})
+    assert response.status_code == 200
+    assert response.json()["results"] == [compute_metrics(record) for record in RECORDS]
+
+    assert client.post("/api/analysis/metrics/batch", json={"sequences": []}).status_code == 400
+    monkeypatch.setattr(config, "METRICS_BATCH_MAX_RECORDS", 2)
+    assert client.post("/api/analysis/metrics/batch", json={"sequences": RECORDS}).status_code == 413
@@ -0,0 +1,66 @@
+import asyncio
+import pytest
+from fastapi import HTTPException
+from app.services.ollama_governor import ConcurrencyGovernor
+
+@pytest.mark.asyncio
+async def test_requests_queue_behind_the_limit():
+    governor = ConcurrencyGovernor(limit=1, max_queue=4, initial_service_time=0.01)
+    order = []
+
+    async def run(name):
+        async with governor.slot(deadline=1):
+            order.append(name)
+            await asyncio.sleep(0.01)
+
+    await asyncio.gather(run("a"), run("b"), run("c"))
+    assert order == ["a", "b", "c"]
+    assert governor.active == 0 and governor.waiting == 0
+
+@pytest.mark.asyncio
+async def test_rejects_when_estimated_wait_exceeds_deadline():
+    governor = ConcurrencyGovernor(limit=1, max_queue=4, initial_service_time=5)
+    async with governor.slot(deadline=10):
+        assert governor.estimated_wait() == 5
+        with pytest.raises(HTTPException) as exc_info:
+            async with governor.slot(deadline=2):
+                pass
+        assert exc_info.value.status_code == 503
+
+@pytest.mark.asyncio
+async def test_rejects_when_queue_is_full():
+    governor = ConcurrencyGovernor(limit=1, max_queue=0, initial_service_time=0)
+    async with governor.slot(deadline=10):
+        with pytest.raises(HTTPException) as exc_info:
+            async with governor.slot(deadline=10):
+                pass
+        assert "full" in exc_info.value.detail
+
+@pytest.mark.asyncio
+async def test_model_rediscovery_retry_runs_inside_the_slot(monkeypatch):
+    from unittest.mock import MagicMock
+    from app.services import ollama_service
+    from app.services.ollama_registry import OllamaModelRegistry
+
+    governor = ConcurrencyGovernor(limit=1, max_queue=4, initial_service_time=0)
+    posts = []
+
+    class FakeClient:
+        async def get(self, path):
+            response = MagicMock(status_code=200)
+            response.json.return_value = {"models": [{"name": "deepseek-r1:1.5b"}]}
+            return response
+
+        async def post(self, path, json):
+            posts.append((json["model"], governor.active))
+            response = MagicMock(status_code=404 if len(posts) == 1 else 200, content=b"{}")
+            response.json.return_value = {"response": "总结：\n血压偏高"}
+            return response
+
+    monkeypatch.setattr(ollama_service, "get_http_client", lambda name: FakeClient())
+    monkeypatch.setattr(ollama_service, "model_registry", OllamaModelRegistry(ttl=60))
+    monkeypatch.setattr(ollama_service, "get_governor", lambda model_name: governor)
+
+    result = await ollama_service.analyze_with_ollama("血压：150/95")
+    assert result["success"]
+    assert [active for _, active in posts] == [1, 1]
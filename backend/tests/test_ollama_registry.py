@@ -0,0 +1,48 @@
+import asyncio
+import pytest
+from unittest.mock import MagicMock
+from app.services.ollama_registry import OllamaModelRegistry
+
+class FakeOllamaClient:
+    def __init__(self, models):
+        self.models = models
+        self.tag_calls = 0
+
+    async def get(self, path):
+        assert path == "/api/tags"
+        self.tag_calls += 1
+        response = MagicMock(status_code=200)
+        response.json.return_value = {"models": [{"name": name} for name in self.models]}
+        return response
+
+@pytest.mark.asyncio
+async def test_model_lookup_is_cached():
+    client = FakeOllamaClient(["llama3:8b", "deepseek-r1:1.5b"])
+    registry = OllamaModelRegistry(ttl=60)
+
+    assert await registry.get_model(client) == "deepseek-r1:1.5b"
+    assert await registry.get_model(client) == "deepseek-r1:1.5b"
+    assert client.tag_calls == 1
+
+@pytest.mark.asyncio
+async def test_stale_entry_refreshes_in_background():
+    client = FakeOllamaClient(["deepseek-r1:1.5b"])
+    registry = OllamaModelRegistry(ttl=0)
+
+    await registry.get_model(client)
+    client.models = ["deepseek-r1:7b"]
+    # Stale value is served immediately while the refresh runs in the background
+    assert await registry.get_model(client) == "deepseek-r1:1.5b"
+    await asyncio.sleep(0)
+    assert registry.model_name == "deepseek-r1:7b"
+    assert client.tag_calls == 2
+
+@pytest.mark.asyncio
+async def test_invalidate_forces_rediscovery():
+    client = FakeOllamaClient(["deepseek-r1:1.5b"])
+    registry = OllamaModelRegistry(ttl=60)
+
+    await registry.get_model(client)
+    registry.invalidate()
+    await registry.get_model(client)
+    assert client.tag_calls == 2
@@ -0,0 +1,49 @@
+import asyncio
+import pytest
+from unittest.mock import MagicMock
+from app import config
+from app.utils import http_client
+from app.services import ollama_warmup
+
+class FakeOllamaClient:
+    is_closed = False
+
+    def __init__(self, loaded=()):
+        self.loaded = list(loaded)
+        self.generate_calls = []
+
+    async def post(self, path, json=None, timeout=None):
+        assert path == "/api/generate"
+        self.generate_calls.append(json)
+        self.loaded.append(json["model"])
+        return MagicMock(status_code=200)
+
+    async def get(self, path):
+        assert path == "/api/ps"
+        response = MagicMock(status_code=200)
+        response.json.return_value = {"models": [{"name": name} for name in self.loaded]}
+        return response
+
+@pytest.mark.asyncio
+async def test_preload_loads_configured_model():
+    client = FakeOllamaClient()
+    http_client._clients["ollama"] = client
+
+    assert await ollama_warmup.is_model_loaded() is False
+    assert await ollama_warmup.preload_model() is True
+    assert client.generate_calls == [{"model": config.OLLAMA_MODEL, "prompt": "", "keep_alive": config.OLLAMA_KEEP_ALIVE}]
+    assert await ollama_warmup.is_model_loaded() is True
+
+@pytest.mark.asyncio
+async def test_keepalive_task_pings_periodically(monkeypatch):
+    client = FakeOllamaClient()
+    http_client._clients["ollama"] = client
+    monkeypatch.setattr(config, "OLLAMA_WARMUP_ENABLED", True)
+    monkeypatch.setattr(config, "OLLAMA_KEEPALIVE_PING_SECONDS", 0.01)
+
+    ollama_warmup.start_ollama_keepalive()
+    await asyncio.sleep(0.05)
+    await ollama_warmup.stop_ollama_keepalive()
+
+    assert len(client.generate_calls) >= 2
+    assert ollama_warmup._keepalive_task is None
@@ -0,0 +1,65 @@
+import pytest
+from fastapi import FastAPI
+from httpx import AsyncClient
+from app.routers import analysis
+from app.utils.cache import cache_policy
+
+@pytest.fixture
+def router_client():
+    app = FastAPI()
+    app.include_router(analysis.router)
+    return AsyncClient(app=app, base_url="http://test")
+
+@pytest.fixture
+def counted_provider(monkeypatch):
+    calls = []
+
+    async def fake_process_sequence(sequence, provider=None, analysis_type="health", deadline=None, vitals=None):
+        calls.append(sequence)
+        return {"success": True, "analysis": {"summary": "ok", "recommendations": [], "risk_factors": []}, "provider": provider}
+
+    monkeypatch.setattr(analysis, "process_sequence", fake_process_sequence)
+    return calls
+
+def test_cache_policy():
+    assert cache_policy(None) == (True, True)
+    assert cache_policy("no-cache") == (False, True)
+    assert cache_policy("max-age=0, private") == (False, True)
+    assert cache_policy("no-store") == (False, False)
+
+@pytest.mark.asyncio
+async def test_repeated_analysis_is_served_from_cache(router_client, counted_provider):
+    form = {"sequence": "血压：150/95", "provider": "deepseek"}
+    async with router_client as client:
+        first = await client.post("/api/analysis/analyze", data=form)
+        second = await client.post("/api/analysis/analyze", data={**form, "sequence": " 血压:150/95 "})
+        other_type = await client.post("/api/analysis/analyze", data={**form, "analysis_type": "gene"})
+
+    assert first.headers["X-Cache"] == "MISS"
+    assert second.headers["X-Cache"] == "HIT"
+    assert second.json() == first.json()
+    assert other_type.headers["X-Cache"] == "MISS"
+    assert len(counted_provider) == 2
+
+@pytest.mark.asyncio
+async def test_cache_control_bypass(router_client, counted_provider):
+    form = {"sequence": "血糖：8.1", "provider": "deepseek"}
+    async with router_client as client:
+        await client.post("/api/analysis/analyze", data=form, headers={"Cache-Control": "no-store"})
+        refreshed = await client.post("/api/analysis/analyze", data=form, headers={"Cache-Control": "no-cache"})
+        cached = await client.post("/api/analysis/analyze", data=form)
+
+    assert refreshed.headers["X-Cache"] == "BYPASS"
+    assert cached.headers["X-Cache"] == "HIT"
+    assert len(counted_provider) == 2
+
+@pytest.mark.asyncio
+async def test_deadline_header_is_checked_before_cache_lookup(router_client, counted_provider):
+    form = {"sequence": "心率：110", "provider": "deepseek"}
+    async with router_client as client:
+        await client.post("/api/analysis/analyze", data=form)
+        rejected = await client.post("/api/analysis/analyze", data=form, headers={"X-Request-Timeout": "-1"})
+
+    assert rejected.status_code == 400
+    assert "X-Cache" not in rejected.headers
+    assert len(counted_provider) == 1
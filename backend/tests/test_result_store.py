@@ -0,0 +1,50 @@
+import asyncio
+from datetime import datetime, timedelta
+import pytest
+from app.utils import result_store as store_module
+from app.utils.cache import analysis_cache
+from app.utils.result_store import MongoResultStore, get_cached_result, store_result
+
+class FakeCollection:
+    def __init__(self):
+        self.docs = {}
+        self.indexes = []
+
+    async def find_one(self, query):
+        return self.docs.get(query["_id"])
+
+    async def replace_one(self, query, doc, upsert=False):
+        await asyncio.sleep(0)
+        self.docs[query["_id"]] = doc
+
+    async def create_index(self, field, **kwargs):
+        self.indexes.append((field, kwargs))
+
+@pytest.fixture
+def persistent_store(monkeypatch):
+    store = MongoResultStore(ttl=60)
+    store._collection = FakeCollection()
+    monkeypatch.setattr(store_module, "result_store", store)
+    monkeypatch.setattr("app.config.PERSISTENT_CACHE_ENABLED", True)
+    return store
+
+@pytest.mark.asyncio
+async def test_write_is_async_and_lookup_falls_through_to_persistent_tier(persistent_store):
+    store_result("k", {"analysis": {"summary": "ok"}})
+    assert persistent_store._collection.docs == {}  # not written yet
+    await persistent_store.drain()
+    assert persistent_store._collection.indexes == [("expires_at", {"expireAfterSeconds": 0})]
+
+    analysis_cache.clear()  # simulate a restart
+    assert await get_cached_result("k") == ({"analysis": {"summary": "ok"}}, "persistent")
+    assert await get_cached_result("k") == ({"analysis": {"summary": "ok"}}, "memory")
+
+@pytest.mark.asyncio
+async def test_expired_and_unreachable_entries_are_misses(persistent_store):
+    persistent_store._collection.docs["old"] = {"_id": "old", "value": 1, "expires_at": datetime.utcnow() - timedelta(seconds=1)}
+    assert await persistent_store.get("old") is None
+
+    async def unreachable(query):
+        raise ConnectionError("mongo down")
+    persistent_store._collection.find_one = unreachable
+    assert await persistent_store.get("old") is None
@@ -0,0 +1,83 @@
+import time
+import httpx
+import pytest
+from fastapi import HTTPException
+from app.services import deepseek_service
+from app.utils.retry import RetryBudget, RetryPolicy, parse_retry_after
+
+def responses(*statuses, headers=None):
+    calls = []
+
+    async def send():
+        calls.append(len(calls))
+        status = statuses[min(len(calls), len(statuses)) - 1]
+        return httpx.Response(status, headers=headers or {})
+    return send, calls
+
+@pytest.mark.asyncio
+async def test_retries_until_success():
+    send, calls = responses(503, 429, 200)
+    policy = RetryPolicy(max_attempts=3, base_delay=0.001)
+    response = await policy.call(send)
+    assert response.status_code == 200
+    assert len(calls) == 3
+
+@pytest.mark.asyncio
+async def test_client_errors_are_not_retried():
+    send, calls = responses(400)
+    response = await RetryPolicy(base_delay=0.001).call(send)
+    assert response.status_code == 400
+    assert len(calls) == 1
+
+@pytest.mark.asyncio
+async def test_retry_after_beyond_deadline_returns_last_response():
+    send, calls = responses(429, headers={"Retry-After": "5"})
+    policy = RetryPolicy(max_attempts=5)
+    response = await policy.call(send, deadline=time.monotonic() + 1)
+    assert response.status_code == 429
+    assert len(calls) == 1
+
+@pytest.mark.asyncio
+async def test_budget_limits_retries():
+    budget = RetryBudget(ratio=0, min_per_second=0, max_tokens=1)
+    policy = RetryPolicy(max_attempts=5, base_delay=0.001, budget=budget)
+    send, calls = responses(503)
+    await policy.call(send)
+    assert len(calls) == 2  # one retry, then the budget is empty
+    send, calls = responses(503)
+    await policy.call(send)
+    assert len(calls) == 1
+
+@pytest.mark.asyncio
+async def test_connection_errors_are_retried():
+    attempts = []
+
+    async def send():
+        attempts.append(1)
+        if len(attempts) == 1:
+            raise httpx.ConnectError("refused")
+        return httpx.Response(200)
+
+    response = await RetryPolicy(base_delay=0.001).call(send)
+    assert response.status_code == 200
+
+def test_parse_retry_after():
+    assert parse_retry_after(httpx.Response(429, headers={"Retry-After": "2"})) == 2
+    assert parse_retry_after(httpx.Response(429)) is None
+    assert parse_retry_after(httpx.Response(429, headers={"Retry-After": "Wed, 21 Oct 2015 07:28:00 GMT"})) == 0
+
+@pytest.mark.asyncio
+async def test_exhausted_rate_limit_surfaces_as_429(monkeypatch):
+    send, calls = responses(429)
+
+    class FakeClient:
+        async def post(self, url, **kwargs):
+            return await send()
+
+    monkeypatch.setattr(deepseek_service, "DEEPSEEK_API_KEY", "test-key")
+    monkeypatch.setattr(deepseek_service, "get_http_client", lambda provider: FakeClient())
+    monkeypatch.setattr(deepseek_service, "get_retry_policy", lambda provider: RetryPolicy(base_delay=0.001))
+    with pytest.raises(HTTPException) as error:
+        await deepseek_service.analyze_with_deepseek("血压：150/95")
+    assert error.value.status_code == 429
+    assert len(calls) == 3
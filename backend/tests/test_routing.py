@@ -0,0 +1,41 @@
+import pytest
+from app.routers import analysis
+from app.routers.analysis import process_sequence
+from app.utils.routing import AdaptiveRouter
+
+def test_local_first_until_clearly_slower():
+    router = AdaptiveRouter(alpha=0.5, local_weight=0.5, default_latency=5)
+    router.record("ollama", "health", 6, ok=True)
+    router.record("deepseek", "health", 4, ok=True)
+    assert router.order(["deepseek", "ollama"], "health") == ["ollama", "deepseek"]
+
+    for _ in range(5):
+        router.record("ollama", "health", 20, ok=True)
+    assert router.order(["ollama", "deepseek"], "health") == ["deepseek", "ollama"]
+    # Stats are kept per analysis_type
+    assert router.order(["deepseek", "ollama"], "genetic") == ["ollama", "deepseek"]
+
+def test_errors_push_provider_back():
+    router = AdaptiveRouter(alpha=0.5, local_weight=1, error_penalty_seconds=30, default_latency=5)
+    router.record("deepseek", "health", 1, ok=False)
+    assert router.order(["deepseek", "claude"], "health") == ["claude", "deepseek"]
+
+@pytest.mark.asyncio
+async def test_adaptive_mode_reorders_chain(monkeypatch):
+    calls = []
+
+    def provider(name):
+        async def analyze(sequence, *args):
+            calls.append(name)
+            return {"success": True, "analysis": {"summary": name}, "provider": name}
+        return analyze
+
+    monkeypatch.setattr("app.config.ROUTING_MODE", "adaptive")
+    monkeypatch.setattr("app.config.MODEL_FALLBACK_PRIORITY", ["deepseek", "claude"])
+    monkeypatch.setattr(analysis, "analyze_with_deepseek", provider("deepseek"))
+    monkeypatch.setattr(analysis, "analyze_with_claude", provider("claude"))
+    analysis.adaptive_router.record("deepseek", "health", 30, ok=True)
+
+    result = await process_sequence("血压：120/80")
+    assert result["provider"] == "claude"
+    assert calls == ["claude"]
@@ -0,0 +1,44 @@
+import asyncio
+import pytest
+from app.utils.keys import analysis_key
+from app.utils.singleflight import SingleFlight
+
+def test_key_ignores_whitespace_and_width():
+    assert analysis_key("血压：120/80\n 血糖：5.6 ", "ollama") == analysis_key("血压:120/80 血糖:5.6", "ollama")
+    assert analysis_key("血压：120/80", "ollama") != analysis_key("血压：120/80", "deepseek")
+    assert analysis_key("血压：120/80", "ollama", "health") != analysis_key("血压：120/80", "ollama", "gene")
+
+@pytest.mark.asyncio
+async def test_concurrent_duplicates_share_one_call():
+    flights = SingleFlight()
+    calls = []
+
+    async def analyze():
+        calls.append(1)
+        await asyncio.sleep(0.01)
+        return {"analysis": {"summary": "ok"}}
+
+    results = await asyncio.gather(*(flights.do("key", analyze) for _ in range(5)))
+    assert len(calls) == 1
+    assert all(r == {"analysis": {"summary": "ok"}} for r in results)
+    assert flights.in_flight() == 0
+
+    await flights.do("key", analyze)
+    assert len(calls) == 2  # finished calls are not cached
+
+@pytest.mark.asyncio
+async def test_errors_are_shared_and_cancelled_callers_do_not_cancel_others():
+    flights = SingleFlight()
+
+    async def failing():
+        await asyncio.sleep(0.02)
+        raise RuntimeError("provider down")
+
+    leader = asyncio.create_task(flights.do("key", failing))
+    await asyncio.sleep(0)
+    follower = asyncio.create_task(flights.do("key", failing))
+    await asyncio.sleep(0)
+    leader.cancel()
+
+    with pytest.raises(RuntimeError):
+        await follower
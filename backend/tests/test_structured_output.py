@@ -0,0 +1,74 @@
+import json
+import httpx
+import pytest
+from app import config
+from app.services import deepseek_service
+from app.services.ollama_service import parse_ollama_response
+from app.utils.metrics import compute_metrics
+from app.utils.structured_output import parse_structured
+
+ANALYSIS = {
+    "summary": "血压偏高，血糖正常。",
+    "recommendations": ["减少盐分摄入", " ", "每周运动三次", "定期监测血压"],
+    "risk_factors": ["高血压风险", "心血管疾病风险"]
+}
+
+class FakeClient:
+    def __init__(self, content):
+        self.content = content
+        self.requests = []
+
+    async def post(self, url, json=None, **kwargs):
+        self.requests.append(json)
+        return httpx.Response(200, json={"choices": [{"message": {"content": self.content}}]})
+
+def test_parse_structured_validates_and_strips():
+    parsed = parse_structured(json.dumps(ANALYSIS, ensure_ascii=False))
+    assert parsed.summary == "血压偏高，血糖正常。"
+    assert parsed.recommendations == ["减少盐分摄入", "每周运动三次", "定期监测血压"]
+    assert parse_structured("```json\n" + json.dumps(ANALYSIS) + "\n```") == parsed
+
+@pytest.mark.parametrize("content", [
+    "总结：血压偏高",
+    '{"summary": "血压偏高"',
+    '{"summary": " ", "recommendations": [], "risk_factors": []}',
+    '{"summary": "血压偏高", "recommendations": "多运动", "risk_factors": []}',
+])
+def test_parse_structured_rejects_invalid_content(content):
+    assert parse_structured(content) is None
+
+@pytest.mark.asyncio
+async def test_deepseek_json_mode(monkeypatch):
+    fake = FakeClient(json.dumps(ANALYSIS, ensure_ascii=False))
+    monkeypatch.setattr(deepseek_service, "DEEPSEEK_API_KEY", "test-key")
+    monkeypatch.setattr(deepseek_service, "get_http_client", lambda provider: fake)
+    monkeypatch.setattr(config, "STRUCTURED_OUTPUT_ENABLED", True)
+
+    result = await deepseek_service.analyze_with_deepseek("血压：150/95")
+    request = fake.requests[0]
+    assert request["response_format"] == {"type": "json_object"}
+    assert request["max_tokens"] == config.STRUCTURED_OUTPUT_MAX_TOKENS
+    assert "JSON" in request["messages"][0]["content"]
+    assert result["analysis"]["summary"] == ANALYSIS["summary"]
+    assert result["analysis"]["recommendations"] == ["减少盐分摄入", "每周运动三次", "定期监测血压"]
+    assert result["analysis"]["risk_factors"] == ANALYSIS["risk_factors"]
+
+@pytest.mark.asyncio
+async def test_deepseek_falls_back_to_section_parser(monkeypatch):
+    fake = FakeClient("总结：血压偏高\n\n建议：\n- 减少盐分摄入\n\n风险因素：\n- 高血压风险")
+    monkeypatch.setattr(deepseek_service, "DEEPSEEK_API_KEY", "test-key")
+    monkeypatch.setattr(deepseek_service, "get_http_client", lambda provider: fake)
+    monkeypatch.setattr(config, "STRUCTURED_OUTPUT_ENABLED", True)
+
+    result = await deepseek_service.analyze_with_deepseek("血压：150/95")
+    assert result["analysis"]["summary"] == "血压偏高"
+    assert result["analysis"]["recommendations"][0] == "减少盐分摄入"
+    assert result["analysis"]["risk_factors"][0] == "高血压风险"
+
+def test_ollama_parses_json_response():
+    result = parse_ollama_response(json.dumps(ANALYSIS, ensure_ascii=False), "health", "test-model", "血压：150/95")
+    analysis = result["analysis"]
+    assert analysis["summary"] == ANALYSIS["summary"]
+    assert analysis["recommendations"] == ["减少盐分摄入", "每周运动三次", "定期监测血压"]
+    assert analysis["risk_factors"] == ANALYSIS["risk_factors"]
+    assert analysis["metrics"] == compute_metrics("血压：150/95")
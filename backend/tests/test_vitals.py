@@ -0,0 +1,85 @@
+import httpx
+import pytest
+from fastapi import FastAPI
+from app.routers import analysis
+from app.routers.analysis import format_analysis_result
+from app.services import deepseek_service, ollama_service
+from app.services.ollama_service import parse_ollama_response
+from app.utils import metrics
+from app.utils.metrics import compute_metrics
+from app.utils.vitals import Vitals, extract_vitals
+
+def test_extracts_record_fields():
+    vitals = extract_vitals("血压：145/90\n血糖：7.2\n胆固醇：5.8\nBMI：26.5\n心率：88次/分\n血红蛋白：135g/L")
+    assert vitals == Vitals(
+        systolic_bp=145, diastolic_bp=90, glucose=7.2, total_cholesterol=5.8,
+        bmi=26.5, heart_rate=88, hemoglobin=135
+    )
+
+def test_normalises_units():
+    vitals = extract_vitals(
+        "BP 16/10 kPa, fasting glucose 126 mg/dL, LDL cholesterol 130 mg/dL, HDL-C 1.2, "
+        "total cholesterol: 220, TG 150, Hb 13.5 g/dL, heart rate 72 bpm"
+    )
+    assert (vitals.systolic_bp, vitals.diastolic_bp) == (120.01, 75.01)
+    assert vitals.glucose == 6.99
+    assert vitals.ldl_cholesterol == 3.36
+    assert vitals.hdl_cholesterol == 1.2
+    assert vitals.total_cholesterol == 5.69
+    assert vitals.triglycerides == 1.69
+    assert vitals.hemoglobin == 135
+    assert vitals.heart_rate == 72
+
+def test_bmi_from_height_and_weight():
+    assert extract_vitals("身高：175cm，体重：80kg").bmi == 26.12
+    assert extract_vitals("身高1.70米 体重140斤").bmi == 24.22
+    assert extract_vitals("BMI：22，身高175cm，体重80kg").bmi == 22
+
+@pytest.mark.parametrize("text", ["血压偏高", "HbA1c 6.1%", "血压：15/9", "心率：快"])
+def test_ignores_non_values(text):
+    assert extract_vitals(text).as_dict() == {}
+
+def test_first_plausible_value_wins():
+    vitals = extract_vitals("低密度脂蛋白胆固醇：3.4，总胆固醇：6.1，复查胆固醇：5.0")
+    assert vitals.ldl_cholesterol == 3.4
+    assert vitals.total_cholesterol == 6.1
+
+def test_ollama_scoring_uses_vitals():
+    # Half-width colons and mg/dL used to be missed by the scoring regexes
+    result = parse_ollama_response("总结：需要控制血糖", "health", "test-model", "血压: 150/95 mmHg\n空腹血糖: 140 mg/dL")
+    assert result["analysis"]["metrics"]["riskLevel"] == "high"
+
+def test_format_analysis_result_adds_vitals():
+    payload = format_analysis_result({"analysis": {"summary": "ok"}}, "deepseek", "血压：120/80")
+    assert payload["analysis"]["vitals"] == {"systolic_bp": 120, "diastolic_bp": 80}
+
+@pytest.mark.asyncio
+async def test_analyze_extracts_vitals_once_per_request(monkeypatch):
+    calls = []
+    expected = compute_metrics("血压：150/95")
+
+    def counted_extract_vitals(text):
+        calls.append(text)
+        return extract_vitals(text)
+
+    class FakeClient:
+        async def post(self, url, **kwargs):
+            content = "总结：血压偏高\n\n建议：\n- 减少盐分摄入\n\n风险因素：\n- 高血压风险"
+            return httpx.Response(200, json={"choices": [{"message": {"content": content}}]})
+
+    for module in (analysis, ollama_service, metrics):
+        monkeypatch.setattr(module, "extract_vitals", counted_extract_vitals)
+    monkeypatch.setattr(deepseek_service, "DEEPSEEK_API_KEY", "test-key")
+    monkeypatch.setattr(deepseek_service, "get_http_client", lambda provider: FakeClient())
+    app = FastAPI()
+    app.include_router(analysis.router)
+    async with httpx.AsyncClient(app=app, base_url="http://test") as client:
+        response = await client.post(
+            "/api/analysis/analyze",
+            data={"sequence": "血压：150/95", "provider": "deepseek"},
+            headers={"Cache-Control": "no-store"}
+        )
+
+    assert response.status_code == 200
+    assert response.json()["analysis"]["metrics"] == expected
+    assert calls == ["血压：150/95"]
@@ -30,5 +30,55 @@ OLLAMA_MODEL = os.getenv('OLLAMA_MODEL', 'deepseek-coder:1.5b')
 OLLAMA_API_BASE = os.getenv('OLLAMA_API_BASE', 'http://localhost:11434')
 OLLAMA_TIMEOUT_SECONDS = int(os.getenv('OLLAMA_TIMEOUT_SECONDS', '10'))
 
+# Analysis Result Cache Configuration
+ANALYSIS_CACHE_ENABLED = os.getenv('ANALYSIS_CACHE_ENABLED', 'true').lower() == 'true'
+ANALYSIS_CACHE_TTL_SECONDS = int(os.getenv('ANALYSIS_CACHE_TTL_SECONDS', '3600'))
+ANALYSIS_CACHE_MAX_SIZE = int(os.getenv('ANALYSIS_CACHE_MAX_SIZE', '1000'))
+ANALYSIS_CACHE_MAX_BYTES = int(os.getenv('ANALYSIS_CACHE_MAX_BYTES', str(64 * 1024 * 1024)))
+
+# Near-duplicate matching for the result cache; 0 disables it, e.g. 0.9 serves
+# inputs whose free text is ~90% similar and whose lab values differ by <= 2%
+NEAR_DUPLICATE_THRESHOLD = float(os.getenv('NEAR_DUPLICATE_THRESHOLD', '0'))
+
+# Long-input chunking: inputs above CHUNK_MAX_TOKENS (estimated) are analysed
+# chunk by chunk, CHUNK_CONCURRENCY at a time, and the results merged
+CHUNK_MAX_TOKENS = int(os.getenv('CHUNK_MAX_TOKENS', '1500'))
+CHUNK_CONCURRENCY = int(os.getenv('CHUNK_CONCURRENCY', '4'))
+CHUNK_MAX_COUNT = int(os.getenv('CHUNK_MAX_COUNT', '50'))
+
+# Structured output: ask DeepSeek (response_format) and Ollama (format) for a JSON
+# analysis object instead of markdown sections, with a smaller completion budget;
+# completions that do not validate fall back to the heuristic section parser.
+# Streaming requests keep the section format, which can be parsed as it arrives
+STRUCTURED_OUTPUT_ENABLED = os.getenv('STRUCTURED_OUTPUT_ENABLED', 'false').lower() == 'true'
+STRUCTURED_OUTPUT_MAX_TOKENS = int(os.getenv('STRUCTURED_OUTPUT_MAX_TOKENS', '800'))
+
+# Batch Analysis Configuration
+# Records of one batch (and of concurrent batches) run at most this many at a time per provider;
+# BATCH_PROVIDER_CONCURRENCY overrides the default per provider, e.g. "deepseek=8,claude=2"
+BATCH_CONCURRENCY = int(os.getenv('BATCH_CONCURRENCY', '4'))
+BATCH_PROVIDER_CONCURRENCY = {
+    name.strip(): int(limit)
+    for name, _, limit in (item.partition('=') for item in os.getenv('BATCH_PROVIDER_CONCURRENCY', '').split(','))
+    if name.strip() and limit.strip()
+}
+BATCH_MAX_RECORDS = int(os.getenv('BATCH_MAX_RECORDS', '1000'))
+# Records of one batch in flight at once (running or waiting for a provider slot)
+BATCH_WORKERS = int(os.getenv('BATCH_WORKERS', '16'))
+
 # Model Priority Configuration
 MODEL_FALLBACK_PRIORITY = os.getenv('MODEL_FALLBACK_PRIORITY', 'ollama,deepseek,claude').split(',')
+
+# Retry Configuration
+RETRY_MAX_ATTEMPTS = int(os.getenv('RETRY_MAX_ATTEMPTS', '3'))
+RETRY_BASE_DELAY_SECONDS = float(os.getenv('RETRY_BASE_DELAY_SECONDS', '0.5'))
+RETRY_MAX_DELAY_SECONDS = float(os.getenv('RETRY_MAX_DELAY_SECONDS', '8'))
+RETRY_MAX_ELAPSED_SECONDS = float(os.getenv('RETRY_MAX_ELAPSED_SECONDS', '30'))
+RETRY_BUDGET_RATIO = float(os.getenv('RETRY_BUDGET_RATIO', '0.2'))
+RETRY_BUDGET_MIN_PER_SECOND = float(os.getenv('RETRY_BUDGET_MIN_PER_SECOND', '1'))
+
+# HTTP Client Pool Configuration
+HTTP_MAX_CONNECTIONS = int(os.getenv('HTTP_MAX_CONNECTIONS', '100'))
+HTTP_MAX_KEEPALIVE_CONNECTIONS = int(os.getenv('HTTP_MAX_KEEPALIVE_CONNECTIONS', '20'))
+HTTP_KEEPALIVE_EXPIRY = float(os.getenv('HTTP_KEEPALIVE_EXPIRY', '30'))
+HTTP2_ENABLED = os.getenv('HTTP2_ENABLED', 'false').lower() == 'true'
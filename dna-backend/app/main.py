@@ -1,14 +1,26 @@
-from fastapi import FastAPI, HTTPException, Body, Request
+from contextlib import asynccontextmanager
+from fastapi import FastAPI, HTTPException, Body, Request, Response
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import JSONResponse
+from fastapi.responses import JSONResponse, StreamingResponse
 from pydantic import BaseModel
-from typing import Optional
+from typing import Any, Optional, Tuple
 from dotenv import load_dotenv
+import asyncio
 import logging
 import json
 from datetime import datetime
 import uuid
-from app.services.deepseek_service import analyze_sequence
+import copy
+from app.services.deepseek_service import analyze_sequence, stream_sequence
+from app.services.http_client import open_http_clients, close_http_clients
+from app.services.keys import analysis_key
+from app.services.singleflight import analysis_flights
+from app.services.cache import analysis_cache, cache_policy
+from app.services.fingerprint import fingerprint_async, near_duplicate_index
+from app.services.batch import parse_batch_records, run_batch
+from app.services.metrics import compute_metrics
+from app.services.metrics_batch import compute_metrics_batch
+from app.services.vitals import extract_vitals
 
 class AnalysisRequest(BaseModel):
     sequence: str
@@ -34,7 +46,13 @@ logger = logging.getLogger(__name__)
 
 load_dotenv()
 
-app = FastAPI()
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    await open_http_clients()
+    yield
+    await close_http_clients()
+
+app = FastAPI(lifespan=lifespan)
 
 @app.exception_handler(HTTPException)
 async def http_exception_handler(request: Request, exc: HTTPException):
@@ -224,68 +242,222 @@ async def get_consultation_history(user_id: str):
         logger.error(f"[ERROR] History retrieval error: {str(e)}")
         raise HTTPException(status_code=400, detail=str(e))
 
+async def read_analysis_request(request: Request) -> dict:
+    """Parse and validate the JSON body shared by the analysis endpoints."""
+    raw_body = await request.body()
+    raw_text = raw_body.decode('utf-8')
+    logger.info(f"[REQUEST] Raw body length: {len(raw_text)}")
+    logger.info(f"[REQUEST] Content: {raw_text[:500]}...")
+
+    try:
+        body = json.loads(raw_text)
+        logger.info("[PARSE] Successfully parsed JSON request")
+    except json.JSONDecodeError as e:
+        logger.error(f"[PARSE] JSON parse error: {str(e)}")
+        raise HTTPException(status_code=400, detail="Invalid JSON format")
+
+    return validate_analysis_params(body)
+
+def validate_analysis_params(body: Any) -> dict:
+    """Validate one analysis request body and fill in the defaults."""
+    if not isinstance(body, dict):
+        logger.error(f"[VALIDATE] Invalid body type: {type(body)}")
+        raise HTTPException(status_code=400, detail=f"Expected dict, got {type(body)}")
+
+    sequence = body.get('sequence')
+    if not sequence or (isinstance(sequence, str) and not sequence.strip()):
+        logger.error("[VALIDATE] No sequence provided")
+        raise HTTPException(status_code=400, detail="No sequence provided")
+
+    if not isinstance(sequence, str):
+        logger.error(f"[VALIDATE] Invalid sequence type: {type(sequence)}")
+        raise HTTPException(status_code=400, detail=f"Invalid sequence format: expected string, got {type(sequence)}")
+
+    provider = body.get('provider', 'deepseek')
+    logger.info(f"[PROCESS] Using provider: {provider}")
+    logger.info(f"[PROCESS] Sequence length: {len(sequence)}")
+
+    analysis_type = body.get('analysis_type', 'health')
+    if analysis_type not in ['health', 'gene', 'early_screening']:
+        logger.error(f"[VALIDATE] Invalid analysis type: {analysis_type}")
+        raise HTTPException(status_code=400, detail="Invalid analysis type")
+
+    return {
+        "sequence": sequence,
+        "provider": provider,
+        "analysis_type": analysis_type,
+        "include_recommendations": body.get('include_recommendations', True),
+        "include_risk_factors": body.get('include_risk_factors', True),
+        "include_metrics": body.get('include_metrics', True)
+    }
+
+def sse_event(event: str, data: dict) -> str:
+    """Format one Server-Sent Events frame."""
+    return f"event: {event}\ndata: {json.dumps(data, ensure_ascii=False)}\n\n"
+
 @app.post("/api/analyze")
-async def analyze_data(request: Request):
-    """Main analysis endpoint supporting health consultation, gene sequencing, and early screening."""
+async def analyze_data(request: Request, response: Response):
+    """Main analysis endpoint supporting health consultation, gene sequencing, and early screening.
+
+    Results are cached by input hash, provider, analysis_type and include_* flags.
+    `Cache-Control: no-cache` forces a fresh analysis and `no-store` bypasses the
+    cache entirely; `X-Cache` reports HIT, MISS or BYPASS.
+    """
     try:
-        raw_body = await request.body()
-        raw_text = raw_body.decode('utf-8')
-        logger.info(f"[REQUEST] Raw body length: {len(raw_text)}")
-        logger.info(f"[REQUEST] Content: {raw_text[:500]}...")
-        
-        try:
-            body = json.loads(raw_text)
-            logger.info("[PARSE] Successfully parsed JSON request")
-        except json.JSONDecodeError as e:
-            logger.error(f"[PARSE] JSON parse error: {str(e)}")
-            raise HTTPException(status_code=400, detail="Invalid JSON format")
-
-        if not isinstance(body, dict):
-            logger.error(f"[VALIDATE] Invalid body type: {type(body)}")
-            raise HTTPException(status_code=400, detail=f"Expected dict, got {type(body)}")
-
-        sequence = body.get('sequence')
-        if not sequence or (isinstance(sequence, str) and not sequence.strip()):
-            logger.error("[VALIDATE] No sequence provided")
-            raise HTTPException(status_code=400, detail="No sequence provided")
-
-        if not isinstance(sequence, str):
-            logger.error(f"[VALIDATE] Invalid sequence type: {type(sequence)}")
-            raise HTTPException(status_code=400, detail=f"Invalid sequence format: expected string, got {type(sequence)}")
-
-        provider = body.get('provider', 'deepseek')
-        logger.info(f"[PROCESS] Using provider: {provider}")
-        logger.info(f"[PROCESS] Sequence length: {len(sequence)}")
-
-        analysis_type = body.get('analysis_type', 'health')
-        if analysis_type not in ['health', 'gene', 'early_screening']:
-            logger.error(f"[VALIDATE] Invalid analysis type: {analysis_type}")
-            raise HTTPException(status_code=400, detail="Invalid analysis type")
-
-        include_recommendations = body.get('include_recommendations', True)
-        include_risk_factors = body.get('include_risk_factors', True)
-        include_metrics = body.get('include_metrics', True)
-
-        result = await analyze_sequence(
-            sequence=sequence,
-            provider=provider,
-            analysis_type=analysis_type,
-            include_recommendations=include_recommendations,
-            include_risk_factors=include_risk_factors,
-            include_metrics=include_metrics
-        )
-        logger.info("[ANALYZE] Got result from analyze_sequence")
-        logger.info(f"[ANALYZE] Result type: {type(result)}")
-        
-        if result and isinstance(result, dict) and 'analysis' in result:
-            logger.info("[SUCCESS] Analysis completed successfully")
-            return result
-        else:
-            logger.error(f"[ERROR] Invalid result format: {result}")
-            raise HTTPException(status_code=500, detail="Invalid analysis result format")
+        params = await read_analysis_request(request)
+        read_cache, write_cache = cache_policy(request.headers.get("cache-control"))
+        result, cache_status, cache_tier = await cached_analysis(params, read_cache, write_cache)
+        response.headers["X-Cache"] = cache_status
+        if cache_tier:
+            response.headers["X-Cache-Tier"] = cache_tier
+        return result
 
     except HTTPException:
         raise
     except Exception as e:
         logger.error(f"[ERROR] Request processing error: {str(e)}")
         raise HTTPException(status_code=500, detail="Internal server error")
+
+async def cached_analysis(params: dict, read_cache: bool, write_cache: bool) -> Tuple[dict, str, Optional[str]]:
+    """Run one analysis through the result cache; returns (result, X-Cache value, cache tier)."""
+    key = analysis_key(**params)
+    fp = await fingerprint_async(**params) if near_duplicate_index.enabled else None
+    cached = analysis_cache.get(key) if read_cache else None
+    tier = None
+    if cached is None and read_cache and fp is not None:
+        near_key = near_duplicate_index.find(fp)
+        cached = analysis_cache.get(near_key) if near_key else None
+        if cached is not None:
+            logger.info("[CACHE] Serving near-duplicate cached analysis")
+            tier = "near-duplicate"
+    if cached is not None:
+        logger.info("[CACHE] Serving cached analysis")
+        return copy.deepcopy(cached), "HIT", tier
+
+    # Identical concurrent requests (double submits, client retries) share one provider call
+    result = await analysis_flights.do(key, lambda: analyze_sequence(**params))
+    logger.info("[ANALYZE] Got result from analyze_sequence")
+    logger.info(f"[ANALYZE] Result type: {type(result)}")
+
+    if result and isinstance(result, dict) and 'analysis' in result:
+        logger.info("[SUCCESS] Analysis completed successfully")
+        if write_cache and result.get('success', True):
+            analysis_cache.set(key, copy.deepcopy(result))
+            if fp is not None:
+                near_duplicate_index.add(fp, key)
+        return result, "MISS" if read_cache else "BYPASS", None
+    else:
+        logger.error(f"[ERROR] Invalid result format: {result}")
+        raise HTTPException(status_code=500, detail="Invalid analysis result format")
+
+@app.post("/api/analyze/batch")
+async def analyze_batch(request: Request):
+    """Analyze many records in one call.
+
+    The body is a JSON array or NDJSON (one record per line) of /api/analyze
+    request bodies, optionally with an `id`. Records run concurrently, capped
+    per provider, and each outcome is streamed back as an NDJSON line as soon
+    as it is ready, in completion order: `{"index", "id", "success", "result"}`
+    or `{"index", "id", "success": false, "status_code", "error"}`.
+    """
+    raw_body = await request.body()
+    records = parse_batch_records(raw_body.decode('utf-8'))
+    logger.info(f"[BATCH] Processing {len(records)} records")
+    read_cache, write_cache = cache_policy(request.headers.get("cache-control"))
+
+    async def analyze(params: dict) -> dict:
+        result, _, _ = await cached_analysis(params, read_cache, write_cache)
+        return result
+
+    async def lines():
+        async for outcome in run_batch(records, validate_analysis_params, analyze):
+            yield json.dumps(outcome, ensure_ascii=False) + "\n"
+
+    return StreamingResponse(lines(), media_type="application/x-ndjson")
+
+@app.post("/api/analyze/metrics")
+async def analyze_metrics(request: Request):
+    """Vitals and metrics of the input from the local metrics engine, without calling a model.
+
+    Takes the /api/analyze body and returns in milliseconds; the same metrics
+    are part of every analysis result (and the first event of a stream), so
+    clients can show them while the narrative is generated.
+    """
+    params = await read_analysis_request(request)
+    vitals = extract_vitals(params["sequence"])
+    return {
+        "success": True,
+        "vitals": vitals.as_dict(),
+        "metrics": compute_metrics(params["sequence"], vitals)
+    }
+
+@app.post("/api/analyze/metrics/batch")
+async def analyze_metrics_batch(request: Request):
+    """Metrics of many records at once, scored in one vectorised pass without calling a model.
+
+    Takes an /api/analyze/batch body and returns one outcome per record, in
+    input order: `{"index", "id", "success": true, "metrics"}` or
+    `{"index", "id", "success": false, "status_code", "error"}`.
+    """
+    raw_body = await request.body()
+    records = parse_batch_records(raw_body.decode('utf-8'))
+    outcomes, sequences = [], []
+    for index, record in enumerate(records):
+        outcome = {"index": index}
+        if isinstance(record, dict) and "id" in record:
+            outcome["id"] = record["id"]
+        try:
+            if isinstance(record, Exception):
+                raise record
+            sequences.append(validate_analysis_params(record)["sequence"])
+            outcome["success"] = True
+        except HTTPException as e:
+            outcome.update(success=False, status_code=e.status_code, error=e.detail)
+        outcomes.append(outcome)
+
+    # Extraction is per text and CPU-bound, so keep it off the event loop
+    scored = iter(await asyncio.get_running_loop().run_in_executor(None, compute_metrics_batch, sequences))
+    for outcome in outcomes:
+        if outcome["success"]:
+            outcome["metrics"] = next(scored)
+    return {"success": True, "results": outcomes}
+
+@app.get("/api/cache/stats")
+async def cache_stats():
+    """Result cache counters (hits, misses, evictions, expirations) and size."""
+    return analysis_cache.stats()
+
+@app.post("/api/analyze/stream")
+async def analyze_data_stream(request: Request):
+    """Streaming variant of /api/analyze.
+
+    Relays provider tokens as `token` events and each completed summary line, risk
+    factor or recommendation as a `section` event, then sends the structured result
+    as a final `analysis` event (or an `error` event) followed by `done`.
+    """
+    params = await read_analysis_request(request)
+
+    async def event_stream():
+        try:
+            async for event, payload in stream_sequence(
+                sequence=params["sequence"],
+                provider=params["provider"],
+                analysis_type=params["analysis_type"]
+            ):
+                if event == "token":
+                    yield sse_event("token", {"text": payload})
+                else:
+                    yield sse_event(event, payload)
+        except HTTPException as e:
+            logger.error(f"[STREAM] Analysis failed: {e.detail}")
+            yield sse_event("error", {"status_code": e.status_code, "error": e.detail})
+        except Exception as e:
+            logger.error(f"[STREAM] Analysis failed: {str(e)}")
+            yield sse_event("error", {"status_code": 500, "error": str(e)})
+        yield sse_event("done", {})
+
+    return StreamingResponse(
+        event_stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
@@ -0,0 +1,103 @@
+import asyncio
+import json
+from typing import Any, AsyncIterator, Awaitable, Callable, Dict, List
+from fastapi import HTTPException
+from .. import config
+
+# Providers analyze_sequence supports; anything else is rejected before a semaphore is made for it
+BATCH_PROVIDERS = ("deepseek", "claude")
+
+_limits: Dict[str, asyncio.Semaphore] = {}
+
+
+def provider_limit(provider: str) -> asyncio.Semaphore:
+    """Shared semaphore capping how many batch records run against a provider at once."""
+    limit = _limits.get(provider)
+    if limit is None:
+        limit = _limits[provider] = asyncio.Semaphore(
+            config.BATCH_PROVIDER_CONCURRENCY.get(provider, config.BATCH_CONCURRENCY)
+        )
+    return limit
+
+
+def parse_batch_records(text: str) -> List[Any]:
+    """Parse a JSON array or NDJSON (one record per line) batch body.
+
+    NDJSON lines that are not valid JSON are returned as HTTPException
+    instances, so that they are reported for that record only.
+    """
+    text = text.strip()
+    if text.startswith("["):
+        try:
+            records = json.loads(text)
+        except json.JSONDecodeError:
+            raise HTTPException(status_code=400, detail="Invalid JSON format")
+    else:
+        records = []
+        for number, line in enumerate(text.splitlines(), start=1):
+            if not line.strip():
+                continue
+            try:
+                records.append(json.loads(line))
+            except json.JSONDecodeError:
+                records.append(HTTPException(status_code=400, detail=f"Invalid JSON on line {number}"))
+
+    if not records:
+        raise HTTPException(status_code=400, detail="No records provided")
+    if len(records) > config.BATCH_MAX_RECORDS:
+        raise HTTPException(
+            status_code=413,
+            detail=f"Batch too large: {len(records)} records exceeds the limit of {config.BATCH_MAX_RECORDS}"
+        )
+    return records
+
+
+async def run_batch(
+    records: List[Any],
+    prepare: Callable[[Any], Dict[str, Any]],
+    analyze: Callable[[Dict[str, Any]], Awaitable[Any]]
+) -> AsyncIterator[Dict[str, Any]]:
+    """Analyze records concurrently and yield one outcome per record as soon as it finishes.
+
+    `prepare` validates a raw record into analysis parameters and `analyze`
+    runs them; each is bounded by the semaphore of the record's provider.
+    At most BATCH_WORKERS records of the batch are in flight at once.
+    Outcomes carry the record's index (and `id`, if it had one) and either
+    `result` or `status_code` and `error`. Records still running when the
+    consumer stops iterating are cancelled.
+    """
+    async def run(index: int, record: Any) -> Dict[str, Any]:
+        outcome = {"index": index}
+        if isinstance(record, dict) and "id" in record:
+            outcome["id"] = record["id"]
+        try:
+            if isinstance(record, Exception):
+                raise record
+            params = prepare(record)
+            if params["provider"] not in BATCH_PROVIDERS:
+                raise HTTPException(status_code=400, detail="Invalid provider specified")
+            async with provider_limit(params["provider"]):
+                result = await analyze(params)
+            outcome.update(success=True, result=result)
+        except HTTPException as e:
+            outcome.update(success=False, status_code=e.status_code, error=e.detail)
+        except Exception as e:
+            outcome.update(success=False, status_code=500, error=str(e))
+        return outcome
+
+    pending = iter(enumerate(records))
+    workers_count = max(1, min(config.BATCH_WORKERS, len(records)))
+    finished: asyncio.Queue = asyncio.Queue(maxsize=workers_count)
+
+    async def worker():
+        # Workers share one iterator, so each record is taken exactly once
+        for index, record in pending:
+            await finished.put(await run(index, record))
+
+    workers = [asyncio.create_task(worker()) for _ in range(workers_count)]
+    try:
+        for _ in records:
+            yield await finished.get()
+    finally:
+        for task in workers:
+            task.cancel()
@@ -0,0 +1,99 @@
+import asyncio
+import json
+import re
+from typing import Any, Awaitable, Callable, Dict, List
+
+CJK_PATTERN = re.compile(r"[\u3000-\u303f\u4e00-\u9fff\uff00-\uffef]")
+
+# Categorical metrics are merged to the most severe value seen in any chunk
+SEVERITY_ORDER = {"low": 0, "medium": 1, "high": 2}
+
+
+def estimate_tokens(text: str) -> float:
+    """Rough token count: one per CJK character, one per four other characters."""
+    cjk = len(CJK_PATTERN.findall(text))
+    return cjk + (len(text) - cjk) / 4
+
+
+def chunk_text(text: str, max_tokens: int) -> List[str]:
+    """Split text into chunks of at most `max_tokens`, breaking on line boundaries where possible."""
+    if estimate_tokens(text) <= max_tokens:
+        return [text]
+
+    chunks, current, current_tokens = [], [], 0.0
+    for line in text.split("\n"):
+        # Count the joining newline too, so a packed chunk never exceeds the budget
+        tokens = estimate_tokens(line + "\n")
+        if tokens > max_tokens:
+            # A single oversized line (e.g. a raw sequence) is cut by characters
+            if current:
+                chunks.append("\n".join(current))
+                current, current_tokens = [], 0.0
+            step = max(1, int(len(line) * max_tokens / tokens))
+            chunks.extend(line[i:i + step] for i in range(0, len(line), step))
+            continue
+        if current and current_tokens + tokens > max_tokens:
+            chunks.append("\n".join(current))
+            current, current_tokens = [], 0.0
+        current.append(line)
+        current_tokens += tokens
+    if current:
+        chunks.append("\n".join(current))
+    return [chunk for chunk in chunks if chunk.strip()]
+
+
+async def map_chunks(chunks: List[str], analyze: Callable[[str], Awaitable[Any]], concurrency: int) -> List[Any]:
+    """Analyze chunks concurrently, at most `concurrency` at a time, keeping their order."""
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def run(chunk: str):
+        async with semaphore:
+            return await analyze(chunk)
+
+    return await asyncio.gather(*(run(chunk) for chunk in chunks))
+
+
+def _dedupe(items: List[Any]) -> List[Any]:
+    seen, unique = set(), []
+    for item in items:
+        marker = json.dumps(item, ensure_ascii=False, sort_keys=True) if isinstance(item, (dict, list)) else item
+        if marker not in seen:
+            seen.add(marker)
+            unique.append(item)
+    return unique
+
+
+def _merge_metrics(metrics: List[Dict[str, Any]]) -> Dict[str, Any]:
+    merged = {}
+    for name in _dedupe([name for m in metrics for name in m]):
+        values = [m[name] for m in metrics if name in m]
+        if all(isinstance(v, (int, float)) and not isinstance(v, bool) for v in values):
+            average = sum(values) / len(values)
+            merged[name] = round(average) if all(isinstance(v, int) for v in values) else round(average, 2)
+        elif all(v in SEVERITY_ORDER for v in values):
+            merged[name] = max(values, key=SEVERITY_ORDER.get)
+        else:
+            merged[name] = values[0]
+    return merged
+
+
+def merge_analyses(analyses: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """Reduce per-chunk analyses into one.
+
+    Summaries are joined, lists are concatenated without duplicates, numeric
+    metrics are averaged and low/medium/high levels keep the most severe value.
+    """
+    if len(analyses) == 1:
+        return analyses[0]
+    merged: Dict[str, Any] = {}
+    for key in _dedupe([key for analysis in analyses for key in analysis]):
+        values = [a[key] for a in analyses if key in a]
+        if key == "summary":
+            merged[key] = "\n".join(_dedupe([v for v in values if v]))
+        elif all(isinstance(v, list) for v in values):
+            merged[key] = _dedupe([item for v in values for item in v])
+        elif all(isinstance(v, dict) for v in values):
+            merged[key] = _merge_metrics(values)
+        else:
+            merged[key] = values[0]
+    return merged
@@ -1,6 +1,7 @@
 import os
-import httpx
 from typing import Dict, Any
+from .http_client import get_http_client
+from .retry import get_retry_policy
 
 async def analyze_with_claude(text_data: str) -> Dict[str, Any]:
     """Analyze health data using Claude API."""
@@ -17,54 +18,54 @@ async def analyze_with_claude(text_data: str) -> Dict[str, Any]:
     Focus on key health indicators, risk factors, and provide actionable recommendations."""
 
     try:
-        async with httpx.AsyncClient(timeout=30.0) as client:
-            response = await client.post(
-                "https://api.anthropic.com/v1/messages",
-                headers=headers,
-                json={
-                    "model": "claude-3-opus-20240229",
-                    "max_tokens": 1000,
-                    "messages": [
-                        {"role": "system", "content": system_prompt},
-                        {"role": "user", "content": text_data}
-                    ]
-                }
-            )
-            
-            if response.status_code != 200:
-                return {
-                    "success": False,
-                    "error": f"API request failed with status {response.status_code}"
-                }
-
-            result = response.json()
-            content = result["content"][0]["text"]
-            
-            # Parse the response into structured format
-            lines = content.split("\n")
-            health_assessment = []
-            recommendations = []
-            
-            current_section = None
-            for line in lines:
-                if "Health Assessment:" in line:
-                    current_section = "assessment"
-                elif "Recommendations:" in line:
-                    current_section = "recommendations"
-                elif line.strip().startswith("- "):
-                    if current_section == "assessment":
-                        health_assessment.append(line.strip()[2:])
-                    elif current_section == "recommendations":
-                        recommendations.append(line.strip()[2:])
+        client = get_http_client("claude")
+        response = await get_retry_policy("claude").call(lambda: client.post(
+            "https://api.anthropic.com/v1/messages",
+            headers=headers,
+            json={
+                "model": "claude-3-opus-20240229",
+                "max_tokens": 1000,
+                "messages": [
+                    {"role": "system", "content": system_prompt},
+                    {"role": "user", "content": text_data}
+                ]
+            }
+        ))
 
+        if response.status_code != 200:
             return {
-                "success": True,
-                "analysis": {
-                    "healthAssessment": health_assessment,
-                    "recommendations": recommendations
-                }
+                "success": False,
+                "error": f"API request failed with status {response.status_code}"
             }
 
+        result = response.json()
+        content = result["content"][0]["text"]
+
+        # Parse the response into structured format
+        lines = content.split("\n")
+        health_assessment = []
+        recommendations = []
+
+        current_section = None
+        for line in lines:
+            if "Health Assessment:" in line:
+                current_section = "assessment"
+            elif "Recommendations:" in line:
+                current_section = "recommendations"
+            elif line.strip().startswith("- "):
+                if current_section == "assessment":
+                    health_assessment.append(line.strip()[2:])
+                elif current_section == "recommendations":
+                    recommendations.append(line.strip()[2:])
+
+        return {
+            "success": True,
+            "analysis": {
+                "healthAssessment": health_assessment,
+                "recommendations": recommendations
+            }
+        }
+
     except Exception as e:
         return {
             "success": False,
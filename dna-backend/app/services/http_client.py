@@ -0,0 +1,71 @@
+import importlib.util
+import logging
+from typing import Dict
+
+import httpx
+
+from .. import config
+
+logger = logging.getLogger(__name__)
+
+# Default request timeout (seconds) for each provider's shared client
+PROVIDER_TIMEOUTS: Dict[str, float] = {
+    "ollama": float(config.OLLAMA_TIMEOUT_SECONDS),
+    "deepseek": 30.0,
+    "claude": 30.0,
+}
+
+_clients: Dict[str, httpx.AsyncClient] = {}
+
+
+def _http2_enabled(provider: str) -> bool:
+    """HTTP/2 is only used for remote providers and only if `h2` is installed."""
+    if not config.HTTP2_ENABLED or provider == "ollama":
+        return False
+    if importlib.util.find_spec("h2") is None:
+        logger.warning("HTTP2_ENABLED is set but the 'h2' package is not installed, using HTTP/1.1")
+        return False
+    return True
+
+
+def _build_client(provider: str) -> httpx.AsyncClient:
+    limits = httpx.Limits(
+        max_connections=config.HTTP_MAX_CONNECTIONS,
+        max_keepalive_connections=config.HTTP_MAX_KEEPALIVE_CONNECTIONS,
+        keepalive_expiry=config.HTTP_KEEPALIVE_EXPIRY,
+    )
+    kwargs = {
+        "timeout": PROVIDER_TIMEOUTS.get(provider, 30.0),
+        "limits": limits,
+        "http2": _http2_enabled(provider),
+    }
+    if provider == "ollama":
+        kwargs["base_url"] = config.OLLAMA_API_BASE
+    return httpx.AsyncClient(**kwargs)
+
+
+def get_http_client(provider: str) -> httpx.AsyncClient:
+    """Return the long-lived client for a provider, creating it on first use."""
+    client = _clients.get(provider)
+    if client is None or getattr(client, "is_closed", False):
+        client = _build_client(provider)
+        _clients[provider] = client
+    return client
+
+
+async def open_http_clients() -> None:
+    """Create the pooled clients for every provider (FastAPI startup)."""
+    for provider in PROVIDER_TIMEOUTS:
+        get_http_client(provider)
+    logger.info(f"Opened pooled HTTP clients for: {', '.join(_clients)}")
+
+
+async def close_http_clients() -> None:
+    """Close all pooled clients (FastAPI shutdown)."""
+    clients = list(_clients.values())
+    _clients.clear()
+    for client in clients:
+        try:
+            await client.aclose()
+        except Exception as e:
+            logger.warning(f"Failed to close HTTP client: {str(e)}")
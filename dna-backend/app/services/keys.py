@@ -0,0 +1,18 @@
+import hashlib
+import json
+import unicodedata
+from typing import Optional
+
+
+def normalize_sequence(sequence: str) -> str:
+    """Canonical form of an input for keying: NFKC (full-width to half-width) and collapsed whitespace."""
+    return " ".join(unicodedata.normalize("NFKC", sequence).split())
+
+
+def analysis_key(sequence: str, provider: Optional[str] = None, analysis_type: str = "health", **options) -> str:
+    """Hash identifying an analysis request by its normalised input and settings."""
+    payload = json.dumps(
+        [normalize_sequence(sequence), provider, analysis_type, sorted(options.items())],
+        ensure_ascii=False
+    )
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
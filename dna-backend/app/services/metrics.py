@@ -0,0 +1,117 @@
+from typing import Any, Dict, List, Optional, Tuple
+from .vitals import Vitals, extract_vitals
+
+# Text indicators feeding the health metrics
+HEALTH_INDICATORS = {
+    "high_risk": ["高血压", "高血糖", "肥胖", "吸烟", "过度疲劳", "血压偏高", "血糖偏高", "胆固醇偏高", "超重", "心血管", "糖尿病"],
+    "sleep_issues": ["睡眠不足", "失眠", "睡眠质量差", "睡眠时间不足", "深夜"],
+    "stress_indicators": ["压力", "焦虑", "紧张", "疲劳", "工作压力", "加班", "不规律"]
+}
+
+# Medical thresholds (canonical units of the extracted vitals)
+THRESHOLDS = {
+    "blood_pressure_high": 140,  # systolic, mmHg
+    "blood_glucose_high": 7.0,   # mmol/L
+    "cholesterol_high": 5.2,     # mmol/L
+    "bmi_overweight": 25.0,
+    "bmi_obese": 30.0
+}
+
+# Reference-range rules: (vital, comparison, limit, risk points, finding). Per vital
+# only the first matching rule counts, so bands are listed most severe first
+RISK_RULES: List[Tuple[str, str, float, float, str]] = [
+    ("systolic_bp", ">=", THRESHOLDS["blood_pressure_high"], 2, "血压偏高"),
+    ("diastolic_bp", ">=", 90, 1, "舒张压偏高"),
+    ("glucose", ">=", THRESHOLDS["blood_glucose_high"], 2, "血糖偏高"),
+    ("glucose", ">=", 6.1, 1, "空腹血糖受损"),
+    ("total_cholesterol", ">=", THRESHOLDS["cholesterol_high"], 1.5, "胆固醇偏高"),
+    ("ldl_cholesterol", ">=", 4.1, 1, "低密度脂蛋白胆固醇偏高"),
+    ("hdl_cholesterol", "<", 1.0, 1, "高密度脂蛋白胆固醇偏低"),
+    ("triglycerides", ">=", 2.3, 1, "甘油三酯偏高"),
+    ("bmi", ">=", THRESHOLDS["bmi_obese"], 2, "肥胖"),
+    ("bmi", ">=", THRESHOLDS["bmi_overweight"], 1, "超重"),
+    ("hemoglobin", "<", 110, 1, "血红蛋白偏低"),
+    ("heart_rate", ">", 100, 1, "心率偏快"),
+    ("heart_rate", "<", 50, 1, "心率偏慢"),
+]
+
+COMPARISONS = {
+    ">=": lambda value, limit: value >= limit,
+    ">": lambda value, limit: value > limit,
+    "<": lambda value, limit: value < limit,
+}
+
+# Score deductions: (points per unit, cap)
+RISK_WEIGHT = (7, 50)
+SLEEP_WEIGHT = (6, 20)
+STRESS_WEIGHT = (5, 20)
+MIN_HEALTH_SCORE = 30
+
+# Levels by score, most severe first: (minimum, level)
+RISK_LEVELS = [(4, "high"), (2, "medium"), (0, "low")]
+STRESS_LEVELS = [(3, "high"), (1, "medium"), (0, "low")]
+SLEEP_QUALITY = [(2, "poor"), (1, "fair"), (0, "good")]
+
+
+def _level(score: float, levels: List[Tuple[float, str]]) -> str:
+    for minimum, level in levels:
+        if score >= minimum:
+            return level
+    return levels[-1][1]
+
+
+def findings(vitals: Vitals) -> List[Tuple[str, float, str]]:
+    """The (vital, risk points, finding) of every rule that applies, one per vital."""
+    matched, seen = [], set()
+    for vital, comparison, limit, points, finding in RISK_RULES:
+        value = getattr(vitals, vital)
+        if vital in seen or value is None or not COMPARISONS[comparison](value, limit):
+            continue
+        seen.add(vital)
+        matched.append((vital, points, finding))
+    return matched
+
+
+def score_metrics(vitals: Vitals, high_risk: int, sleep_issues: int, stress_indicators: int) -> Dict[str, Any]:
+    """Metrics from extracted vitals and the distinct keyword counts of each indicator table."""
+    risk_score = sum(points for _, points, _ in findings(vitals))
+    risk_score += 0.5 * high_risk
+
+    health_score = 100
+    health_score -= min(RISK_WEIGHT[1], risk_score * RISK_WEIGHT[0])
+    health_score -= min(SLEEP_WEIGHT[1], sleep_issues * SLEEP_WEIGHT[0])
+    health_score -= min(STRESS_WEIGHT[1], stress_indicators * STRESS_WEIGHT[0])
+    health_score = max(MIN_HEALTH_SCORE, health_score)
+
+    confidence_score = min(0.95, 0.6 + 0.07 * len(vitals.as_dict()))
+
+    return {
+        "healthScore": round(health_score),
+        "stressLevel": _level(stress_indicators, STRESS_LEVELS),
+        "sleepQuality": _level(sleep_issues, SLEEP_QUALITY),
+        "riskLevel": _level(risk_score, RISK_LEVELS),
+        "confidenceScore": round(confidence_score, 2),
+        "healthIndex": round(max(MIN_HEALTH_SCORE, health_score - (100 - confidence_score * 100) / 5))
+    }
+
+
+def indicator_counts(text: str) -> Tuple[int, int, int]:
+    """Distinct high-risk, sleep and stress keywords in the text."""
+    return tuple(
+        sum(1 for keyword in HEALTH_INDICATORS[label] if keyword in text)
+        for label in ("high_risk", "sleep_issues", "stress_indicators")
+    )
+
+
+def compute_metrics(text: str, vitals: Optional[Vitals] = None) -> Dict[str, Any]:
+    """Metrics of a health record from its vitals and text indicators alone.
+
+    Deterministic and independent of any model output, so every provider
+    reports the same metrics for the same input and they are available before
+    (or without) an LLM narrative. The confidence score reflects how many
+    vitals the record contains. `vitals` are the record's already extracted
+    vitals, if the caller has them.
+    """
+    if vitals is None:
+        vitals = extract_vitals(text)
+    return score_metrics(vitals, *indicator_counts(text))
@@ -0,0 +1,87 @@
+from typing import Any, Dict, List, Sequence
+import numpy as np
+from .metrics import (
+    COMPARISONS, MIN_HEALTH_SCORE, RISK_LEVELS, RISK_RULES, RISK_WEIGHT, SLEEP_QUALITY,
+    SLEEP_WEIGHT, STRESS_LEVELS, STRESS_WEIGHT, indicator_counts
+)
+from .vitals import Vitals, extract_vitals
+
+# Column order of the vitals matrix
+VITAL_COLUMNS = list(Vitals.model_fields)
+
+
+def vitals_matrix(vitals: Sequence[Vitals]) -> np.ndarray:
+    """One row per record, one column per vital; missing values are NaN."""
+    matrix = np.full((len(vitals), len(VITAL_COLUMNS)), np.nan)
+    for row, record in enumerate(vitals):
+        for column, name in enumerate(VITAL_COLUMNS):
+            value = getattr(record, name)
+            if value is not None:
+                matrix[row, column] = value
+    return matrix
+
+
+def _levels(scores: np.ndarray, levels) -> np.ndarray:
+    return np.select([scores >= minimum for minimum, _ in levels], [level for _, level in levels], levels[-1][1])
+
+
+def score_batch(
+    matrix: np.ndarray,
+    high_risk: np.ndarray,
+    sleep_issues: np.ndarray,
+    stress_indicators: np.ndarray
+) -> Dict[str, np.ndarray]:
+    """Columnar `score_metrics`: every metric for the whole batch in one pass.
+
+    Takes the vitals matrix and the distinct keyword counts per record and
+    applies every rule to a whole column at once. NaN never satisfies a
+    comparison, so missing vitals score nothing, as in the scalar engine.
+    """
+    risk_score = np.zeros(len(matrix))
+    # Per vital only the first matching rule counts
+    unmatched = {vital: np.ones(len(matrix), dtype=bool) for vital in VITAL_COLUMNS}
+    for vital, comparison, limit, points, _ in RISK_RULES:
+        hit = unmatched[vital] & COMPARISONS[comparison](matrix[:, VITAL_COLUMNS.index(vital)], limit)
+        risk_score += np.where(hit, points, 0)
+        unmatched[vital] &= ~hit
+    risk_score += 0.5 * high_risk
+
+    health_score = 100 - np.minimum(RISK_WEIGHT[1], risk_score * RISK_WEIGHT[0])
+    health_score -= np.minimum(SLEEP_WEIGHT[1], sleep_issues * SLEEP_WEIGHT[0])
+    health_score -= np.minimum(STRESS_WEIGHT[1], stress_indicators * STRESS_WEIGHT[0])
+    health_score = np.maximum(MIN_HEALTH_SCORE, health_score)
+
+    confidence_score = np.minimum(0.95, 0.6 + 0.07 * np.count_nonzero(~np.isnan(matrix), axis=1))
+
+    # np.rint rounds half to even, like round()
+    return {
+        "healthScore": np.rint(health_score).astype(int),
+        "stressLevel": _levels(stress_indicators, STRESS_LEVELS),
+        "sleepQuality": _levels(sleep_issues, SLEEP_QUALITY),
+        "riskLevel": _levels(risk_score, RISK_LEVELS),
+        "confidenceScore": confidence_score,
+        "healthIndex": np.rint(
+            np.maximum(MIN_HEALTH_SCORE, health_score - (100 - confidence_score * 100) / 5)
+        ).astype(int)
+    }
+
+
+def compute_metrics_batch(texts: Sequence[str]) -> List[Dict[str, Any]]:
+    """`compute_metrics` for many records, with the scoring done in one vectorised pass.
+
+    Vitals extraction and keyword scanning stay per text; the per-record
+    results are identical to those of the scalar engine.
+    """
+    counts = np.array([indicator_counts(text) for text in texts], dtype=float).reshape(-1, 3).T
+    scores = score_batch(vitals_matrix([extract_vitals(text) for text in texts]), *counts)
+    return [
+        {
+            "healthScore": int(scores["healthScore"][row]),
+            "stressLevel": str(scores["stressLevel"][row]),
+            "sleepQuality": str(scores["sleepQuality"][row]),
+            "riskLevel": str(scores["riskLevel"][row]),
+            "confidenceScore": round(float(scores["confidenceScore"][row]), 2),
+            "healthIndex": int(scores["healthIndex"][row])
+        }
+        for row in range(len(texts))
+    ]
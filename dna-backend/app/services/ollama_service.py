@@ -1,30 +1,68 @@
-import httpx
 import asyncio
 import json
-from typing import Dict, Any, Optional
+from typing import Dict, Any, AsyncIterator, Optional
 from .. import config
+from .http_client import get_http_client
+from .retry import get_retry_policy
+from .structured_output import json_prompt, parse_structured
+
+def build_ollama_prompt(sequence: str, analysis_type: str = "health", structured: bool = False) -> str:
+    if structured:
+        system_prompt = json_prompt(f"你是一位专业的{analysis_type}分析AI助手。请分析以下数据并提供详细的分析结果。")
+    else:
+        system_prompt = f"你是一位专业的{analysis_type}分析AI助手。请分析以下数据并提供详细的分析结果，包括总结、风险因素和建议。请确保使用中文回复。"
+    return f"{system_prompt}\n\n分析数据：{sequence}"
 
 async def analyze_with_ollama(sequence: str, analysis_type: str = "health") -> Dict[str, Any]:
     try:
-        async with httpx.AsyncClient(base_url=config.OLLAMA_API_BASE, timeout=config.OLLAMA_TIMEOUT_SECONDS) as client:
-            system_prompt = f"你是一位专业的{analysis_type}分析AI助手。请分析以下数据并提供详细的分析结果，包括总结、风险因素和建议。请确保使用中文回复。"
-            
-            response = await client.post("/api/generate", json={
-                "model": config.OLLAMA_MODEL,
-                "prompt": f"{system_prompt}\n\n分析数据：{sequence}",
-                "stream": False
-            })
+        client = get_http_client("ollama")
+        payload = {
+            "model": config.OLLAMA_MODEL,
+            "prompt": build_ollama_prompt(sequence, analysis_type, config.STRUCTURED_OUTPUT_ENABLED),
+            "stream": False
+        }
+        if config.STRUCTURED_OUTPUT_ENABLED:
+            payload["format"] = "json"
+            payload["options"] = {"num_predict": config.STRUCTURED_OUTPUT_MAX_TOKENS}
+        response = await get_retry_policy("ollama").call(lambda: client.post("/api/generate", json=payload))
+
+        if response.status_code != 200:
+            raise RuntimeError(f"Ollama API error: {response.status_code}")
             
+        result = response.json()
+        return parse_ollama_response(result.get("response", ""), analysis_type)
+    except Exception as e:
+        raise RuntimeError(f"Ollama model failed: {str(e)}") from e
+
+async def stream_with_ollama(sequence: str, analysis_type: str = "health") -> AsyncIterator[str]:
+    """Yield generated tokens from Ollama's streaming NDJSON response."""
+    try:
+        client = get_http_client("ollama")
+        async with client.stream("POST", "/api/generate", json={
+            "model": config.OLLAMA_MODEL,
+            "prompt": build_ollama_prompt(sequence, analysis_type),
+            "stream": True
+        }) as response:
             if response.status_code != 200:
                 raise RuntimeError(f"Ollama API error: {response.status_code}")
-                
-            result = response.json()
-            return parse_ollama_response(result.get("response", ""), analysis_type)
+
+            async for line in response.aiter_lines():
+                if not line.strip():
+                    continue
+                chunk = json.loads(line)
+                if chunk.get("error"):
+                    raise RuntimeError(f"Ollama API error: {chunk['error']}")
+                if chunk.get("response"):
+                    yield chunk["response"]
+                if chunk.get("done"):
+                    break
     except Exception as e:
         raise RuntimeError(f"Ollama model failed: {str(e)}") from e
 
 def parse_ollama_response(raw_response: str, analysis_type: str) -> Dict[str, Any]:
-    lines = raw_response.split("\n")
+    structured = parse_structured(raw_response)
+    # JSON-mode responses skip the line-by-line section heuristics
+    lines = [] if structured else raw_response.split("\n")
     current_section = None
     summary = []
     recommendations = []
@@ -50,6 +88,11 @@ def parse_ollama_response(raw_response: str, analysis_type: str) -> Dict[str, An
         elif current_section == "summary" and not line.startswith("#"):
             summary.append(line)
     
+    if structured:
+        summary = [structured.summary]
+        recommendations = structured.recommendations
+        risk_factors = structured.risk_factors
+
     metrics = {
         "healthScore": 75,
         "stressLevel": "medium",
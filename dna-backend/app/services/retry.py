@@ -0,0 +1,133 @@
+import asyncio
+import email.utils
+import logging
+import random
+import time
+from typing import Awaitable, Callable, Dict, Optional
+import httpx
+from .. import config
+
+logger = logging.getLogger(__name__)
+
+RETRYABLE_STATUS = {429, 500, 502, 503, 504}
+
+# Errors raised before the provider could have processed the request
+RETRYABLE_ERRORS = (httpx.ConnectError, httpx.ConnectTimeout, httpx.PoolTimeout, httpx.RemoteProtocolError)
+
+
+class RetryBudget:
+    """Token bucket that caps retries at a fraction of the request volume.
+
+    Every first attempt deposits `ratio` tokens and every retry spends one, so
+    during an outage retries add at most `ratio` extra load. The bucket also
+    refills at `min_per_second` so that low-traffic periods can still retry.
+    """
+
+    def __init__(self, ratio: float = 0.2, min_per_second: float = 1.0, max_tokens: float = 10):
+        self.ratio = ratio
+        self.min_per_second = min_per_second
+        self.max_tokens = max_tokens
+        self.tokens = max_tokens
+        self.updated_at = time.monotonic()
+
+    def _refill(self):
+        now = time.monotonic()
+        self.tokens = min(self.max_tokens, self.tokens + (now - self.updated_at) * self.min_per_second)
+        self.updated_at = now
+
+    def deposit(self):
+        self._refill()
+        self.tokens = min(self.max_tokens, self.tokens + self.ratio)
+
+    def withdraw(self) -> bool:
+        self._refill()
+        if self.tokens < 1:
+            return False
+        self.tokens -= 1
+        return True
+
+
+def parse_retry_after(response: Optional[httpx.Response]) -> Optional[float]:
+    """Seconds to wait from a Retry-After header (delta-seconds or HTTP date)."""
+    headers = getattr(response, "headers", None)
+    if not isinstance(headers, (dict, httpx.Headers)):
+        return None
+    value = headers.get("retry-after") or headers.get("Retry-After")
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        return max(0.0, email.utils.parsedate_to_datetime(value).timestamp() - time.time())
+    except (TypeError, ValueError):
+        return None
+
+
+class RetryPolicy:
+    """Bounded retries with full-jitter exponential backoff.
+
+    429 and 5xx responses are retried, as are connection-level errors. A
+    Retry-After header replaces the computed backoff. A retry is only made
+    when the budget allows it and the wait still finishes before `deadline`,
+    which is a time.monotonic() value. Once retries stop, the last response
+    is returned (or the last error raised) for the caller to handle as before.
+    """
+
+    def __init__(self, max_attempts: int = 3, base_delay: float = 0.5, max_delay: float = 8.0,
+                 max_elapsed: float = 30.0, budget: Optional[RetryBudget] = None):
+        self.max_attempts = max_attempts
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.max_elapsed = max_elapsed
+        self.budget = budget or RetryBudget()
+
+    def backoff(self, attempt: int) -> float:
+        return random.uniform(0, min(self.max_delay, self.base_delay * 2 ** (attempt - 1)))
+
+    async def call(self, send: Callable[[], Awaitable[httpx.Response]], deadline: Optional[float] = None) -> httpx.Response:
+        if deadline is None:
+            deadline = time.monotonic() + self.max_elapsed
+        self.budget.deposit()
+        attempt = 0
+        while True:
+            attempt += 1
+            error = None
+            response = None
+            try:
+                response = await send()
+            except RETRYABLE_ERRORS as e:
+                error = e
+            else:
+                if response.status_code not in RETRYABLE_STATUS:
+                    return response
+
+            delay = parse_retry_after(response)
+            if delay is None:
+                delay = self.backoff(attempt)
+            if attempt >= self.max_attempts or time.monotonic() + delay >= deadline or not self.budget.withdraw():
+                if error is not None:
+                    raise error
+                return response
+
+            reason = str(error) if error is not None else f"status {response.status_code}"
+            logger.warning(f"Retrying after {reason} (attempt {attempt}/{self.max_attempts}, waiting {delay:.2f}s)")
+            await asyncio.sleep(delay)
+
+
+_policies: Dict[str, RetryPolicy] = {}
+
+
+def get_retry_policy(provider: str) -> RetryPolicy:
+    """Return the provider's retry policy; each provider has its own budget."""
+    policy = _policies.get(provider)
+    if policy is None:
+        policy = _policies[provider] = RetryPolicy(
+            max_attempts=config.RETRY_MAX_ATTEMPTS,
+            base_delay=config.RETRY_BASE_DELAY_SECONDS,
+            max_delay=config.RETRY_MAX_DELAY_SECONDS,
+            max_elapsed=config.RETRY_MAX_ELAPSED_SECONDS,
+            budget=RetryBudget(ratio=config.RETRY_BUDGET_RATIO, min_per_second=config.RETRY_BUDGET_MIN_PER_SECOND)
+        )
+    return policy
@@ -9,6 +9,7 @@ setup(
         "fastapi>=0.68.0",
         "uvicorn>=0.15.0",
         "pydantic>=2.5.2",
+        "numpy>=1.24",
         "httpx>=0.24.0",
         "aiohttp>=3.9.1",
         "pytest>=7.4.3",
@@ -4,7 +4,9 @@ from unittest.mock import AsyncMock, patch
 from fastapi.testclient import TestClient
 from httpx import AsyncClient, TimeoutException
 from app.main import app
-from app.services import deepseek_service
+from app.services import batch, deepseek_service, http_client, retry
+from app.services.cache import analysis_cache
+from app.services.fingerprint import near_duplicate_index
 
 ASYNC_TIMEOUT = 30  # seconds
 
@@ -91,6 +93,21 @@ def mock_deepseek_api(monkeypatch):
     monkeypatch.setattr(deepseek_service, 'analyze_sequence', mock)
     return mock
 
+@pytest.fixture(autouse=True)
+def reset_http_clients():
+    """Drop pooled clients so each test builds them from its (possibly mocked) httpx."""
+    http_client._clients.clear()
+    retry._policies.clear()
+    batch._limits.clear()
+    analysis_cache.clear()
+    near_duplicate_index.clear()
+    yield
+    http_client._clients.clear()
+    retry._policies.clear()
+    batch._limits.clear()
+    analysis_cache.clear()
+    near_duplicate_index.clear()
+
 @pytest.fixture(autouse=True)
 def mock_env_vars(monkeypatch):
     monkeypatch.setenv("DEEPSEEK_API_KEY", "mock_deepseek_key")
@@ -0,0 +1,118 @@
+import asyncio
+import json
+import pytest
+import app.main as main
+from app import config
+
+def read_lines(response):
+    return [json.loads(line) for line in response.text.splitlines()]
+
+@pytest.mark.asyncio
+async def test_batch_streams_one_line_per_record(async_client, monkeypatch):
+    async def fake_analyze_sequence(**params):
+        if "fail" in params["sequence"]:
+            raise main.HTTPException(status_code=502, detail="provider down")
+        await asyncio.sleep(0.05 if "slow" in params["sequence"] else 0)
+        return {"success": True, "analysis": {"summary": params["sequence"], "type": params["analysis_type"]}}
+
+    monkeypatch.setattr(main, "analyze_sequence", fake_analyze_sequence)
+    records = [
+        {"id": "a", "sequence": "slow 血压：150/95"},
+        {"id": "b", "sequence": "ACGT", "analysis_type": "gene"},
+        {"id": "c", "sequence": "fail"},
+        {"id": "d", "sequence": ""},
+    ]
+
+    response = await async_client.post("/api/analyze/batch", json=records)
+
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("application/x-ndjson")
+    outcomes = read_lines(response)
+    assert sorted(o["id"] for o in outcomes) == ["a", "b", "c", "d"]
+    # Results arrive in completion order, so the slow record comes last
+    assert outcomes[-1]["id"] == "a"
+    by_id = {o["id"]: o for o in outcomes}
+    assert by_id["b"]["result"]["analysis"]["type"] == "gene"
+    assert by_id["c"] == {"index": 2, "id": "c", "success": False, "status_code": 502, "error": "provider down"}
+    assert by_id["d"]["status_code"] == 400
+
+@pytest.mark.asyncio
+async def test_batch_accepts_ndjson_and_reports_bad_lines(async_client, monkeypatch):
+    async def fake_analyze_sequence(**params):
+        return {"success": True, "analysis": {"summary": "ok"}}
+
+    monkeypatch.setattr(main, "analyze_sequence", fake_analyze_sequence)
+    body = '{"sequence": "血糖：7.8"}\n{not json}\n{"sequence": "心率：72"}\n'
+
+    response = await async_client.post("/api/analyze/batch", content=body.encode(),
+                                       headers={"Content-Type": "application/x-ndjson"})
+
+    outcomes = sorted(read_lines(response), key=lambda o: o["index"])
+    assert [o["success"] for o in outcomes] == [True, False, True]
+    assert outcomes[1]["error"] == "Invalid JSON on line 2"
+
+@pytest.mark.asyncio
+async def test_batch_caps_concurrency_per_provider(async_client, monkeypatch):
+    running = {"deepseek": 0, "claude": 0}
+    peak = {"deepseek": 0, "claude": 0}
+
+    async def fake_analyze_sequence(**params):
+        provider = params["provider"]
+        running[provider] += 1
+        peak[provider] = max(peak[provider], running[provider])
+        await asyncio.sleep(0.01)
+        running[provider] -= 1
+        return {"success": True, "analysis": {"summary": "ok"}}
+
+    monkeypatch.setattr(main, "analyze_sequence", fake_analyze_sequence)
+    monkeypatch.setattr(config, "BATCH_CONCURRENCY", 3)
+    monkeypatch.setattr(config, "BATCH_PROVIDER_CONCURRENCY", {"claude": 1})
+    records = [{"sequence": f"记录{i}", "provider": provider} for i in range(6) for provider in ("deepseek", "claude")]
+
+    response = await async_client.post("/api/analyze/batch", json=records)
+
+    assert len(read_lines(response)) == 12
+    assert peak == {"deepseek": 3, "claude": 1}
+
+@pytest.mark.asyncio
+async def test_batch_rejects_oversized_upload(async_client, monkeypatch):
+    monkeypatch.setattr(config, "BATCH_MAX_RECORDS", 2)
+    response = await async_client.post("/api/analyze/batch", json=[{"sequence": "a"}] * 3)
+    assert response.status_code == 413
+
+@pytest.mark.asyncio
+async def test_batch_rejects_unknown_providers(async_client, monkeypatch):
+    from app.services import batch
+
+    async def fake_analyze_sequence(**params):
+        return {"success": True, "analysis": {"summary": "ok"}}
+
+    monkeypatch.setattr(main, "analyze_sequence", fake_analyze_sequence)
+    records = [{"sequence": "血糖：7.8", "provider": provider} for provider in ("made-up-0", "made-up-1", "ollama")]
+
+    response = await async_client.post("/api/analyze/batch", json=records)
+
+    assert [o["status_code"] for o in read_lines(response)] == [400, 400, 400]
+    assert not any(name.startswith("made-up") or name == "ollama" for name in batch._limits)
+
+@pytest.mark.asyncio
+async def test_batch_keeps_at_most_batch_workers_records_in_flight(async_client, monkeypatch):
+    started, running, peak = [], [0], [0]
+
+    async def fake_analyze_sequence(**params):
+        started.append(params["sequence"])
+        running[0] += 1
+        peak[0] = max(peak[0], running[0])
+        await asyncio.sleep(0.01)
+        running[0] -= 1
+        return {"success": True, "analysis": {"summary": "ok"}}
+
+    monkeypatch.setattr(main, "analyze_sequence", fake_analyze_sequence)
+    monkeypatch.setattr(config, "BATCH_WORKERS", 2)
+    monkeypatch.setattr(config, "BATCH_CONCURRENCY", 10)
+    records = [{"sequence": f"记录{i}", "provider": "claude"} for i in range(7)]
+
+    response = await async_client.post("/api/analyze/batch", json=records)
+
+    assert sorted(o["index"] for o in read_lines(response)) == list(range(7))
+    assert len(started) == 7 and peak[0] == 2
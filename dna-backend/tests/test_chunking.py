@@ -0,0 +1,55 @@
+import asyncio
+import pytest
+from app.services.chunking import chunk_text, estimate_tokens, map_chunks, merge_analyses
+
+
+def test_estimate_tokens_counts_cjk_characters_individually():
+    assert estimate_tokens("血压偏高") == 4
+    assert estimate_tokens("ACGT" * 10) == 10
+
+
+def test_chunk_text_keeps_short_input_whole():
+    assert chunk_text("血压：120/80\n心率：70", 100) == ["血压：120/80\n心率：70"]
+
+
+def test_chunk_text_splits_on_lines_and_cuts_long_lines():
+    report = "\n".join(f"第{i}项检查结果正常" for i in range(10))
+    chunks = chunk_text(report, 25)
+    assert len(chunks) > 1
+    assert all(estimate_tokens(chunk) <= 25 for chunk in chunks)
+    assert "\n".join(chunks) == report
+
+    sequence = "ACGT" * 100
+    chunks = chunk_text(sequence, 20)
+    assert all(estimate_tokens(chunk) <= 20 for chunk in chunks)
+    assert "".join(chunks) == sequence
+
+
+@pytest.mark.asyncio
+async def test_map_chunks_bounds_concurrency_and_keeps_order():
+    running = 0
+    peak = 0
+
+    async def analyze(chunk):
+        nonlocal running, peak
+        running += 1
+        peak = max(peak, running)
+        await asyncio.sleep(0.01)
+        running -= 1
+        return chunk.upper()
+
+    assert await map_chunks(list("abcdef"), analyze, 2) == list("ABCDEF")
+    assert peak == 2
+
+
+def test_merge_analyses_dedupes_lists_and_combines_metrics():
+    merged = merge_analyses([
+        {"summary": "血压偏高", "recommendations": ["规律运动"], "risk_factors": ["高血压"],
+         "metrics": {"healthScore": 70, "riskLevel": "medium"}},
+        {"summary": "血糖偏高", "recommendations": ["规律运动", "控制饮食"], "risk_factors": ["糖尿病"],
+         "metrics": {"healthScore": 80, "riskLevel": "high"}},
+    ])
+    assert merged["summary"] == "血压偏高\n血糖偏高"
+    assert merged["recommendations"] == ["规律运动", "控制饮食"]
+    assert merged["risk_factors"] == ["高血压", "糖尿病"]
+    assert merged["metrics"] == {"healthScore": 75, "riskLevel": "high"}
@@ -0,0 +1,62 @@
+import asyncio
+import pytest
+import app.main as main
+
+@pytest.mark.asyncio
+async def test_duplicate_analyze_requests_share_one_call(async_client, monkeypatch):
+    calls = []
+
+    async def fake_analyze_sequence(**params):
+        calls.append(params["sequence"])
+        await asyncio.sleep(0.05)
+        return {"success": True, "analysis": {"summary": "ok"}}
+
+    monkeypatch.setattr(main, "analyze_sequence", fake_analyze_sequence)
+
+    responses = await asyncio.gather(
+        async_client.post("/api/analyze", json={"sequence": "血压：150/95"}),
+        async_client.post("/api/analyze", json={"sequence": " 血压:150/95\n"}),
+        async_client.post("/api/analyze", json={"sequence": "血压：150/95", "analysis_type": "gene"}),
+    )
+
+    assert [r.status_code for r in responses] == [200, 200, 200]
+    assert len(calls) == 2
+
+@pytest.mark.asyncio
+async def test_analyze_results_are_cached(async_client, monkeypatch):
+    calls = []
+
+    async def fake_analyze_sequence(**params):
+        calls.append(params)
+        return {"success": True, "analysis": {"summary": "ok"}}
+
+    monkeypatch.setattr(main, "analyze_sequence", fake_analyze_sequence)
+    body = {"sequence": "血糖：8.1"}
+
+    first = await async_client.post("/api/analyze", json=body)
+    second = await async_client.post("/api/analyze", json=body)
+    flags_differ = await async_client.post("/api/analyze", json={**body, "include_metrics": False})
+    forced = await async_client.post("/api/analyze", json=body, headers={"Cache-Control": "no-cache"})
+
+    assert [r.headers["X-Cache"] for r in (first, second, flags_differ, forced)] == ["MISS", "HIT", "MISS", "BYPASS"]
+    assert second.json() == first.json()
+    assert len(calls) == 3
+
+@pytest.mark.asyncio
+async def test_near_duplicate_requests_hit_cache_when_enabled(async_client, monkeypatch):
+    from app.services.fingerprint import near_duplicate_index
+    calls = []
+
+    async def fake_analyze_sequence(**params):
+        calls.append(params)
+        return {"success": True, "analysis": {"summary": "ok"}}
+
+    monkeypatch.setattr(main, "analyze_sequence", fake_analyze_sequence)
+    monkeypatch.setattr(near_duplicate_index, "threshold", 0.8)
+
+    await async_client.post("/api/analyze", json={"sequence": "血压：120/80，血糖：5.6。最近睡眠不好，工作压力大。"})
+    response = await async_client.post("/api/analyze", json={"sequence": "血糖: 5.6 血压: 120 / 80 最近睡眠不好,工作压力大"})
+
+    assert response.headers["X-Cache"] == "HIT"
+    assert response.headers["X-Cache-Tier"] == "near-duplicate"
+    assert len(calls) == 1
@@ -149,6 +149,40 @@ async def test_analyze_with_deepseek_rate_limit(monkeypatch):
     assert exc_info.value.status_code == 429
     assert "DeepSeek API rate limit exceeded" in str(exc_info.value.detail)
 
+@pytest.mark.asyncio
+async def test_analyze_with_deepseek_retries_after_rate_limit(monkeypatch):
+    completion = {"choices": [{"message": {"content": "### 健康状况总结\n整体良好\n\n### 改善建议\n- 规律运动"}}]}
+
+    class MockResponse:
+        def __init__(self, status_code, headers=None):
+            self.status_code = status_code
+            self.headers = headers or {}
+
+        async def aread(self):
+            return json.dumps(completion).encode()
+
+        def json(self):
+            return completion
+
+    class MockClient:
+        calls = 0
+
+        def __init__(self, *args, **kwargs):
+            pass
+
+        async def post(self, *args, **kwargs):
+            MockClient.calls += 1
+            if MockClient.calls == 1:
+                return MockResponse(429, {"Retry-After": "0"})
+            return MockResponse(200)
+
+    monkeypatch.setattr(httpx, "AsyncClient", MockClient)
+
+    result = await analyze_with_deepseek("血压：120/80")
+    assert MockClient.calls == 2
+    assert result["success"] is True
+    assert "规律运动" in result["analysis"]["recommendations"]
+
 @pytest.mark.asyncio
 async def test_analyze_with_deepseek_timeout(monkeypatch):
     class MockClient:
@@ -204,3 +238,100 @@ async def test_analyze_with_deepseek_malformed_response(monkeypatch):
         await analyze_with_deepseek("test health data")
     assert exc_info.value.status_code == 502
     assert "Invalid response" in str(exc_info.value.detail)
+
+@pytest.mark.asyncio
+async def test_analyze_with_deepseek_merges_chunked_input(monkeypatch):
+    from app import config
+
+    class MockResponse:
+        status_code = 200
+        headers = {}
+
+        def __init__(self, completion):
+            self.completion = completion
+
+        async def aread(self):
+            return json.dumps(self.completion).encode()
+
+        def json(self):
+            return self.completion
+
+    class MockClient:
+        prompts = []
+
+        def __init__(self, *args, **kwargs):
+            pass
+
+        async def post(self, *args, **kwargs):
+            prompt = kwargs["json"]["messages"][1]["content"]
+            MockClient.prompts.append(prompt)
+            finding = "血压偏高" if "血压" in prompt else "血糖偏高"
+            content = f"### 健康状况总结\n{finding}\n\n### 风险因素\n- {finding}\n\n### 改善建议\n- 规律运动"
+            return MockResponse({"choices": [{"message": {"content": content}}]})
+
+    monkeypatch.setattr(httpx, "AsyncClient", MockClient)
+    monkeypatch.setattr(config, "CHUNK_MAX_TOKENS", 20)
+
+    report = "血压：150/95，近期头晕明显\n" * 3 + "血糖：7.8，餐后口渴多饮\n" * 3
+    result = await analyze_with_deepseek(report)
+
+    assert len(MockClient.prompts) > 1
+    # Nothing is cut off: every line of the report reached the provider
+    assert "".join(MockClient.prompts).count("血糖：7.8") == 3
+    analysis = result["analysis"]
+    assert analysis["risk_factors"] == ["血压偏高", "血糖偏高"]
+    assert analysis["recommendations"] == ["规律运动"]
+
+@pytest.mark.asyncio
+async def test_analyze_with_deepseek_json_mode(monkeypatch):
+    from app import config
+
+    content = json.dumps({
+        "summary": "血压偏高",
+        "recommendations": ["减少盐分摄入", "规律运动"],
+        "risk_factors": ["高血压风险"]
+    }, ensure_ascii=False)
+
+    class MockResponse:
+        status_code = 200
+        headers = {}
+
+        async def aread(self):
+            return b""
+
+        def json(self):
+            return {"choices": [{"message": {"content": content}}]}
+
+    class MockClient:
+        requests = []
+
+        def __init__(self, *args, **kwargs):
+            pass
+
+        async def post(self, *args, **kwargs):
+            MockClient.requests.append(kwargs["json"])
+            return MockResponse()
+
+    monkeypatch.setattr(httpx, "AsyncClient", MockClient)
+    monkeypatch.setattr(config, "STRUCTURED_OUTPUT_ENABLED", True)
+
+    result = await analyze_with_deepseek("血压：150/95", "gene")
+
+    request = MockClient.requests[0]
+    assert request["response_format"] == {"type": "json_object"}
+    assert request["max_tokens"] == config.STRUCTURED_OUTPUT_MAX_TOKENS
+    assert request["messages"][0]["content"].startswith("你是一位基因测序专家AI助手")
+    analysis = result["analysis"]
+    assert analysis["summary"] == "血压偏高"
+    assert analysis["recommendations"] == ["减少盐分摄入", "规律运动"]
+    assert analysis["risk_factors"] == ["高血压风险"]
+    assert analysis["analysisType"] == "gene"
+
+def test_parse_deepseek_analysis_falls_back_on_invalid_json():
+    from app.services.deepseek_service import parse_deepseek_analysis
+
+    analysis = parse_deepseek_analysis('{"summary": "血压偏高", "recommendations": "规律运动"}')
+    assert analysis["summary"] == '{"summary": "血压偏高", "recommendations": "规律运动"}'
+    analysis = parse_deepseek_analysis("### 健康状况总结\n血压偏高\n\n### 改善建议\n- 规律运动")
+    assert analysis["summary"] == "血压偏高"
+    assert analysis["recommendations"] == ["规律运动"]
@@ -0,0 +1,55 @@
+import json
+import pytest
+from app.services import deepseek_service
+from app.services.metrics import compute_metrics
+from app.services.metrics_batch import compute_metrics_batch
+
+RECORD = "血压：150/95\n血糖：7.8\n睡眠：经常失眠"
+
+@pytest.mark.asyncio
+async def test_metrics_endpoint_needs_no_model(async_client, monkeypatch):
+    async def fail(*args, **kwargs):
+        raise AssertionError("no provider should be called")
+
+    monkeypatch.setattr(deepseek_service, "analyze_with_deepseek", fail)
+    response = await async_client.post("/api/analyze/metrics", json={"sequence": RECORD})
+    assert response.status_code == 200
+    body = response.json()
+    assert body["metrics"] == compute_metrics(RECORD)
+    assert body["metrics"]["riskLevel"] == "high"
+    assert body["vitals"] == {"systolic_bp": 150, "diastolic_bp": 95, "glucose": 7.8}
+
+@pytest.mark.asyncio
+async def test_provider_metrics_replaced_by_local_engine(monkeypatch):
+    async def fake_analyze(sequence, analysis_type):
+        return {"success": True, "analysis": {"metrics": {"healthScore": 75, "geneticRiskScore": 0.3}}}
+
+    monkeypatch.delenv("MOCK_DEEPSEEK_API", raising=False)
+    monkeypatch.setattr(deepseek_service, "analyze_with_deepseek", fake_analyze)
+    result = await deepseek_service.analyze_sequence(RECORD, analysis_type="gene")
+    assert result["analysis"]["metrics"] == {**compute_metrics(RECORD), "geneticRiskScore": 0.3}
+
+def test_batch_engine_matches_scalar_engine():
+    records = [RECORD, "BMI：22，心率：70次/分，睡眠良好", "身高：170cm 体重：95kg，吸烟，焦虑", ""]
+    assert compute_metrics_batch(records) == [compute_metrics(record) for record in records]
+
+@pytest.mark.asyncio
+async def test_metrics_batch_endpoint(async_client, monkeypatch):
+    async def fail(*args, **kwargs):
+        raise AssertionError("no provider should be called")
+
+    monkeypatch.setattr(deepseek_service, "analyze_with_deepseek", fail)
+    body = "\n".join([
+        json.dumps({"id": "a", "sequence": RECORD}),
+        "not json",
+        json.dumps({"id": "c", "sequence": ""}),
+        json.dumps({"sequence": "BMI：31"}),
+    ])
+    response = await async_client.post("/api/analyze/metrics/batch", content=body)
+    assert response.status_code == 200
+    assert response.json()["results"] == [
+        {"index": 0, "id": "a", "success": True, "metrics": compute_metrics(RECORD)},
+        {"index": 1, "success": False, "status_code": 400, "error": "Invalid JSON on line 2"},
+        {"index": 2, "id": "c", "success": False, "status_code": 400, "error": "No sequence provided"},
+        {"index": 3, "success": True, "metrics": compute_metrics("BMI：31")},
+    ]
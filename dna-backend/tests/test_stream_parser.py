@@ -0,0 +1,58 @@
+from app.services.stream_parser import IncrementalSectionParser, parse_sections
+
+COMPLETION = """### 健康状况总结
+患者血压偏高，睡眠质量较差。
+
+### 风险因素
+- 高血压风险
+- **生活方式**
+1. 长期熬夜
+
+### 改善建议
+- 规律运动：每周三次
+- 低盐饮食"""
+
+def test_items_emitted_when_lines_complete():
+    parser = IncrementalSectionParser()
+    assert parser.feed("### 健康状况") == []
+    assert parser.feed("总结\n患者血压") == []
+    assert parser.feed("偏高。\n") == [("summary", "患者血压偏高。")]
+
+def test_split_anywhere_matches_whole_text():
+    whole = IncrementalSectionParser()
+    expected = whole.feed(COMPLETION) + whole.close()
+
+    for size in (1, 3, 7):
+        parser = IncrementalSectionParser()
+        items = []
+        for i in range(0, len(COMPLETION), size):
+            items.extend(parser.feed(COMPLETION[i:i + size]))
+        items.extend(parser.close())
+        assert items == expected
+
+    assert whole.result() == {
+        "summary": "患者血压偏高，睡眠质量较差。",
+        "risk_factors": ["高血压风险", "长期熬夜"],
+        "recommendations": ["规律运动：每周三次", "低盐饮食"],
+    }
+
+def test_inline_header_content():
+    parser = IncrementalSectionParser()
+    items = parser.feed("总结：血压正常\n建议：保持运动\n风险因素：\n- 作息不规律\n")
+    assert items == [
+        ("summary", "血压正常"),
+        ("recommendation", "保持运动"),
+        ("risk_factor", "作息不规律"),
+    ]
+
+def test_repeated_items_are_kept_once():
+    parsed = parse_sections(COMPLETION + "\n\n### 改善建议\n- 低盐饮食\n- 戒烟限酒")
+    assert parsed.recommendations == ["规律运动：每周三次", "低盐饮食", "戒烟限酒"]
+
+def test_unsectioned_lines_are_classified_by_keyword():
+    parsed = parse_sections("血压偏高需要注意。建议每天监测血压\n- 应该减少熬夜\n- 今天天气不错")
+    assert parsed.result()["recommendations"] == []
+    assert parsed.unsectioned == {
+        "recommendation": ["血压偏高需要注意", "建议每天监测血压", "应该减少熬夜"],
+        "risk_factor": [],
+    }
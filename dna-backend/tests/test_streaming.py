@@ -0,0 +1,114 @@
+import pytest
+import httpx
+import json
+from app.services.deepseek_service import stream_sequence
+
+def sse_lines(tokens):
+    for token in tokens:
+        yield "data: " + json.dumps({"choices": [{"delta": {"content": token}}]}, ensure_ascii=False)
+    yield "data: [DONE]"
+
+class MockStreamResponse:
+    def __init__(self, lines, status_code=200):
+        self.status_code = status_code
+        self._lines = list(lines)
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *args):
+        pass
+
+    async def aread(self):
+        return b'{"error": {"message": "Rate limit exceeded"}}'
+
+    async def aiter_lines(self):
+        for line in self._lines:
+            yield line
+
+def mock_client_factory(lines, status_code=200):
+    class MockClient:
+        def __init__(self, *args, **kwargs):
+            pass
+
+        def stream(self, method, url, **kwargs):
+            self.last_request = kwargs
+            return MockStreamResponse(lines, status_code)
+
+    return MockClient
+
+@pytest.mark.asyncio
+async def test_stream_sequence_relays_tokens_then_analysis(monkeypatch):
+    completion = ["### 健康状况总结\n", "整体良好", "\n\n### 风险因素\n- 血压", "偏高\n\n### 改善建议\n- 规律运动\n"]
+    monkeypatch.setattr(httpx, "AsyncClient", mock_client_factory(sse_lines(completion)))
+
+    events = [event async for event in stream_sequence("血压：150/95", provider="deepseek")]
+
+    tokens = [payload for event, payload in events if event == "token"]
+    assert tokens == completion
+    sections = [(p["type"], p["text"]) for event, p in events if event == "section"]
+    assert sections == [("summary", "整体良好"), ("risk_factor", "血压偏高"), ("recommendation", "规律运动")]
+    event, result = events[-1]
+    assert event == "analysis"
+    assert result["success"] is True
+    assert result["provider"] == "deepseek"
+    assert "血压偏高" in result["analysis"]["risk_factors"]
+    assert "规律运动" in result["analysis"]["recommendations"]
+
+@pytest.mark.asyncio
+async def test_stream_sequence_ollama_ndjson(monkeypatch):
+    lines = [
+        json.dumps({"response": "总结：", "done": False}, ensure_ascii=False),
+        json.dumps({"response": "\n血糖偏高\n建议：\n- 控制饮食\n", "done": False}, ensure_ascii=False),
+        json.dumps({"response": "", "done": True}),
+    ]
+    monkeypatch.setattr(httpx, "AsyncClient", mock_client_factory(lines))
+
+    events = [event async for event in stream_sequence("血糖：8.1", provider="ollama")]
+
+    assert [e for e, _ in events] == ["metrics", "token", "token", "section", "section", "analysis"]
+    assert "控制饮食" in events[-1][1]["analysis"]["recommendations"]
+
+@pytest.mark.asyncio
+async def test_stream_sequence_extracts_vitals_once(monkeypatch):
+    from app.services import deepseek_service
+    from app.services.vitals import extract_vitals
+    calls = []
+
+    def counted_extract_vitals(text):
+        calls.append(text)
+        return extract_vitals(text)
+
+    monkeypatch.setattr(deepseek_service, "extract_vitals", counted_extract_vitals)
+    monkeypatch.setattr(httpx, "AsyncClient", mock_client_factory(sse_lines(["总结：血压偏高\n"])))
+
+    events = [event async for event in stream_sequence("血压：150/95", provider="deepseek")]
+
+    assert calls == ["血压：150/95"]
+    assert events[0][0] == "metrics"
+    analysis = events[-1][1]["analysis"]
+    assert (analysis["vitals"], analysis["metrics"]) == (events[0][1]["vitals"], events[0][1]["metrics"])
+
+@pytest.mark.asyncio
+async def test_stream_sequence_provider_error(monkeypatch):
+    from fastapi import HTTPException
+    monkeypatch.setattr(httpx, "AsyncClient", mock_client_factory([], status_code=429))
+
+    with pytest.raises(HTTPException) as exc_info:
+        async for _ in stream_sequence("test", provider="deepseek"):
+            pass
+    assert exc_info.value.status_code == 429
+
+@pytest.mark.asyncio
+async def test_analyze_stream_endpoint_emits_final_analysis(async_client, monkeypatch):
+    monkeypatch.setattr(httpx, "AsyncClient", mock_client_factory(sse_lines(["### 健康状况总结\n", "良好\n"])))
+
+    response = await async_client.post("/api/analyze/stream", json={"sequence": "血压：120/80"})
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/event-stream")
+
+    frames = [f for f in response.text.split("\n\n") if f]
+    events = [f.split("\n")[0].replace("event: ", "") for f in frames]
+    assert events == ["metrics", "token", "token", "section", "analysis", "done"]
+    final = json.loads(frames[4].split("\n")[1][len("data: "):])
+    assert final["analysis"]["summary"]
@@ -0,0 +1,19 @@
+import pytest
+from app.services import deepseek_service
+from app.services.vitals import extract_vitals
+
+def test_extract_vitals_normalises_units():
+    vitals = extract_vitals("血压：150/95 mmHg，空腹血糖：126 mg/dL，总胆固醇：6.2，心率：76次/分")
+    assert vitals.as_dict() == {
+        "systolic_bp": 150, "diastolic_bp": 95, "glucose": 6.99, "total_cholesterol": 6.2, "heart_rate": 76
+    }
+
+@pytest.mark.asyncio
+async def test_analyze_sequence_adds_vitals(monkeypatch):
+    async def fake_analyze(sequence, analysis_type):
+        return {"success": True, "analysis": {"summary": "ok"}}
+
+    monkeypatch.delenv("MOCK_DEEPSEEK_API", raising=False)
+    monkeypatch.setattr(deepseek_service, "analyze_with_deepseek", fake_analyze)
+    result = await deepseek_service.analyze_sequence("BMI：27.3，血压：128/82")
+    assert result["analysis"]["vitals"] == {"systolic_bp": 128, "diastolic_bp": 82, "bmi": 27.3}